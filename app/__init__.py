@@ -29,7 +29,9 @@ from werkzeug.contrib.profiler import ProfilerMiddleware
 from app.views import BlueprintsManager
 from app.api.helpers.auth import AuthManager
 from app.api.helpers.scheduled_jobs import send_after_event_mail, send_event_fee_notification, \
-    send_event_fee_notification_followup
+    send_event_fee_notification_followup, flush_users_last_access, flush_activity_log, \
+    refresh_admin_statistics_snapshots, expire_orders, dispatch_outbox_messages
+from app.api.helpers.last_access import record_user_access
 from app.models.event import Event
 from app.models.role_invite import RoleInvite
 from app.views.healthcheck import health_check_celery, health_check_db, health_check_migrations, check_migrations
@@ -126,6 +128,7 @@ def create_app():
         from app.api.uploads import upload_routes
         from app.api.users import user_misc_routes
         from app.api.orders import order_misc_routes
+        from app.api.waiting_room import waiting_room_routes
 
         app.register_blueprint(api_v1)
         app.register_blueprint(event_copy)
@@ -138,6 +141,7 @@ def create_app():
         app.register_blueprint(user_misc_routes)
         app.register_blueprint(attendee_misc_routes)
         app.register_blueprint(order_misc_routes)
+        app.register_blueprint(waiting_room_routes)
 
     sa.orm.configure_mappers()
 
@@ -175,7 +179,7 @@ init_filters(app)
 @app.before_request
 def track_user():
     if current_user.is_authenticated:
-        current_user.update_lat()
+        record_user_access(current_user)
 
 
 def make_celery(app=None):
@@ -236,6 +240,15 @@ if app.config['ENABLE_ELASTICSEARCH']:
 scheduler.add_job(send_after_event_mail, 'cron', hour=5, minute=30)
 scheduler.add_job(send_event_fee_notification, 'cron', day=1)
 scheduler.add_job(send_event_fee_notification_followup, 'cron', day=15)
+if app.config['LAST_ACCESS_WRITE_BEHIND']:
+    scheduler.add_job(flush_users_last_access, 'interval', seconds=app.config['LAST_ACCESS_FLUSH_INTERVAL'])
+if app.config['ACTIVITY_LOG_WRITE_BEHIND']:
+    scheduler.add_job(flush_activity_log, 'interval', seconds=app.config['ACTIVITY_LOG_FLUSH_INTERVAL'])
+scheduler.add_job(expire_orders, 'interval', seconds=app.config['ORDER_EXPIRY_SWEEP_INTERVAL'])
+scheduler.add_job(dispatch_outbox_messages, 'interval', seconds=app.config['OUTBOX_DISPATCH_INTERVAL'])
+if app.config['ADMIN_STATISTICS_SNAPSHOT_INTERVAL']:
+    scheduler.add_job(refresh_admin_statistics_snapshots, 'interval',
+                      seconds=app.config['ADMIN_STATISTICS_SNAPSHOT_INTERVAL'])
 scheduler.start()
 
 
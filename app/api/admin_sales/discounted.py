@@ -1,4 +1,3 @@
-from sqlalchemy import func
 from flask_rest_jsonapi import ResourceList
 from marshmallow_jsonapi import fields
 from marshmallow_jsonapi.flask import Schema
@@ -8,25 +7,10 @@ from app.api.bootstrap import api
 from app.models import db
 from app.models.discount_code import DiscountCode
 from app.models.event import Event
-from app.models.order import Order, OrderTicket
+from app.models.order import Order
 from app.models.user import User
 
-
-def sales_per_marketer_and_discount_by_status(status):
-    return db.session.query(Event.id.label('event_id'),
-                            DiscountCode.id.label('discount_code_id'),
-                            User.id.label('marketer_id'),
-                            func.sum(Order.amount).label(status + '_sales'),
-                            func.sum(OrderTicket.quantity).label(status + '_tickets')) \
-                     .filter(Event.id == Order.event_id) \
-                     .filter(Order.marketer_id == User.id) \
-                     .filter(Order.discount_code_id == DiscountCode.id) \
-                     .filter(Order.status == status) \
-                     .group_by(Event) \
-                     .group_by(DiscountCode) \
-                     .group_by(User) \
-                     .group_by(Order.status) \
-                     .cte()
+from app.api.admin_sales.utils import summary, order_quantities, order_sales_columns
 
 
 class AdminSalesDiscountedSchema(Schema):
@@ -57,52 +41,30 @@ class AdminSalesDiscountedSchema(Schema):
         Returns sales (dictionary with total sales and ticket count) for
         placed, completed and pending orders
         """
-        res = {'placed': {}, 'completed': {}, 'pending': {}}
-        res['placed']['sales_total'] = obj.placed_sales or 0
-        res['placed']['ticket_count'] = obj.placed_tickets or 0
-        res['completed']['sales_total'] = obj.completed_sales or 0
-        res['completed']['ticket_count'] = obj.completed_tickets or 0
-        res['pending']['sales_total'] = obj.pending_sales or 0
-        res['pending']['ticket_count'] = obj.pending_tickets or 0
-
-        return res
+        return summary(obj)
 
 
 class AdminSalesDiscountedList(ResourceList):
     """
-    Resource for sales by marketer. Joins event marketer and orders and
-    subsequently accumulates sales by status
+    Resource for discounted sales. Groups the orders by event, discount code
+    and marketer and accumulates sales by status in the database
     """
 
     def query(self, _):
-        pending = sales_per_marketer_and_discount_by_status('pending')
-        completed = sales_per_marketer_and_discount_by_status('completed')
-        placed = sales_per_marketer_and_discount_by_status('placed')
-
-        discounts = self.session.query(Event.id.label('event_id'),
-                                       Event.name.label('event_name'),
-                                       DiscountCode.id.label('discount_code_id'),
-                                       DiscountCode.code.label('code'),
-                                       User.id.label('marketer_id'),
-                                       User.email.label('email')) \
-                                .filter(Event.id == Order.event_id) \
-                                .filter(Order.marketer_id == User.id) \
-                                .filter(Order.discount_code_id == DiscountCode.id) \
-                                .cte()
-
-        return self.session.query(discounts, pending, completed, placed) \
-                           .outerjoin(pending,
-                                      (pending.c.event_id == discounts.c.event_id) &
-                                      (pending.c.discount_code_id == discounts.c.discount_code_id) &
-                                      (pending.c.marketer_id == discounts.c.marketer_id)) \
-                           .outerjoin(completed,
-                                      (completed.c.event_id == discounts.c.event_id) &
-                                      (completed.c.discount_code_id == discounts.c.discount_code_id) &
-                                      (completed.c.marketer_id == discounts.c.marketer_id)) \
-                           .outerjoin(placed,
-                                      (placed.c.event_id == discounts.c.event_id) &
-                                      (placed.c.discount_code_id == discounts.c.discount_code_id) &
-                                      (placed.c.marketer_id == discounts.c.marketer_id))
+        quantities = order_quantities()
+        return self.session.query(Event.id.label('event_id'),
+                                  Event.name.label('event_name'),
+                                  DiscountCode.id.label('discount_code_id'),
+                                  DiscountCode.code.label('code'),
+                                  User.id.label('marketer_id'),
+                                  User.email.label('email'),
+                                  *order_sales_columns(quantities)) \
+                           .select_from(Order) \
+                           .join(Event, Event.id == Order.event_id) \
+                           .join(User, User.id == Order.marketer_id) \
+                           .join(DiscountCode, DiscountCode.id == Order.discount_code_id) \
+                           .outerjoin(quantities, quantities.c.order_id == Order.id) \
+                           .group_by(Event.id, DiscountCode.id, User.id)
 
     methods = ['GET']
     decorators = (api.has_permission('is_admin'), )
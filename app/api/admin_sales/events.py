@@ -5,9 +5,8 @@ from flask_rest_jsonapi import ResourceList
 from app.api.bootstrap import api
 from app.models import db
 from app.models.event import Event
-from app.models.order import Order, OrderTicket
 
-from app.api.admin_sales.utils import summary
+from app.api.admin_sales.utils import summary, rollup_sales_columns, join_event_rollups
 
 
 class AdminSalesByEventsSchema(Schema):
@@ -36,17 +35,18 @@ class AdminSalesByEventsSchema(Schema):
         Returns sales (dictionary with total sales and ticket count) for
         placed, completed and pending orders
         """
-        return summary(obj.orders)
+        return summary(obj)
 
 
 class AdminSalesByEventsList(ResourceList):
     """
-    Resource for sales by events. Joins events with orders and subsequently
-    accumulates by status
+    Resource for sales by events. Joins events with their order rollups and
+    accumulates by status in the database
     """
 
     def query(self, _):
-        return self.session.query(Event).outerjoin(Order).outerjoin(OrderTicket)
+        query_ = self.session.query(Event.id, Event.name, Event.starts_at, Event.ends_at, *rollup_sales_columns())
+        return join_event_rollups(query_, Event.id).group_by(Event.id)
 
     methods = ['GET']
     decorators = (api.has_permission('is_admin'), )
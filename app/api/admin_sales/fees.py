@@ -1,11 +1,16 @@
 from marshmallow_jsonapi import fields
 from marshmallow_jsonapi.flask import Schema
 from flask_rest_jsonapi import ResourceList
+from sqlalchemy import and_, case, func
 
 from app.api.bootstrap import api
 from app.api.helpers.utilities import dasherize
 from app.models import db
 from app.models.event import Event
+from app.models.order_rollup import OrderRollup
+from app.models.ticket_fee import DEFAULT_FEE, latest_fees
+
+from app.api.admin_sales.utils import join_event_rollups
 
 
 class AdminSalesFeesSchema(Schema):
@@ -21,28 +26,42 @@ class AdminSalesFeesSchema(Schema):
     id = fields.String()
     name = fields.String()
     payment_currency = fields.String()
-    fee_percentage = fields.Float(attribute='fee')
+    fee_percentage = fields.Float()
     revenue = fields.Method('calc_revenue')
-    ticket_count = fields.Method('calc_ticket_count')
-
-    @staticmethod
-    def calc_ticket_count(obj):
-        "Count all tickets in all orders of this event"
-        return sum([o.amount for o in obj.orders])
+    ticket_count = fields.Integer()
 
     @staticmethod
     def calc_revenue(obj):
         "Returns total revenues of all completed orders for the given event"
-        return sum(
-            [o.get_revenue() for o in obj.orders if o.status == 'completed'])
+        return obj.completed_sales - (obj.completed_sales * (obj.fee_percentage / 100.0))
 
 
 class AdminSalesFeesList(ResourceList):
     """
-    Resource for sales fees and revenue
+    Resource for sales fees and revenue. Joins events with their order rollups and their fee, the fee as a
+    percentage from 0 to 100, and accumulates the completed sales and ticket count in the database
     """
 
+    def query(self, _):
+        fees = latest_fees()
+        query_ = self.session.query(
+            Event.id, Event.name, Event.payment_currency, Event.payment_country,
+            func.coalesce(fees.c.service_fee, DEFAULT_FEE).label('fee_percentage'),
+            func.coalesce(func.sum(case([(OrderRollup.status == 'completed', OrderRollup.amount)], else_=0)), 0)
+                .label('completed_sales'),
+            func.coalesce(func.sum(OrderRollup.ticket_count), 0).label('ticket_count'))
+        # get_fee matches a missing country or currency as well
+        query_ = query_.outerjoin(fees, and_(fees.c.country.isnot_distinct_from(Event.payment_country),
+                                             fees.c.currency.isnot_distinct_from(Event.payment_currency)))
+        return join_event_rollups(query_, Event.id).group_by(Event.id, fees.c.service_fee)
+
     methods = ['GET']
     decorators = (api.has_permission('is_admin'), )
     schema = AdminSalesFeesSchema
-    data_layer = {'model': Event, 'session': db.session}
+    data_layer = {
+        'model': Event,
+        'session': db.session,
+        'methods': {
+            'query': query
+        }
+    }
@@ -1,25 +1,12 @@
 from marshmallow_jsonapi import fields
 from marshmallow_jsonapi.flask import Schema
 from flask_rest_jsonapi import ResourceList
-from sqlalchemy import func
 
 from app.api.bootstrap import api
 from app.models import db
 from app.models.event import Event
-from app.models.order import Order, OrderTicket
 
-
-def sales_per_location_by_status(status):
-    return db.session.query(
-        Event.location_name.label('location'),
-        func.sum(Order.amount).label(status + '_sales'),
-        func.sum(OrderTicket.quantity).label(status + '_tickets')) \
-                     .outerjoin(Order) \
-                     .outerjoin(OrderTicket) \
-                     .filter(Event.id == Order.event_id) \
-                     .filter(Order.status == status) \
-                     .group_by(Event.location_name, Order.status) \
-                     .cte()
+from app.api.admin_sales.utils import summary, rollup_sales_columns, join_event_rollups
 
 
 class AdminSalesByLocationSchema(Schema):
@@ -45,36 +32,18 @@ class AdminSalesByLocationSchema(Schema):
         Returns sales (dictionary with total sales and ticket count) for
         placed, completed and pending orders
         """
-        res = {'placed': {}, 'completed': {}, 'pending': {}}
-        res['placed']['sales_total'] = obj.placed_sales or 0
-        res['placed']['ticket_count'] = obj.placed_tickets or 0
-        res['completed']['sales_total'] = obj.completed_sales or 0
-        res['completed']['ticket_count'] = obj.completed_tickets or 0
-        res['pending']['sales_total'] = obj.pending_sales or 0
-        res['pending']['ticket_count'] = obj.pending_tickets or 0
-
-        return res
+        return summary(obj)
 
 
 class AdminSalesByLocationList(ResourceList):
     """
-    Resource for sales by location. Joins event locations and orders and
-    subsequently accumulates sales by status
+    Resource for sales by location. Joins event locations with the order
+    rollups and accumulates sales by status in the database
     """
 
     def query(self, _):
-        locations = self.session.query(Event.location_name) \
-                                .group_by(Event.location_name) \
-                                .cte()
-
-        pending = sales_per_location_by_status('pending')
-        completed = sales_per_location_by_status('completed')
-        placed = sales_per_location_by_status('placed')
-
-        return self.session.query(locations, pending, completed, placed) \
-                           .outerjoin(pending, pending.c.location == locations.c.location_name) \
-                           .outerjoin(completed, completed.c.location == locations.c.location_name) \
-                           .outerjoin(placed, placed.c.location == locations.c.location_name)
+        query_ = self.session.query(Event.location_name, *rollup_sales_columns())
+        return join_event_rollups(query_, Event.id).group_by(Event.location_name)
 
     methods = ['GET']
     decorators = (api.has_permission('is_admin'), )
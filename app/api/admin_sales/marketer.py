@@ -4,10 +4,10 @@ from flask_rest_jsonapi import ResourceList
 
 from app.api.bootstrap import api
 from app.models import db
-from app.models.order import Order, OrderTicket
+from app.models.order import Order
 from app.models.user import User
 
-from app.api.admin_sales.utils import summary
+from app.api.admin_sales.utils import summary, order_quantities, order_sales_columns
 
 
 class AdminSalesByMarketerSchema(Schema):
@@ -24,28 +24,38 @@ class AdminSalesByMarketerSchema(Schema):
         self_view = 'v1.admin_sales_by_marketer'
 
     id = fields.String()
-    fullname = fields.String()
+    fullname = fields.Method('format_fullname')
     email = fields.String()
     sales = fields.Method('calc_sales')
 
+    @staticmethod
+    def format_fullname(obj):
+        if obj.first_name and obj.last_name:
+            return '{} {}'.format(obj.first_name, obj.last_name)
+        return ''
+
     @staticmethod
     def calc_sales(obj):
         """
         Returns sales (dictionary with total sales and ticket count) for
         placed, completed and pending orders
         """
-        return summary(obj.orders)
+        return summary(obj)
 
 
 class AdminSalesByMarketerList(ResourceList):
     """
     Resource for sales by marketer. Joins event marketer and orders and
-    subsequently accumulates sales by status
+    accumulates sales by status in the database
     """
 
     def query(self, _):
-        return self.session.query(User).join(
-            Order, Order.marketer_id == User.id).outerjoin(OrderTicket)
+        quantities = order_quantities()
+        return self.session.query(User.id, User.first_name, User.last_name, User.email,
+                                  *order_sales_columns(quantities)) \
+            .join(Order, Order.marketer_id == User.id) \
+            .outerjoin(quantities, quantities.c.order_id == Order.id) \
+            .group_by(User.id)
 
     methods = ['GET']
     decorators = (api.has_permission('is_admin'), )
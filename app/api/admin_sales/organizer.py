@@ -3,14 +3,12 @@ from marshmallow_jsonapi.flask import Schema
 from flask_rest_jsonapi import ResourceList
 
 from app.api.bootstrap import api
+from app.api.helpers.role_matrix import get_role_id
 from app.models import db
-from app.models.event import Event
-from app.models.order import Order, OrderTicket
-from app.models.role import Role
 from app.models.user import User
 from app.models.users_events_role import UsersEventsRoles
 
-from app.api.admin_sales.utils import summary
+from app.api.admin_sales.utils import summary, rollup_sales_columns, join_event_rollups
 
 
 class AdminSalesByOrganizersSchema(Schema):
@@ -39,21 +37,22 @@ class AdminSalesByOrganizersSchema(Schema):
         Returns sales (dictionary with total sales and ticket count) for
         placed, completed and pending orders
         """
-        return summary(obj.orders)
+        return summary(obj)
 
 
 class AdminSalesByOrganizersList(ResourceList):
     """
-    Resource for sales by organizers. Joins organizers with events and orders
-    and subsequently accumulates sales by status
+    Resource for sales by organizers. Joins organizers with the order rollups
+    of their events and accumulates sales by status in the database
     """
 
     def query(self, _):
-        query_ = self.session.query(User)
-        query_ = query_.join(UsersEventsRoles).filter(Role.name == 'organizer')
-        query_ = query_.join(Event).outerjoin(Order).outerjoin(OrderTicket)
+        query_ = self.session.query(User.id, User.first_name, User.last_name, *rollup_sales_columns())
+        query_ = query_.join(UsersEventsRoles, UsersEventsRoles.user_id == User.id) \
+            .filter(UsersEventsRoles.role_id == get_role_id('organizer'))
+        query_ = join_event_rollups(query_, UsersEventsRoles.event_id)
 
-        return query_
+        return query_.group_by(User.id)
 
     methods = ['GET']
     decorators = (api.has_permission('is_admin'), )
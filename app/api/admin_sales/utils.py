@@ -1,21 +1,74 @@
 """
 This module contains common sales calculations that are used throughout the
-admin section
+admin section.
+
+Sales are aggregated in the database: the query helpers below return the
+sales total and ticket count of every status as labelled columns
+(e.g. `placed_sales`, `placed_tickets`), already pivoted, so that the
+resources can group and paginate them in SQL.
 """
+from sqlalchemy import and_, case, func
+
+from app.models import db
+from app.models.order import Order, OrderTicket
+from app.models.order_rollup import OrderRollup, EVENT_TOTAL
+
+STATUS_CODES = ['placed', 'completed', 'pending']
 
 
-def status_summary(orders, status):
+def _pivoted_columns(status_column, sales_column, tickets_column):
+    columns = []
+    for status in STATUS_CODES:
+        columns.append(func.coalesce(func.sum(case([(status_column == status, sales_column)], else_=0)), 0)
+                       .label(status + '_sales'))
+        columns.append(func.coalesce(func.sum(case([(status_column == status, tickets_column)], else_=0)), 0)
+                       .label(status + '_tickets'))
+    return columns
+
+
+def rollup_sales_columns():
     """
-    Groups orders by status and returns the total sales and ticket count as a
-    dictionary
+    Pivoted sales columns aggregating the event totals of `OrderRollup`.
+    To be used with `join_event_rollups`
     """
-    return {
-        'sales_total': sum([o.amount for o in orders if o.status == status]),
-        'ticket_count': sum([o.tickets_count for o in orders])
-    }
+    return _pivoted_columns(OrderRollup.status, OrderRollup.amount, OrderRollup.ticket_count)
+
+
+def join_event_rollups(query, event_id_column):
+    """
+    Outer joins the event totals of `OrderRollup` to a query on events
+    :param query: the query
+    :param event_id_column: the column holding the event id, e.g. Event.id
+    """
+    return query.outerjoin(OrderRollup, and_(OrderRollup.event_id == event_id_column,
+                                             OrderRollup.ticket_id == EVENT_TOTAL))
 
 
-def summary(orders):
-    "Returns sales as dictionary for all status codes"
-    status_codes = ['placed', 'completed', 'pending']
-    return {s: status_summary(orders, s) for s in status_codes}
+def order_quantities():
+    """
+    Subquery of the number of tickets per order
+    """
+    return db.session.query(OrderTicket.order_id.label('order_id'),
+                            func.sum(OrderTicket.quantity).label('quantity')) \
+        .group_by(OrderTicket.order_id).subquery()
+
+
+def order_sales_columns(quantities):
+    """
+    Pivoted sales columns aggregating `Order` rows, for groupings which the rollups do not cover.
+    The quantities subquery has to be outer joined on the orders
+    """
+    return _pivoted_columns(Order.status, Order.amount, quantities.c.quantity)
+
+
+def summary(obj):
+    """
+    Returns sales as dictionary for all status codes from a row carrying the
+    pivoted sales columns
+    """
+    return {
+        status: {
+            'sales_total': getattr(obj, status + '_sales') or 0,
+            'ticket_count': getattr(obj, status + '_tickets') or 0
+        } for status in STATUS_CODES
+    }
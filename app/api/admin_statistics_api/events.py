@@ -5,7 +5,7 @@ from sqlalchemy.sql import text
 
 from app.api.bootstrap import api
 from app.models import db
-from app.api.data_layers.NoModelLayer import NoModelLayer
+from app.api.data_layers.AdminStatisticsLayer import AdminStatisticsLayer
 from app.api.schema.admin_statistics_schema.events import AdminStatisticsEventSchema
 
 event_statistics = Blueprint('event_statistics', __name__, url_prefix='/v1/admin/statistics')
@@ -45,6 +45,7 @@ class AdminStatisticsEventDetail(ResourceDetail):
     decorators = (api.has_permission('is_admin'),)
     schema = AdminStatisticsEventSchema
     data_layer = {
-        'class': NoModelLayer,
-        'session': db.session
+        'class': AdminStatisticsLayer,
+        'session': db.session,
+        'category': 'events'
     }
@@ -1,15 +1,11 @@
 from flask_rest_jsonapi import ResourceDetail
 from marshmallow_jsonapi.flask import Schema
 from marshmallow_jsonapi import fields
-from datetime import datetime, timedelta
-import pytz
 
 from app.api.helpers.utilities import dasherize
 from app.api.bootstrap import api
 from app.models import db
-from app.models.mail import Mail
-from app.api.data_layers.NoModelLayer import NoModelLayer
-from app.api.helpers.db import get_count
+from app.api.data_layers.AdminStatisticsLayer import AdminStatisticsLayer
 
 
 class AdminStatisticsMailSchema(Schema):
@@ -25,22 +21,11 @@ class AdminStatisticsMailSchema(Schema):
         inflect = dasherize
 
     id = fields.String()
-    one_day = fields.Method("mail_last_1_day")
-    three_days = fields.Method("mail_last_3_days")
-    seven_days = fields.Method("mail_last_7_days")
-    thirty_days = fields.Method("mail_last_30_days")
-
-    def mail_last_1_day(self, obj):
-        return get_count(Mail.query.filter(datetime.now(pytz.utc) - Mail.time <= timedelta(days=1)))
-
-    def mail_last_3_days(self, obj):
-        return get_count(Mail.query.filter(datetime.now(pytz.utc) - Mail.time <= timedelta(days=3)))
-
-    def mail_last_7_days(self, obj):
-        return get_count(Mail.query.filter(datetime.now(pytz.utc) - Mail.time <= timedelta(days=7)))
-
-    def mail_last_30_days(self, obj):
-        return get_count(Mail.query.filter(datetime.now(pytz.utc) - Mail.time <= timedelta(days=30)))
+    one_day = fields.Integer()
+    three_days = fields.Integer()
+    seven_days = fields.Integer()
+    thirty_days = fields.Integer()
+    as_of = fields.DateTime()
 
 
 class AdminStatisticsMailDetail(ResourceDetail):
@@ -51,6 +36,7 @@ class AdminStatisticsMailDetail(ResourceDetail):
     decorators = (api.has_permission('is_admin'),)
     schema = AdminStatisticsMailSchema
     data_layer = {
-        'class': NoModelLayer,
-        'session': db.session
+        'class': AdminStatisticsLayer,
+        'session': db.session,
+        'category': 'mails'
     }
@@ -5,12 +5,7 @@ from marshmallow_jsonapi import fields
 from app.api.helpers.utilities import dasherize
 from app.api.bootstrap import api
 from app.models import db
-from app.models.user import User
-from app.api.data_layers.NoModelLayer import NoModelLayer
-from app.models.event import Event
-from app.models.users_events_role import UsersEventsRoles
-from app.models.role import Role
-from app.api.helpers.db import get_count
+from app.api.data_layers.AdminStatisticsLayer import AdminStatisticsLayer
 
 
 class AdminStatisticsUserSchema(Schema):
@@ -26,44 +21,15 @@ class AdminStatisticsUserSchema(Schema):
         inflect = dasherize
 
     id = fields.String()
-    super_admin = fields.Method("super_admin_count")
-    admin = fields.Method("admin_count")
-    verified = fields.Method("verified_count")
-    unverified = fields.Method("unverified_count")
-    organizer = fields.Method("organizer_count")
-    coorganizer = fields.Method("coorganizer_count")
-    attendee = fields.Method("attendee_count")
-    track_organizer = fields.Method("track_organizer_count")
-
-    def super_admin_count(self, obj):
-        return get_count(User.query.filter_by(is_super_admin=True))
-
-    def admin_count(self, obj):
-        return get_count(User.query.filter_by(is_admin=True))
-
-    def verified_count(self, obj):
-        return get_count(User.query.filter_by(is_verified=True))
-
-    def unverified_count(self, obj):
-        return get_count(User.query.filter_by(is_verified=False))
-
-    def get_all_user_roles(self, role_name):
-        role = Role.query.filter_by(name=role_name).first()
-        uers = UsersEventsRoles.query.join(UsersEventsRoles.event).join(UsersEventsRoles.role).filter(
-            Event.deleted_at.is_(None), UsersEventsRoles.role == role)
-        return uers
-
-    def organizer_count(self, obj):
-        return get_count(self.get_all_user_roles('organizer'))
-
-    def coorganizer_count(self, obj):
-        return get_count(self.get_all_user_roles('coorganizer'))
-
-    def track_organizer_count(self, obj):
-        return get_count(self.get_all_user_roles('track_organizer'))
-
-    def attendee_count(self, obj):
-        return get_count(self.get_all_user_roles('attendee'))
+    super_admin = fields.Integer()
+    admin = fields.Integer()
+    verified = fields.Integer()
+    unverified = fields.Integer()
+    organizer = fields.Integer()
+    coorganizer = fields.Integer()
+    attendee = fields.Integer()
+    track_organizer = fields.Integer()
+    as_of = fields.DateTime()
 
 
 class AdminStatisticsUserDetail(ResourceDetail):
@@ -74,6 +40,7 @@ class AdminStatisticsUserDetail(ResourceDetail):
     decorators = (api.has_permission('is_admin'),)
     schema = AdminStatisticsUserSchema
     data_layer = {
-        'class': NoModelLayer,
-        'session': db.session
+        'class': AdminStatisticsLayer,
+        'session': db.session,
+        'category': 'users'
     }
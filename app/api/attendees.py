@@ -7,12 +7,13 @@ from flask_rest_jsonapi.exceptions import ObjectNotFound
 from sqlalchemy.orm.exc import NoResultFound
 
 from app.api.bootstrap import api
-from app.api.helpers.db import safe_query, get_count
+from app.api.helpers.db import safe_query
 from app.api.helpers.exceptions import (
     ConflictException,
     ForbiddenException,
     UnprocessableEntity,
 )
+from app.api.helpers.inventory import get_ticket_availability
 from app.api.helpers.mail import send_email_to_attendees
 from app.api.helpers.permission_manager import has_access
 from app.api.helpers.permissions import jwt_required
@@ -56,14 +57,15 @@ class AttendeeListPost(ResourceList):
                 "Ticket belongs to a different Event"
             )
         # Check if the ticket is already sold out or not.
-        if get_count(db.session.query(TicketHolder.id).
-                     filter_by(ticket_id=int(data['ticket']), deleted_at=None)) >= ticket.quantity:
+        # The unit itself is taken atomically when the attendee is created
+        available = get_ticket_availability(ticket.id)
+        if available is not None and available < 1:
             raise ConflictException(
                 {'pointer': '/data/attributes/ticket_id'},
                 "Ticket already sold out"
             )
 
-    decorators = (jwt_required,)
+    decorators = (jwt_required, api.has_permission('is_admitted', methods="POST"),)
     methods = ['POST']
     schema = AttendeeSchema
     data_layer = {'session': db.session,
@@ -0,0 +1,26 @@
+from flask import request
+from flask_rest_jsonapi.data_layers.base import BaseDataLayer
+
+from app.api.helpers.admin_statistics import get_admin_statistics
+from app.api.helpers.utilities import EmptyObject
+
+
+class AdminStatisticsLayer(BaseDataLayer):
+    """
+    Serves the snapshot of an admin statistics category, set as `category` in the data layer kwargs.
+    `?fresh=1` recomputes the statistics
+    """
+
+    def get_object(self, view_kwargs):
+        """Retrieve an object
+        :params dict view_kwargs: kwargs from the resource view
+        :return DeclarativeMeta: an object
+        """
+        fresh = request.args.get('fresh', 'false') in ('1', 'true')
+        statistics, as_of = get_admin_statistics(self.category, fresh=fresh)
+        obj = EmptyObject()
+        obj.id = 1
+        obj.as_of = as_of
+        for name, count in statistics.items():
+            setattr(obj, name, count)
+        return obj
@@ -1,13 +1,30 @@
+from flask import current_app, url_for
 from flask_rest_jsonapi.data_layers.base import BaseDataLayer
 from flask_rest_jsonapi.exceptions import ObjectNotFound
 
 from app.api.helpers.exceptions import UnprocessableEntity, ConflictException
 from app.api.helpers.ticketing import TicketingManager
+from app.api.helpers.utilities import TASK_RESULTS
 from app.models.order import Order
 
 
 class ChargesLayer(BaseDataLayer):
 
+    @staticmethod
+    def _place(data, task):
+        """
+        Describes a payment captured in the background: the outcome is polled from the task url
+        """
+        # in case of testing
+        if current_app.config.get('CELERY_ALWAYS_EAGER'):
+            TASK_RESULTS[task.id] = {
+                'result': task.get(),
+                'state': task.state
+            }
+        data['status'] = True
+        data['message'] = 'Payment capture in progress'
+        data['task_url'] = url_for('tasks.celery_task', task_id=task.id)
+
     def create_object(self, data, view_kwargs):
         """
         create_object method for the Charges layer
@@ -17,12 +34,13 @@ class ChargesLayer(BaseDataLayer):
         :return:
         """
 
+        # the order is locked until it is placed, so that two charges can not both capture its payment
         if view_kwargs.get('order_identifier').isdigit():
             # when id is passed
-            order = Order.query.filter_by(id=view_kwargs['order_identifier']).first()
+            order = Order.query.filter_by(id=view_kwargs['order_identifier']).with_for_update().first()
         else:
             # when identifier is passed
-            order = Order.query.filter_by(identifier=view_kwargs['order_identifier']).first()
+            order = Order.query.filter_by(identifier=view_kwargs['order_identifier']).with_for_update().first()
 
         if not order:
             raise ObjectNotFound({'parameter': 'order_identifier'},
@@ -35,6 +53,9 @@ class ChargesLayer(BaseDataLayer):
                                     "You cannot charge payments on a free order")
 
         data['id'] = order.id
+        capture_async = current_app.config['PAYMENT_CAPTURE_ASYNC']
+        if capture_async and order.status == 'placed' and (order.stripe_token or order.paypal_token):
+            raise ConflictException({'parameter': 'id'}, "The payment of this order is already being captured")
 
         # charge through stripe
         if order.payment_mode == 'stripe':
@@ -43,9 +64,12 @@ class ChargesLayer(BaseDataLayer):
             if not order.event.can_pay_by_stripe:
                 raise ConflictException({'': ''}, "This event doesn't accept payments by Stripe")
 
-            success, response = TicketingManager.charge_stripe_order_payment(order, data['stripe'])
-            data['status'] = success
-            data['message'] = response
+            if capture_async:
+                self._place(data, TicketingManager.place_order_payment(order, stripe_token=data['stripe']))
+            else:
+                success, response = TicketingManager.charge_stripe_order_payment(order, data['stripe'])
+                data['status'] = success
+                data['message'] = response
 
         # charge through paypal
         elif order.payment_mode == 'paypal':
@@ -54,9 +78,13 @@ class ChargesLayer(BaseDataLayer):
             if not order.event.can_pay_by_paypal:
                 raise ConflictException({'': ''}, "This event doesn't accept payments by Paypal")
 
-            success, response = TicketingManager.charge_paypal_order_payment(order, data['paypal_payer_id'],
-                                                                             data['paypal_payment_id'])
-            data['status'] = success
-            data['message'] = response
+            if capture_async:
+                self._place(data, TicketingManager.place_order_payment(
+                    order, paypal_payer_id=data['paypal_payer_id'], paypal_payment_id=data['paypal_payment_id']))
+            else:
+                success, response = TicketingManager.charge_paypal_order_payment(order, data['paypal_payer_id'],
+                                                                                 data['paypal_payment_id'])
+                data['status'] = success
+                data['message'] = response
 
         return data
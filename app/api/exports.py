@@ -5,9 +5,8 @@ from flask import send_file, make_response, jsonify, url_for, \
 from flask_jwt import jwt_required, current_identity
 
 from app.api.helpers.export_helpers import export_event_json, create_export_job
+from app.api.helpers.identifiers import resolve_event
 from app.api.helpers.utilities import TASK_RESULTS
-from app.models import db
-from app.models.event import Event
 
 export_routes = Blueprint('exports', __name__, url_prefix='/v1')
 
@@ -31,8 +30,7 @@ def export_event(event_identifier):
     settings['audio'] = request.json.get('audio', False)
 
     if not event_identifier.isdigit():
-        event = db.session.query(Event).filter_by(identifier=event_identifier).first()
-        event_id = event.id
+        event_id = resolve_event(event_identifier).id
     else:
         event_id = event_identifier
     # queue task
@@ -70,8 +68,7 @@ def export_download(event_id, path):
 def export_event_xcal(event_identifier):
 
     if not event_identifier.isdigit():
-        event = db.session.query(Event).filter_by(identifier=event_identifier).first()
-        event_id = str(event.id)
+        event_id = str(resolve_event(event_identifier).id)
     else:
         event_id = event_identifier
 
@@ -98,8 +95,7 @@ def event_export_task_base(event_id, settings):
 @jwt_required()
 def export_event_ical(event_identifier):
     if not event_identifier.isdigit():
-        event = db.session.query(Event).filter_by(identifier=event_identifier).first()
-        event_id = str(event.id)
+        event_id = str(resolve_event(event_identifier).id)
     else:
         event_id = event_identifier
 
@@ -118,8 +114,7 @@ def export_event_ical(event_identifier):
 @jwt_required()
 def export_event_pentabarf(event_identifier):
     if not event_identifier.isdigit():
-        event = db.session.query(Event).filter_by(identifier=event_identifier).first()
-        event_id = str(event.id)
+        event_id = str(resolve_event(event_identifier).id)
     else:
         event_id = event_identifier
 
@@ -138,8 +133,7 @@ def export_event_pentabarf(event_identifier):
 @jwt_required()
 def export_orders_csv(event_identifier):
     if not event_identifier.isdigit():
-        event = db.session.query(Event).filter_by(identifier=event_identifier).first()
-        event_id = str(event.id)
+        event_id = str(resolve_event(event_identifier).id)
     else:
         event_id = event_identifier
 
@@ -158,8 +152,7 @@ def export_orders_csv(event_identifier):
 @jwt_required()
 def export_orders_pdf(event_identifier):
     if not event_identifier.isdigit():
-        event = db.session.query(Event).filter_by(identifier=event_identifier).first()
-        event_id = str(event.id)
+        event_id = str(resolve_event(event_identifier).id)
     else:
         event_id = event_identifier
 
@@ -178,8 +171,7 @@ def export_orders_pdf(event_identifier):
 @jwt_required()
 def export_attendees_csv(event_identifier):
     if not event_identifier.isdigit():
-        event = db.session.query(Event).filter_by(identifier=event_identifier).first()
-        event_id = str(event.id)
+        event_id = str(resolve_event(event_identifier).id)
     else:
         event_id = event_identifier
 
@@ -198,8 +190,7 @@ def export_attendees_csv(event_identifier):
 @jwt_required()
 def export_attendees_pdf(event_identifier):
     if not event_identifier.isdigit():
-        event = db.session.query(Event).filter_by(identifier=event_identifier).first()
-        event_id = str(event.id)
+        event_id = str(resolve_event(event_identifier).id)
     else:
         event_id = event_identifier
 
@@ -218,8 +209,7 @@ def export_attendees_pdf(event_identifier):
 @jwt_required()
 def export_sessions_csv(event_identifier):
     if not event_identifier.isdigit():
-        event = db.session.query(Event).filter_by(identifier=event_identifier).first()
-        event_id = str(event.id)
+        event_id = str(resolve_event(event_identifier).id)
     else:
         event_id = event_identifier
 
@@ -238,8 +228,7 @@ def export_sessions_csv(event_identifier):
 @jwt_required()
 def export_speakers_csv(event_identifier):
     if not event_identifier.isdigit():
-        event = db.session.query(Event).filter_by(identifier=event_identifier).first()
-        event_id = str(event.id)
+        event_id = str(resolve_event(event_identifier).id)
     else:
         event_id = event_identifier
 
@@ -258,8 +247,7 @@ def export_speakers_csv(event_identifier):
 @jwt_required()
 def export_sessions_pdf(event_identifier):
     if not event_identifier.isdigit():
-        event = db.session.query(Event).filter_by(identifier=event_identifier).first()
-        event_id = str(event.id)
+        event_id = str(resolve_event(event_identifier).id)
     else:
         event_id = event_identifier
 
@@ -0,0 +1,110 @@
+"""
+Snapshots of the admin statistics
+
+Each category is computed with a single conditional aggregation (`COUNT(*) FILTER (WHERE ...)`)
+and stored in `admin_statistics_snapshots` by a scheduled job, so that the admin dashboard does
+not count the whole tables on every load.
+"""
+from datetime import datetime, timedelta
+
+import pytz
+from flask import current_app as app
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+
+from app.api.helpers.role_matrix import get_role_id
+from app.models import db
+from app.models.admin_statistics_snapshot import AdminStatisticsSnapshot
+from app.models.event import Event
+from app.models.mail import Mail
+from app.models.session import Session
+from app.models.user import User
+from app.models.users_events_role import UsersEventsRoles
+
+SESSION_STATES = ('draft', 'submitted', 'accepted', 'confirmed', 'pending', 'rejected')
+USER_ROLES = ('organizer', 'coorganizer', 'track_organizer', 'attendee')
+MAIL_PERIODS = (('one_day', 1), ('three_days', 3), ('seven_days', 7), ('thirty_days', 30))
+
+
+def _count(condition):
+    return func.count().filter(condition)
+
+
+def compute_event_statistics():
+    row = db.session.query(_count(Event.state == 'draft'),
+                           _count(Event.state == 'published'),
+                           _count(Event.ends_at < datetime.now(pytz.utc))).select_from(Event).one()
+    return dict(zip(('draft', 'published', 'past'), row))
+
+
+def compute_session_statistics():
+    row = db.session.query(*[_count(Session.state == state) for state in SESSION_STATES]) \
+        .select_from(Session).one()
+    return dict(zip(SESSION_STATES, row))
+
+
+def compute_user_statistics():
+    users = db.session.query(_count(User.is_super_admin.is_(True)),
+                             _count(User.is_admin.is_(True)),
+                             _count(User.is_verified.is_(True)),
+                             _count(User.is_verified.is_(False))).select_from(User).one()
+    roles = db.session.query(*[_count(UsersEventsRoles.role_id == get_role_id(role)) for role in USER_ROLES]) \
+        .select_from(UsersEventsRoles).join(Event, Event.id == UsersEventsRoles.event_id) \
+        .filter(Event.deleted_at.is_(None)).one()
+    statistics = dict(zip(('super_admin', 'admin', 'verified', 'unverified'), users))
+    statistics.update(zip(USER_ROLES, roles))
+    return statistics
+
+
+def compute_mail_statistics():
+    now = datetime.now(pytz.utc)
+    row = db.session.query(*[_count(Mail.time >= now - timedelta(days=days)) for _, days in MAIL_PERIODS]) \
+        .select_from(Mail).one()
+    return dict(zip([name for name, _ in MAIL_PERIODS], row))
+
+
+STATISTICS = {
+    'events': compute_event_statistics,
+    'sessions': compute_session_statistics,
+    'users': compute_user_statistics,
+    'mails': compute_mail_statistics,
+}
+
+
+def refresh_admin_statistics(category):
+    """
+    Recomputes the statistics of a category and stores them as its snapshot
+    :param category: one of the keys of STATISTICS
+    :return: the statistics and the time they were computed at
+    """
+    statistics = STATISTICS[category]()
+    as_of = datetime.now(pytz.utc)
+    # upserted, as the scheduled job of every process and the fresh requests may refresh a category at once
+    statement = insert(AdminStatisticsSnapshot.__table__).values(
+        [{'category': category, 'name': name, 'count': count, 'as_of': as_of} for name, count in statistics.items()])
+    db.session.execute(statement.on_conflict_do_update(
+        index_elements=['category', 'name'],
+        set_={'count': statement.excluded['count'], 'as_of': statement.excluded['as_of']}))
+    db.session.commit()
+    return statistics, as_of
+
+
+def refresh_all_admin_statistics():
+    for category in STATISTICS:
+        refresh_admin_statistics(category)
+
+
+def get_admin_statistics(category, fresh=False):
+    """
+    Returns the statistics of a category from its snapshot, computing them if there is none yet
+    :param category: one of the keys of STATISTICS
+    :param fresh: recompute the statistics instead of serving the snapshot
+    :return: the statistics and the time they were computed at
+    """
+    if not app.config['ADMIN_STATISTICS_SNAPSHOT_INTERVAL']:
+        return STATISTICS[category](), datetime.now(pytz.utc)
+    if not fresh:
+        snapshot = AdminStatisticsSnapshot.query.filter_by(category=category).all()
+        if snapshot:
+            return {row.name: row.count for row in snapshot}, min(row.as_of for row in snapshot)
+    return refresh_admin_statistics(category)
@@ -0,0 +1,196 @@
+"""
+Waiting room of ticket launches
+
+The checkout of an event with a `waiting_room_admit_rate` is only open to the buyers admitted by its waiting
+room. Buyers join a FIFO queue, numbered by a Redis counter, and are admitted in order by a token bucket refilled
+at the admit rate of the event: whatever the number of buyers waiting, at most `waiting_room_admit_rate` buyers
+per minute reach the checkout, plus a burst of WAITING_ROOM_BURST seconds worth of admissions.
+Admitted buyers get a signed admission token, valid for WAITING_ROOM_ADMISSION_TTL seconds, which they send with
+their checkout requests in the X-Admission-Token header. The waiting room is left open while Redis is unavailable.
+"""
+import logging
+import math
+import time
+
+from flask import current_app as app
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+from redis.exceptions import RedisError
+from sqlalchemy import event, inspect
+
+from app.api.helpers.cache import LRUCache
+from app.models import db
+from app.models.event import Event
+from app.views.redis_store import redis_store
+
+logger = logging.getLogger(__name__)
+
+ADMISSION_TOKEN_HEADER = 'X-Admission-Token'
+
+REDIS_WAITING_ROOM = 'waiting_room:{}:{}'
+
+# The queue of an event is dropped after a day without any buyer joining it
+WAITING_ROOM_EXPIRY = 24 * 60 * 60
+
+# Refills the bucket of an event and admits as many queued buyers as it has tokens for.
+# KEYS: queue tail (last number given), queue head (last number admitted), bucket
+# ARGV: admissions per second, bucket capacity, current time
+# Returns the queue head and tail
+ADMIT_SCRIPT = """
+local tail = tonumber(redis.call('get', KEYS[1]) or '0')
+local head = tonumber(redis.call('get', KEYS[2]) or '0')
+local bucket = redis.call('hmget', KEYS[3], 'tokens', 'updated_at')
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local tokens = tonumber(bucket[1] or ARGV[2])
+local updated_at = tonumber(bucket[2] or ARGV[3])
+tokens = math.min(capacity, tokens + math.max(0, now - updated_at) * rate)
+local admitted = math.min(math.floor(tokens), tail - head)
+if admitted > 0 then
+    head = redis.call('incrby', KEYS[2], admitted)
+    tokens = tokens - admitted
+end
+redis.call('hmset', KEYS[3], 'tokens', tostring(tokens), 'updated_at', ARGV[3])
+redis.call('expire', KEYS[2], ARGV[4])
+redis.call('expire', KEYS[3], ARGV[4])
+return {head, tail}
+"""
+
+_rate_cache = None
+_admit_script = None
+
+
+def _get_rate_cache():
+    global _rate_cache
+    if _rate_cache is None:
+        _rate_cache = LRUCache(max_size=1024, ttl=app.config['WAITING_ROOM_RATE_CACHE_TTL'])
+    return _rate_cache
+
+
+def _drop_admit_rate(event_id):
+    if _rate_cache is not None:
+        _rate_cache.delete(event_id)
+
+
+def _key(event_id, name):
+    return REDIS_WAITING_ROOM.format(event_id, name)
+
+
+def get_admit_rate(event_id):
+    """
+    Returns the admit rate of the waiting room of an event, cached for WAITING_ROOM_RATE_CACHE_TTL seconds
+    :param event_id: id of the event
+    :return: buyers admitted per minute, None when the event has no waiting room
+    """
+    rate_cache = _get_rate_cache()
+    rate = rate_cache.get(event_id)
+    if rate is None:
+        rate = db.session.query(Event.waiting_room_admit_rate).filter(Event.id == event_id).scalar() or 0
+        rate_cache.set(event_id, rate)
+    return rate or None
+
+
+def _admit(event_id, rate):
+    global _admit_script
+    if _admit_script is None:
+        _admit_script = redis_store.register_script(ADMIT_SCRIPT)
+    capacity = max(1, rate * app.config['WAITING_ROOM_BURST'] / 60)
+    head, tail = _admit_script(keys=[_key(event_id, 'tail'), _key(event_id, 'head'), _key(event_id, 'bucket')],
+                               args=[rate / 60, capacity, time.time(), WAITING_ROOM_EXPIRY])
+    return int(head), int(tail)
+
+
+def _get_serializer():
+    return URLSafeTimedSerializer(app.config['SECRET_KEY'], salt='waiting-room-admission')
+
+
+def create_admission_token(event_id, user_id):
+    return _get_serializer().dumps([event_id, user_id])
+
+
+def has_admission(event_id, user_id, token):
+    """
+    Checks that a user may go through the checkout of an event
+    :param event_id: id of the event
+    :param user_id: id of the user
+    :param token: the admission token sent by the user, if any
+    :return: bool
+    """
+    if get_admit_rate(event_id) is None:
+        return True
+    if not token:
+        return False
+    try:
+        admission = _get_serializer().loads(token, max_age=app.config['WAITING_ROOM_ADMISSION_TTL'])
+    except BadSignature:
+        return False
+    return admission == [event_id, user_id]
+
+
+def _admitted(event_id, user_id):
+    return {'admitted': True, 'position': 0, 'eta': 0,
+            'admission_token': create_admission_token(event_id, user_id)}
+
+
+def get_waiting_room_status(event_id, user_id):
+    """
+    Returns the position of a user in the waiting room of an event, with an admission token once admitted
+    :param event_id: id of the event
+    :param user_id: id of the user
+    :return: dictionary of admitted, position, eta (seconds) and admission_token, the position is None
+    when the user has not joined the waiting room
+    """
+    rate = get_admit_rate(event_id)
+    if rate is None:
+        return _admitted(event_id, user_id)
+    try:
+        number = redis_store.hget(_key(event_id, 'members'), user_id)
+        if number is None:
+            return {'admitted': False, 'position': None, 'eta': None, 'admission_token': None}
+        head, _ = _admit(event_id, rate)
+    except RedisError:
+        logger.exception('Could not read the waiting room of event %s', event_id)
+        return _admitted(event_id, user_id)
+    position = int(number) - head
+    if position <= 0:
+        return _admitted(event_id, user_id)
+    return {'admitted': False, 'position': position, 'eta': int(math.ceil(position * 60 / rate)),
+            'admission_token': None}
+
+
+def join_waiting_room(event_id, user_id):
+    """
+    Queues a user in the waiting room of an event, joining again keeps the position
+    :param event_id: id of the event
+    :param user_id: id of the user
+    :return: the status of the user, see `get_waiting_room_status`
+    """
+    if get_admit_rate(event_id) is not None:
+        members = _key(event_id, 'members')
+        try:
+            if not redis_store.hexists(members, user_id):
+                redis_store.hsetnx(members, user_id, redis_store.incr(_key(event_id, 'tail')))
+                pipe = redis_store.pipeline()
+                pipe.expire(members, WAITING_ROOM_EXPIRY)
+                pipe.expire(_key(event_id, 'tail'), WAITING_ROOM_EXPIRY)
+                pipe.execute()
+        except RedisError:
+            logger.exception('Could not join the waiting room of event %s', event_id)
+    return get_waiting_room_status(event_id, user_id)
+
+
+@event.listens_for(Event, 'after_update')
+def receive_after_update(mapper, connection, target):
+    """
+    listen for changes of the admit rate, the other processes see them once their entry expires
+    """
+    if inspect(target).attrs.waiting_room_admit_rate.history.has_changes():
+        _drop_admit_rate(target.id)
+
+
+@event.listens_for(Event, 'after_delete')
+def receive_after_delete(mapper, connection, target):
+    """
+    listen for the 'after_delete' event
+    """
+    _drop_admit_rate(target.id)
@@ -1,3 +1,171 @@
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app as app
 from flask_caching import Cache
+from redis.exceptions import RedisError
+from sqlalchemy import event
+from sqlalchemy.orm import Session as SQLAlchemySession
+
+from app.views.redis_store import redis_store
+
+logger = logging.getLogger(__name__)
 
 cache = Cache()
+
+
+class LRUCache(object):
+    """
+    A small thread safe, size bounded, process local cache.
+    Least recently used entries are evicted first and entries older than `ttl` seconds are treated as missing.
+    """
+
+    def __init__(self, max_size=1024, ttl=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            value, expires_at = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class TieredCache(object):
+    """
+    A cache of values read from the database, in a process local LRU and optionally in Redis, shared by all
+    the processes. It is configured by the `<name>`, `<name>_REDIS`, `<name>_SIZE` and `<name>_TTL` settings.
+
+    With the redis tier, the entries are versioned, per key and as a whole, by Redis counters. An invalidation
+    bumps the version and so drops the entries of every process. Without it, the other processes only see the
+    invalidation once their entries expire. Entries which are invalidated from a flush are invalidated again
+    after commit, so that no stale value cached meanwhile survives. Redis errors fall back to the database.
+    """
+
+    def __init__(self, name, dumps=json.dumps, loads=json.loads):
+        self.name = name
+        self.dumps = dumps
+        self.loads = loads
+        self._local = None
+        self._pending = 'invalidate_' + name.lower()
+        event.listen(SQLAlchemySession, 'after_commit', self._receive_after_commit)
+
+    @property
+    def local(self):
+        if self._local is None:
+            self._local = LRUCache(max_size=app.config[self.name + '_SIZE'], ttl=app.config[self.name + '_TTL'])
+        return self._local
+
+    def _uses_redis(self):
+        return app.config[self.name + '_REDIS']
+
+    def _version_key(self, key=None):
+        if key is None:
+            return '{}:version'.format(self.name.lower())
+        return '{}:version:{}'.format(self.name.lower(), key)
+
+    def _get_version(self, key):
+        if not self._uses_redis():
+            return 0, 0
+        versions = redis_store.mget([self._version_key(), self._version_key(key)])
+        return tuple(int(version or 0) for version in versions)
+
+    def _redis_key(self, key, version):
+        return '{}:{}:{}:{}'.format(self.name.lower(), version[0], version[1], key)
+
+    def get(self, key, load):
+        """
+        Returns the value of a key, from the cache when enabled
+        :param key: the key, its string form is used in Redis
+        :param load: callable reading the value from the database, None values are not cached
+        :return: the value
+        """
+        if not app.config[self.name]:
+            return load()
+        try:
+            version = self._get_version(key)
+            entry = self.local.get(key)
+            if entry is not None and entry[0] == version:
+                return entry[1]
+            if self._uses_redis():
+                cached = redis_store.get(self._redis_key(key, version))
+                if cached is not None:
+                    value = self.loads(cached)
+                    self.local.set(key, (version, value))
+                    return value
+        except RedisError:
+            logger.exception('%s unavailable', self.name)
+            return load()
+
+        value = load()
+        if value is not None:
+            self.local.set(key, (version, value))
+            if self._uses_redis():
+                try:
+                    redis_store.setex(self._redis_key(key, version), app.config[self.name + '_TTL'],
+                                      self.dumps(value))
+                except RedisError:
+                    logger.exception('%s unavailable', self.name)
+        return value
+
+    def invalidate(self, key=None):
+        """
+        Drops the entry of a key, or all the entries, of this process and, with the redis tier, of all the processes
+        :param key: the key, None for all the entries
+        :return:
+        """
+        if self._local is not None:
+            if key is None:
+                self._local.clear()
+            else:
+                self._local.delete(key)
+        if self._uses_redis():
+            try:
+                redis_store.incr(self._version_key(key))
+            except RedisError:
+                logger.exception('Could not invalidate %s', self.name)
+
+    def invalidate_after_commit(self, session, key=None):
+        """
+        Invalidates a key from a flush, and again once the session commits
+        :param session: the session being flushed
+        :param key: the key, None for all the entries
+        :return:
+        """
+        self.invalidate(key)
+        if session is not None:
+            session.info.setdefault(self._pending, set()).add(key)
+
+    def _receive_after_commit(self, session):
+        for key in session.info.pop(self._pending, ()):
+            self.invalidate(key)
@@ -2,7 +2,7 @@ import logging
 import traceback
 
 from flask_rest_jsonapi.exceptions import ObjectNotFound
-from sqlalchemy import func
+from sqlalchemy import event, func
 from sqlalchemy.orm.exc import NoResultFound
 
 from app.models import db
@@ -101,3 +101,31 @@ def get_count(query):
     count_q = query.statement.with_only_columns([func.count()]).order_by(None)
     count = query.session.execute(count_q).scalar()
     return count
+
+
+def _load_previous_value(target, value, oldvalue, initiator):
+    pass
+
+
+def track_previous_values(*attributes):
+    """
+    Loads the previous value of the attributes when they are set, so that `previous_value` can tell what a
+    flushed row held before, e.g. to take it off a counter from a mapper event
+    :param attributes: the instrumented attributes, e.g. Order.status
+    :return:
+    """
+    for attribute in attributes:
+        event.listen(attribute, 'set', _load_previous_value, active_history=True)
+
+
+def previous_value(state, key):
+    """
+    Returns the value an attribute had before the changes being flushed, see `track_previous_values`
+    :param state: the InstanceState of the object
+    :param key: name of the attribute
+    :return:
+    """
+    history = state.attrs[key].history
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(state.object, key)
@@ -0,0 +1,205 @@
+"""
+Discount code usage
+
+The number of discounted tickets sold with a discount code is kept in `discount_code_usages`.
+An order uses the quantities of its order tickets which belong to its discount code, counted while the
+order is completed or placed. The counter is updated from mapper events on Order and OrderTicket, in the
+same transaction as the completion or cancellation of the order, so validating a new order does not need
+to count the past orders. Changes which bypass the ORM are not tracked and have to be reconciled with
+`rebuild_discount_code_usages`.
+"""
+from datetime import datetime
+
+import pytz
+from sqlalchemy import and_, event, func, inspect, select
+from sqlalchemy.dialects.postgresql import insert
+
+from app.api.helpers.db import previous_value, track_previous_values
+from app.api.helpers.exceptions import UnprocessableEntity
+from app.models import db
+from app.models.discount_code import TICKET
+from app.models.discount_code_usage import DiscountCodeUsage
+from app.models.order import Order, OrderTicket
+from app.models.ticket import discount_codes_tickets
+from app.models.ticket_holder import TicketHolder
+
+USED_STATUSES = ('completed', 'placed')
+
+usages = DiscountCodeUsage.__table__
+orders = Order.__table__
+orders_tickets = OrderTicket.__table__
+
+
+def _apply(connection, discount_code_id, count):
+    if discount_code_id is None or not count:
+        return
+    statement = insert(usages).values(discount_code_id=discount_code_id, used=count)
+    statement = statement.on_conflict_do_update(index_elements=[usages.c.discount_code_id],
+                                                set_={'used': usages.c.used + statement.excluded.used})
+    connection.execute(statement)
+
+
+def _discounted_quantity(connection, order_id, discount_code_id, ticket_id=None):
+    """
+    Sums the quantities of the order tickets of an order which belong to the discount code
+    """
+    if discount_code_id is None:
+        return 0
+    statement = select([func.coalesce(func.sum(orders_tickets.c.quantity), 0)]) \
+        .select_from(orders_tickets.join(discount_codes_tickets,
+                                         and_(discount_codes_tickets.c.ticket_id == orders_tickets.c.ticket_id,
+                                              discount_codes_tickets.c.discount_code_id == discount_code_id))) \
+        .where(orders_tickets.c.order_id == order_id)
+    if ticket_id is not None:
+        statement = statement.where(orders_tickets.c.ticket_id == ticket_id)
+    return connection.execute(statement).scalar()
+
+
+def _apply_order(connection, order_id, discount_code_id, status, sign):
+    """
+    Adds (sign=1) or removes (sign=-1) the discounted tickets of an order to or from the usage
+    """
+    if status in USED_STATUSES:
+        _apply(connection, discount_code_id, sign * _discounted_quantity(connection, order_id, discount_code_id))
+
+
+def _apply_order_ticket(connection, order_id, ticket_id, quantity, sign):
+    """
+    Adds (sign=1) or removes (sign=-1) an order ticket to or from the usage of the discount code of its order
+    """
+    order = connection.execute(select([orders.c.discount_code_id, orders.c.status])
+                               .where(orders.c.id == order_id)).first()
+    if order is None or order.discount_code_id is None or order.status not in USED_STATUSES:
+        return
+    is_discounted = connection.execute(select([discount_codes_tickets.c.ticket_id])
+                                       .where(discount_codes_tickets.c.discount_code_id == order.discount_code_id)
+                                       .where(discount_codes_tickets.c.ticket_id == ticket_id)).first()
+    if is_discounted is not None:
+        _apply(connection, order.discount_code_id, sign * (quantity or 0))
+
+
+# Load the previous values on change, so that they can be taken off the usage
+track_previous_values(Order.status, Order.discount_code_id, OrderTicket.quantity)
+
+
+@event.listens_for(Order, 'after_insert')
+def receive_order_after_insert(mapper, connection, target):
+    _apply_order(connection, target.id, target.discount_code_id, target.status, 1)
+
+
+@event.listens_for(Order, 'after_update')
+def receive_order_after_update(mapper, connection, target):
+    state = inspect(target)
+    if not any(state.attrs[key].history.has_changes() for key in ('status', 'discount_code_id')):
+        return
+    _apply_order(connection, target.id, previous_value(state, 'discount_code_id'), previous_value(state, 'status'), -1)
+    _apply_order(connection, target.id, target.discount_code_id, target.status, 1)
+
+
+@event.listens_for(Order, 'before_delete')
+def receive_order_before_delete(mapper, connection, target):
+    _apply_order(connection, target.id, target.discount_code_id, target.status, -1)
+
+
+@event.listens_for(OrderTicket, 'after_insert')
+def receive_order_ticket_after_insert(mapper, connection, target):
+    _apply_order_ticket(connection, target.order_id, target.ticket_id, target.quantity, 1)
+
+
+@event.listens_for(OrderTicket, 'after_update')
+def receive_order_ticket_after_update(mapper, connection, target):
+    state = inspect(target)
+    if not any(state.attrs[key].history.has_changes() for key in ('order_id', 'ticket_id', 'quantity')):
+        return
+    _apply_order_ticket(connection, previous_value(state, 'order_id'), previous_value(state, 'ticket_id'),
+                        previous_value(state, 'quantity'), -1)
+    _apply_order_ticket(connection, target.order_id, target.ticket_id, target.quantity, 1)
+
+
+@event.listens_for(OrderTicket, 'after_delete')
+def receive_order_ticket_after_delete(mapper, connection, target):
+    _apply_order_ticket(connection, target.order_id, target.ticket_id, target.quantity, -1)
+
+
+def get_discount_code_usage(discount_code_id):
+    """
+    Returns the number of discounted tickets sold with a discount code
+    :param discount_code_id: id of the discount code
+    :return:
+    """
+    used = db.session.query(DiscountCodeUsage.used).filter_by(discount_code_id=discount_code_id).scalar()
+    return used or 0
+
+
+def validate_discount_code(discount_code, event_ids):
+    """
+    Checks that a discount code is active, within its validity period and, for a ticket discount code, of the
+    event of the tickets
+    :param discount_code: the discount code
+    :param event_ids: ids of the events of the tickets
+    :return:
+    """
+    now = datetime.now(pytz.utc)
+    if not discount_code.is_active or \
+            (discount_code.valid_from is not None and now < discount_code.valid_from) or \
+            (discount_code.valid_till is not None and now > discount_code.valid_till):
+        raise UnprocessableEntity({'source': 'discount_code_id'}, "Inactive Discount Code")
+    if discount_code.used_for == TICKET and any(int(event_id) != discount_code.event_id for event_id in event_ids):
+        raise UnprocessableEntity({'source': 'discount_code_id'}, "Invalid Discount Code")
+
+
+def is_discount_quantity_valid(discount_code, quantity):
+    """
+    Checks that a number of discounted tickets can be bought with a discount code, with one query for its usage
+    :param discount_code: the discount code
+    :param quantity: number of tickets of the discount code
+    :return: bool
+    """
+    if discount_code.tickets_number is not None and \
+            quantity + get_discount_code_usage(discount_code.id) > discount_code.tickets_number:
+        return False
+    if discount_code.min_quantity is not None and quantity < discount_code.min_quantity:
+        return False
+    if discount_code.max_quantity is not None and quantity > discount_code.max_quantity:
+        return False
+    return True
+
+
+def validate_discount_quantity(discount_code, ticket_holders):
+    """
+    Checks that the discount code can be applied to the tickets of the given ticket holders, with a single
+    query for the ticket holders and one for the usage of the code
+    :param discount_code: the discount code
+    :param ticket_holders: ids of the ticket holders of the order
+    :return: bool
+    """
+    ticket_ids = select([discount_codes_tickets.c.ticket_id]) \
+        .where(discount_codes_tickets.c.discount_code_id == discount_code.id)
+    quantity = db.session.query(func.count(TicketHolder.id)) \
+        .filter(TicketHolder.id.in_([int(ticket_holder) for ticket_holder in ticket_holders]),
+                TicketHolder.ticket_id.in_(ticket_ids)).scalar()
+    return is_discount_quantity_valid(discount_code, quantity)
+
+
+def rebuild_discount_code_usages(discount_code_id=None):
+    """
+    Recomputes the discount code usages from the orders, for one discount code or for all of them
+    :param discount_code_id: id of the discount code to rebuild, or None to rebuild everything
+    :return:
+    """
+    order_filter = orders.c.status.in_(USED_STATUSES)
+    delete = usages.delete()
+    if discount_code_id is not None:
+        order_filter = and_(order_filter, orders.c.discount_code_id == discount_code_id)
+        delete = delete.where(usages.c.discount_code_id == discount_code_id)
+
+    used = select([orders.c.discount_code_id, func.coalesce(func.sum(orders_tickets.c.quantity), 0)]) \
+        .select_from(orders.join(orders_tickets, orders_tickets.c.order_id == orders.c.id)
+                     .join(discount_codes_tickets,
+                           and_(discount_codes_tickets.c.discount_code_id == orders.c.discount_code_id,
+                                discount_codes_tickets.c.ticket_id == orders_tickets.c.ticket_id))) \
+        .where(order_filter) \
+        .group_by(orders.c.discount_code_id)
+    db.session.execute(delete)
+    db.session.execute(usages.insert().from_select(['discount_code_id', 'used'], used))
+    db.session.commit()
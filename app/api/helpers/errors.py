@@ -72,3 +72,8 @@ class UnprocessableEntityError(ErrorResponse):
 class BadRequestError(ErrorResponse):
     status = 400
     title = 'Bad Request'
+
+
+class TooManyRequestsError(ErrorResponse):
+    status = 429
+    title = 'Too Many Requests'
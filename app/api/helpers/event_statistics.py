@@ -0,0 +1,95 @@
+"""
+General statistics of an event
+
+All the counts are computed with a single query (`COUNT(*) FILTER (WHERE ...)` over the sessions,
+with the speakers and sponsors as scalar subqueries) and cached per event:
+- in a size bounded, process local LRU
+- optionally in Redis, shared by all the processes
+
+The cached statistics of an event are dropped whenever one of its sessions, speakers or sponsors
+is created, deleted or changes in a counted column.
+"""
+from sqlalchemy import event, func, inspect
+from sqlalchemy.orm import object_session
+
+from app.api.helpers.cache import TieredCache
+from app.models import db
+from app.models.session import Session
+from app.models.speaker import Speaker
+from app.models.sponsor import Sponsor
+
+SESSION_STATES = ('draft', 'submitted', 'accepted', 'confirmed', 'pending', 'rejected')
+
+# Columns which change the statistics of an event when changed
+COUNTED_COLUMNS = {
+    Session: ('event_id', 'state'),
+    Speaker: ('event_id',),
+    Sponsor: ('event_id',),
+}
+
+statistics_cache = TieredCache('EVENT_STATISTICS_CACHE')
+
+
+def compute_event_statistics(event_id):
+    """
+    Counts the sessions by state, the sessions, the speakers and the sponsors of an event
+    :param event_id: id of the event
+    :return: dictionary of the counts, e.g. {'sessions_draft': 2, ..., 'sponsors': 1}
+    """
+    speakers = db.session.query(func.count(Speaker.id)).filter(Speaker.event_id == event_id).as_scalar()
+    sponsors = db.session.query(func.count(Sponsor.id)).filter(Sponsor.event_id == event_id).as_scalar()
+    columns = [func.count().filter(Session.state == state) for state in SESSION_STATES]
+    columns += [func.count(), speakers, sponsors]
+    row = db.session.query(*columns).select_from(Session).filter(Session.event_id == event_id).one()
+    names = ['sessions_' + state for state in SESSION_STATES] + ['sessions', 'speakers', 'sponsors']
+    return dict(zip(names, row))
+
+
+def get_event_statistics(event_id):
+    """
+    Returns the general statistics of an event, from the cache when enabled
+    :param event_id: id of the event
+    :return: dictionary of the counts
+    """
+    return statistics_cache.get(event_id, lambda: compute_event_statistics(event_id))
+
+
+def invalidate_event_statistics(event_id):
+    """
+    Drops the cached statistics of an event, of this process and, with the redis tier, of all the processes
+    :param event_id: id of the event
+    :return:
+    """
+    statistics_cache.invalidate(event_id)
+
+
+def _invalidate(target, event_ids):
+    session = object_session(target)
+    for event_id in {event_id for event_id in event_ids if event_id is not None}:
+        statistics_cache.invalidate_after_commit(session, event_id)
+
+
+@event.listens_for(Session, 'after_insert')
+@event.listens_for(Speaker, 'after_insert')
+@event.listens_for(Sponsor, 'after_insert')
+@event.listens_for(Session, 'after_delete')
+@event.listens_for(Speaker, 'after_delete')
+@event.listens_for(Sponsor, 'after_delete')
+def receive_after_insert_or_delete(mapper, connection, target):
+    """
+    listen for the 'after_insert' and 'after_delete' events
+    """
+    _invalidate(target, [target.event_id])
+
+
+@event.listens_for(Session, 'after_update')
+@event.listens_for(Speaker, 'after_update')
+@event.listens_for(Sponsor, 'after_update')
+def receive_after_update(mapper, connection, target):
+    """
+    listen for changes of the counted columns and invalidate the statistics of the old and the new event
+    """
+    state = inspect(target)
+    if any(state.attrs[column].history.has_changes() for column in COUNTED_COLUMNS[type(target)]):
+        _invalidate(target, [target.event_id] + list(state.attrs['event_id'].history.deleted))
+
@@ -11,10 +11,10 @@ from PIL import Image
 from flask import current_app
 from flask import current_app as app
 from sqlalchemy.orm.exc import NoResultFound
-from xhtml2pdf import pisa
 
 from app import get_settings
-from app.api.helpers.storage import UploadedFile, upload, generate_hash, UPLOAD_PATHS
+from app.api.helpers.pdf_renderer import get_pdf_renderer
+from app.api.helpers.storage import UploadedFile, UploadedMemory, upload, generate_hash, UPLOAD_PATHS
 from app.models.image_size import ImageSizes
 
 
@@ -190,28 +190,15 @@ def make_frontend_url(path, parameters=None):
     ))
 
 
-def create_save_pdf(pdf_data, key, dir_path='/static/uploads/pdf/temp/'):
+def create_save_pdf(pdf_data, key):
     """
     Create and Saves PDFs from html
-    :param pdf_data:
-    :return:
+    The PDF is rendered in memory by the renderer of the process and uploaded without a temporary file.
+    :param pdf_data: the rendered template of the document
+    :param key: upload path of the PDF, formatted with a unique identifier
+    :return: URL of the uploaded PDF
     """
-    filedir = current_app.config.get('BASE_DIR') + dir_path
-
-    if not os.path.isdir(filedir):
-        os.makedirs(filedir)
-
     filename = get_file_name() + '.pdf'
-    dest = filedir + filename
-
-    file = open(dest, "wb")
-    pisa.CreatePDF(io.BytesIO(pdf_data.encode('utf-8')), file)
-    file.close()
-
-    uploaded_file = UploadedFile(dest, filename)
+    uploaded_file = UploadedMemory(get_pdf_renderer().render(pdf_data), filename)
     upload_path = key.format(identifier=get_file_name())
-    new_file = upload(uploaded_file, upload_path)
-    # Removing old file created
-    os.remove(dest)
-
-    return new_file
+    return upload(uploaded_file, upload_path)
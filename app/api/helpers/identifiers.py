@@ -0,0 +1,120 @@
+"""
+Resolution of event and order identifiers to ids
+
+Identifiers never change once created, so the resolved (id, state, deleted_at) is cached:
+- once per request, in flask.g
+- in a size bounded, process local LRU
+- optionally in Redis, shared by all the processes
+
+Events are invalidated when their state or deletion changes.
+"""
+import json
+from collections import namedtuple
+
+from dateutil import parser
+from flask import g, has_app_context
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import object_session
+
+from app.api.helpers.cache import TieredCache
+from app.models import db
+from app.models.event import Event
+from app.models.order import Order
+
+ResolvedEvent = namedtuple('ResolvedEvent', ['id', 'state', 'deleted_at'])
+ResolvedOrder = namedtuple('ResolvedOrder', ['id', 'deleted_at'])
+
+# Columns which invalidate the resolved entries of a model when changed
+RESOLVED_COLUMNS = {
+    Event: ('state', 'deleted_at'),
+    Order: ('deleted_at',),
+}
+
+
+def _dumps(resolved):
+    # stored in Redis as a JSON list, the last field being deleted_at
+    deleted_at = resolved.deleted_at.isoformat() if resolved.deleted_at else None
+    return json.dumps(list(resolved[:-1]) + [deleted_at])
+
+
+def _loads(value):
+    fields = json.loads(value)
+    if fields[-1] is not None:
+        fields[-1] = parser.parse(fields[-1])
+    return (ResolvedEvent if len(fields) == len(ResolvedEvent._fields) else ResolvedOrder)(*fields)
+
+
+identifier_cache = TieredCache('IDENTIFIER_CACHE', dumps=_dumps, loads=_loads)
+
+
+def _query(model, column, value):
+    if model is Event:
+        row = db.session.query(Event.id, Event.state, Event.deleted_at) \
+            .filter(getattr(Event, column) == value).first()
+        return ResolvedEvent(*row) if row else None
+    row = db.session.query(Order.id, Order.deleted_at).filter(getattr(Order, column) == value).first()
+    return ResolvedOrder(*row) if row else None
+
+
+def _resolve(model, column, value):
+    # Misses are not cached, the identifier may be created later
+    return identifier_cache.get('{}:{}:{}'.format(model.__tablename__, column, value),
+                                lambda: _query(model, column, value))
+
+
+def resolve(model, column, value):
+    """
+    Resolves an event or an order by a unique column, memoized for the rest of the request
+    :param model: Event or Order
+    :param column: 'id' or 'identifier'
+    :param value: value of the column, e.g. view_kwargs['event_identifier']
+    :return: ResolvedEvent/ResolvedOrder or None if there is no such row
+    """
+    if not has_app_context():
+        return _resolve(model, column, value)
+
+    resolved_map = g.setdefault('resolved_identifiers', {})
+    key = (model.__tablename__, column, str(value))
+    if key not in resolved_map:
+        resolved_map[key] = _resolve(model, column, value)
+    return resolved_map[key]
+
+
+def resolve_event(value, column='identifier'):
+    return resolve(Event, column, value)
+
+
+def resolve_order(value, column='identifier'):
+    return resolve(Order, column, value)
+
+
+def invalidate_resolved():
+    """
+    Drops all the resolved entries, of this process and, with the redis tier, of all the processes
+    :return:
+    """
+    if has_app_context():
+        g.pop('resolved_identifiers', None)
+    identifier_cache.invalidate()
+
+
+@event.listens_for(Event, 'after_update')
+@event.listens_for(Order, 'after_update')
+def receive_after_update(mapper, connection, target):
+    """
+    listen for changes of the resolved columns and invalidate the cached entries
+    """
+    state = inspect(target)
+    if any(state.attrs[column].history.has_changes() for column in RESOLVED_COLUMNS[type(target)]):
+        if has_app_context():
+            g.pop('resolved_identifiers', None)
+        identifier_cache.invalidate_after_commit(object_session(target))
+
+
+@event.listens_for(Event, 'after_delete')
+@event.listens_for(Order, 'after_delete')
+def receive_after_delete(mapper, connection, target):
+    """
+    listen for the 'after_delete' event
+    """
+    invalidate_resolved()
@@ -0,0 +1,262 @@
+"""
+Ticket inventory
+
+Every live ticket holder takes one unit of its ticket, counted as `sold` when its order is completed
+or placed and as `reserved` otherwise. Reservations are released when the order expires or is
+cancelled, as its ticket holders are deleted then.
+
+The counters are kept up to date from mapper events on TicketHolder, Order and Ticket, in the same
+transaction as the change. Taking a unit is a single conditional
+`UPDATE ... WHERE quantity - reserved - sold >= n`, which Postgres serializes on the counters row,
+so concurrent buyers can not oversell a ticket. Changes which bypass the ORM are not tracked and
+have to be reconciled with `rebuild_ticket_inventories`.
+"""
+from sqlalchemy import and_, event, func, inspect, or_, select
+from sqlalchemy.dialects.postgresql import insert
+
+from app.api.helpers.db import previous_value, track_previous_values
+from app.api.helpers.exceptions import ConflictException
+from app.models import db
+from app.models.order import Order
+from app.models.ticket import Ticket
+from app.models.ticket_holder import TicketHolder
+from app.models.ticket_inventory import TicketInventory
+
+SOLD_STATUSES = ('completed', 'placed')
+
+inventories = TicketInventory.__table__
+tickets = Ticket.__table__
+holders = TicketHolder.__table__
+orders = Order.__table__
+
+
+def _inventory_select(ticket_filter):
+    sold = func.count(holders.c.id).filter(orders.c.status.in_(SOLD_STATUSES))
+    return select([tickets.c.id, func.count(holders.c.id) - sold, sold]) \
+        .select_from(tickets.outerjoin(holders, and_(holders.c.ticket_id == tickets.c.id,
+                                                     holders.c.deleted_at.is_(None)))
+                     .outerjoin(orders, orders.c.id == holders.c.order_id)) \
+        .where(ticket_filter) \
+        .group_by(tickets.c.id)
+
+
+def _create_inventory(connection, ticket_id):
+    """
+    Creates the missing counters of a ticket from its current ticket holders
+    :return: False if the counters were created by a concurrent transaction meanwhile
+    """
+    statement = insert(inventories).from_select(['ticket_id', 'reserved', 'sold'],
+                                                _inventory_select(tickets.c.id == ticket_id))
+    return connection.execute(statement.on_conflict_do_nothing(index_elements=[inventories.c.ticket_id])
+                              .returning(inventories.c.ticket_id)).first() is not None
+
+
+def _has_inventory(connection, ticket_id):
+    return connection.execute(select([inventories.c.ticket_id])
+                              .where(inventories.c.ticket_id == ticket_id)).first() is not None
+
+
+def _is_oversold(connection, ticket_id):
+    return connection.execute(select([tickets.c.id])
+                              .where(tickets.c.id == inventories.c.ticket_id)
+                              .where(tickets.c.id == ticket_id)
+                              .where(tickets.c.quantity - inventories.c.reserved - inventories.c.sold < 0)
+                              ).first() is not None
+
+
+def _update(connection, ticket_id, values, available=None):
+    """
+    Updates the counters of a ticket, only if at least `available` units are left when given.
+    Missing counters are created from the ticket holders, which already include the change.
+    :return: False if the ticket is sold out
+    """
+    statement = inventories.update().where(inventories.c.ticket_id == ticket_id).values(values)
+    if available is not None:
+        statement = statement.where(tickets.c.id == inventories.c.ticket_id).where(
+            or_(tickets.c.quantity.is_(None),
+                tickets.c.quantity - inventories.c.reserved - inventories.c.sold >= available))
+    statement = statement.returning(inventories.c.ticket_id)
+    if connection.execute(statement).first() is not None:
+        return True
+    if _has_inventory(connection, ticket_id):
+        return False
+    if not _create_inventory(connection, ticket_id):
+        # created meanwhile by a concurrent transaction, from ticket holders which do not include the change
+        return connection.execute(statement).first() is not None
+    # the created counters include the change, which must not exceed the quantity of the ticket
+    return available is None or not _is_oversold(connection, ticket_id)
+
+
+def _take(connection, ticket_id, bucket, count=1):
+    column = inventories.c[bucket]
+    return _update(connection, ticket_id, {column: column + count}, available=count)
+
+
+def _release(connection, ticket_id, bucket, count=1):
+    column = inventories.c[bucket]
+    _update(connection, ticket_id, {column: column - count})
+
+
+def _move(connection, ticket_id, from_bucket, to_bucket, count=1):
+    from_column, to_column = inventories.c[from_bucket], inventories.c[to_bucket]
+    _update(connection, ticket_id, {from_column: from_column - count, to_column: to_column + count})
+
+
+def _bucket(connection, order_id):
+    if order_id is None:
+        return 'reserved'
+    status = connection.execute(select([orders.c.status]).where(orders.c.id == order_id)).scalar()
+    return 'sold' if status in SOLD_STATUSES else 'reserved'
+
+
+def _holder_bucket(connection, target):
+    # Use the status of the order in the session when loaded, it is the one being flushed
+    order = target.__dict__.get('order')
+    if order is not None and order.id == target.order_id:
+        return 'sold' if order.status in SOLD_STATUSES else 'reserved'
+    return _bucket(connection, target.order_id)
+
+
+def _sold_out(ticket_id):
+    return ConflictException({'pointer': '/data/attributes/ticket_id'},
+                             "Ticket with id: {} already sold out".format(ticket_id))
+
+
+# Load the previous values on change, so that the holder can be taken off its previous counters
+track_previous_values(TicketHolder.ticket_id, TicketHolder.order_id, TicketHolder.deleted_at, Order.status)
+
+
+@event.listens_for(Ticket, 'after_insert')
+def receive_ticket_after_insert(mapper, connection, target):
+    connection.execute(insert(inventories).values(ticket_id=target.id, reserved=0, sold=0)
+                       .on_conflict_do_nothing(index_elements=[inventories.c.ticket_id]))
+
+
+@event.listens_for(TicketHolder, 'after_insert')
+def receive_holder_after_insert(mapper, connection, target):
+    if target.ticket_id is None or target.deleted_at is not None:
+        return
+    if not _take(connection, target.ticket_id, _holder_bucket(connection, target)):
+        raise _sold_out(target.ticket_id)
+
+
+@event.listens_for(TicketHolder, 'after_update')
+def receive_holder_after_update(mapper, connection, target):
+    state = inspect(target)
+    if not any(state.attrs[key].history.has_changes() for key in ('ticket_id', 'order_id', 'deleted_at')):
+        return
+    previous_ticket_id = previous_value(state, 'ticket_id')
+    was_counted = previous_ticket_id is not None and previous_value(state, 'deleted_at') is None
+    is_counted = target.ticket_id is not None and target.deleted_at is None
+    previous_bucket = _bucket(connection, previous_value(state, 'order_id')) if was_counted else None
+    bucket = _holder_bucket(connection, target) if is_counted else None
+
+    if was_counted and is_counted and previous_ticket_id == target.ticket_id:
+        if previous_bucket != bucket:
+            _move(connection, target.ticket_id, previous_bucket, bucket)
+        return
+    if was_counted:
+        _release(connection, previous_ticket_id, previous_bucket)
+    if is_counted and not _take(connection, target.ticket_id, bucket):
+        raise _sold_out(target.ticket_id)
+
+
+@event.listens_for(TicketHolder, 'after_delete')
+def receive_holder_after_delete(mapper, connection, target):
+    if target.ticket_id is None or target.deleted_at is not None:
+        return
+    _release(connection, target.ticket_id, _holder_bucket(connection, target))
+
+
+def _order_holder_counts(connection, order_id):
+    return connection.execute(select([holders.c.ticket_id, func.count(holders.c.id)])
+                              .where(holders.c.order_id == order_id)
+                              .where(holders.c.deleted_at.is_(None))
+                              .where(holders.c.ticket_id.isnot(None))
+                              .group_by(holders.c.ticket_id)).fetchall()
+
+
+@event.listens_for(Order, 'after_update')
+def receive_order_after_update(mapper, connection, target):
+    """
+    listen for status changes and move the ticket holders of the order between reserved and sold
+    """
+    history = inspect(target).attrs.status.history
+    if not history.has_changes():
+        return
+    previous_sold = (history.deleted[0] if history.deleted else None) in SOLD_STATUSES
+    sold = target.status in SOLD_STATUSES
+    if previous_sold == sold:
+        return
+    from_bucket, to_bucket = ('sold', 'reserved') if previous_sold else ('reserved', 'sold')
+    for ticket_id, count in _order_holder_counts(connection, target.id):
+        _move(connection, ticket_id, from_bucket, to_bucket, count)
+
+
+@event.listens_for(Order, 'before_delete')
+def receive_order_before_delete(mapper, connection, target):
+    """
+    listen for the 'before_delete' event and release the ticket holders deleted with the order
+    """
+    bucket = _bucket(connection, target.id)
+    for ticket_id, count in _order_holder_counts(connection, target.id):
+        _release(connection, ticket_id, bucket, count)
+
+
+def take_units(connection, ticket_id, count, bucket='reserved'):
+    """
+    Takes the units of ticket holders inserted outside of the ORM, e.g. by a bulk insert.
+    Has to be called after the insert, in the same transaction
+    :param connection: connection of the transaction inserting the ticket holders
+    :param ticket_id: id of the ticket
+    :param count: number of inserted ticket holders
+    :param bucket: 'reserved' or 'sold'
+    :return: False if less than `count` units are left, the transaction has to be rolled back then
+    """
+    return _take(connection, ticket_id, bucket, count)
+
+
+def release_units(connection, ticket_counts, bucket='reserved'):
+    """
+    Releases the units of ticket holders deleted outside of the ORM, e.g. by a bulk delete
+    :param connection: connection of the transaction deleting the ticket holders
+    :param ticket_counts: dictionary of ticket id to the number of deleted live ticket holders
+    :param bucket: 'reserved' or 'sold'
+    :return:
+    """
+    for ticket_id, count in ticket_counts.items():
+        _release(connection, ticket_id, bucket, count)
+
+
+def get_ticket_availability(ticket_id):
+    """
+    Returns the number of units of a ticket which can still be bought
+    :param ticket_id: id of the ticket
+    :return: number of units left, None if the ticket has no quantity limit
+    """
+    row = db.session.query(Ticket.quantity, TicketInventory.reserved, TicketInventory.sold) \
+        .outerjoin(TicketInventory, TicketInventory.ticket_id == Ticket.id) \
+        .filter(Ticket.id == ticket_id).first()
+    if row is None or row.quantity is None:
+        return None
+    if row.reserved is None:
+        _create_inventory(db.session.connection(), ticket_id)
+        return get_ticket_availability(ticket_id)
+    return row.quantity - row.reserved - row.sold
+
+
+def rebuild_ticket_inventories(ticket_id=None):
+    """
+    Recomputes the ticket inventories from the ticket holders, for one ticket or for all of them
+    :param ticket_id: id of the ticket to rebuild, or None to rebuild everything
+    :return:
+    """
+    delete = inventories.delete()
+    ticket_filter = tickets.c.id.isnot(None)
+    if ticket_id is not None:
+        delete = delete.where(inventories.c.ticket_id == ticket_id)
+        ticket_filter = tickets.c.id == ticket_id
+    db.session.execute(delete)
+    db.session.execute(inventories.insert().from_select(['ticket_id', 'reserved', 'sold'],
+                                                        _inventory_select(ticket_filter)))
+    db.session.commit()
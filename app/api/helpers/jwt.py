@@ -1,11 +1,28 @@
 import base64
 import json
 
+from flask import _request_ctx_stack
 from flask_jwt import _default_request_handler
 from flask_scrypt import check_password_hash
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import object_session, make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
 
+from app.api.helpers.cache import TieredCache
+from app.models import db
 from app.models.user import User
 
+# Columns whose changes do not affect the resolved identity.
+# These are written on every request and must not invalidate the cache.
+IDENTITY_VOLATILE_COLUMNS = {'last_accessed_at'}
+
+# Columns kept in the cached identity, the credentials are never cached.
+# The other columns of a cached identity are loaded from the database when they are accessed.
+IDENTITY_COLUMNS = ('id', '_email', 'first_name', 'last_name', 'is_super_admin', 'is_admin', 'is_sales_admin',
+                    'is_marketer', 'is_verified')
+
+identity_cache = TieredCache('JWT_IDENTITY_CACHE')
+
 
 def jwt_authenticate(email, password):
     """
@@ -28,13 +45,46 @@ def jwt_authenticate(email, password):
         return None
 
 
+def _identity_to_user(identity):
+    user = User.__mapper__.class_manager.new_instance()
+    for column, value in identity.items():
+        set_committed_value(user, column, value)
+    make_transient_to_detached(user)
+    # merge without load attaches the cached copy to the session without a round trip to the database,
+    # the columns which are not cached are expired
+    return db.session.merge(user, load=False)
+
+
+def invalidate_identity(user_id):
+    """
+    Drops the cached identity of a user, of this process and, with the redis tier, of all the processes
+    :param user_id:
+    :return:
+    """
+    identity_cache.invalidate(user_id)
+
+
 def jwt_identity(payload):
     """
     Jwt helper function
+    Resolves the identity from the identity cache when it is enabled and the user hasn't changed
     :param payload:
     :return:
     """
-    return User.query.get(payload['identity'])
+    user_id = payload['identity']
+    loaded = []
+
+    def load_identity():
+        user = User.query.get(user_id)
+        loaded.append(user)
+        if user is None:
+            return None
+        return {column: getattr(user, column) for column in IDENTITY_COLUMNS}
+
+    identity = identity_cache.get(user_id, load_identity)
+    if loaded:
+        return loaded[0]
+    return _identity_to_user(identity)
 
 
 def get_identity():
@@ -42,6 +92,10 @@ def get_identity():
     To be used only if identity for expired tokens is required, otherwise use current_identity from flask_jwt
     :return:
     """
+    identity = getattr(_request_ctx_stack.top, 'current_identity', None)
+    if identity is not None:
+        return identity
+
     token_second_segment = _default_request_handler().split('.')[1]
     missing_padding = len(token_second_segment) % 4
 
@@ -52,3 +106,23 @@ def get_identity():
     payload = json.loads(str(base64.b64decode(token_second_segment), 'utf-8'))
     user = jwt_identity(payload)
     return user
+
+
+@event.listens_for(User, 'after_update')
+def receive_after_update(mapper, connection, target):
+    """
+    listen for updates of the user and invalidate the cached identity
+    """
+    state = inspect(target)
+    changed = [attr.key for attr in state.attrs
+               if attr.key not in IDENTITY_VOLATILE_COLUMNS and attr.history.has_changes()]
+    if changed:
+        identity_cache.invalidate_after_commit(object_session(target), target.id)
+
+
+@event.listens_for(User, 'after_delete')
+def receive_after_delete(mapper, connection, target):
+    """
+    listen for the 'after_delete' event
+    """
+    invalidate_identity(target.id)
@@ -0,0 +1,95 @@
+"""
+Write-behind buffering of the users' last access time
+
+- Record an access in a Redis hash (or an in-process buffer) instead of committing the user row
+- Periodically flush all the buffered timestamps with a single bulk UPDATE
+"""
+import logging
+import threading
+from datetime import datetime
+
+import pytz
+from flask import current_app as app
+from sqlalchemy import text
+
+from app.api.helpers.db import save_to_db
+from app.models import db
+from app.views.redis_store import redis_store
+
+logger = logging.getLogger(__name__)
+
+REDIS_LAST_ACCESS = 'users_last_accessed_at'
+
+_buffer = {}
+_buffer_lock = threading.Lock()
+
+
+def record_user_access(user, commit=False):
+    """
+    Records that the user has accessed the API just now.
+    In write-behind mode the timestamp is buffered and written by `flush_last_access`,
+    otherwise it is set on the user directly.
+    :param user: the user accessing the API
+    :param commit: save the user right away when not in write-behind mode
+    :return:
+    """
+    now = datetime.now(pytz.utc)
+    if not app.config['LAST_ACCESS_WRITE_BEHIND']:
+        user.last_accessed_at = now
+        if commit:
+            save_to_db(user)
+        return
+
+    if app.config['LAST_ACCESS_BUFFER'] == 'redis':
+        redis_store.hset(REDIS_LAST_ACCESS, user.id, now.isoformat())
+    else:
+        with _buffer_lock:
+            _buffer[user.id] = now
+
+
+def _drain_buffer():
+    if app.config['LAST_ACCESS_BUFFER'] == 'redis':
+        pipe = redis_store.pipeline()
+        pipe.hgetall(REDIS_LAST_ACCESS)
+        pipe.delete(REDIS_LAST_ACCESS)
+        accesses, _ = pipe.execute()
+        return {int(user_id): value.decode('utf-8') if isinstance(value, bytes) else value
+                for user_id, value in accesses.items()}
+
+    global _buffer
+    with _buffer_lock:
+        accesses, _buffer = _buffer, {}
+    return {user_id: accessed_at.isoformat() for user_id, accessed_at in accesses.items()}
+
+
+def flush_last_access():
+    """
+    Writes all the buffered access times to the users table with one UPDATE ... FROM (VALUES ...) statement.
+    An older buffered value never overwrites a newer one in the database.
+    :return: number of users flushed
+    """
+    accesses = _drain_buffer()
+    if not accesses:
+        return 0
+
+    values = []
+    params = {}
+    for index, (user_id, accessed_at) in enumerate(accesses.items()):
+        values.append('(CAST(:id_{0} AS INTEGER), CAST(:ts_{0} AS TIMESTAMP WITH TIME ZONE))'.format(index))
+        params['id_{}'.format(index)] = user_id
+        params['ts_{}'.format(index)] = accessed_at
+
+    statement = text(
+        'UPDATE users SET last_accessed_at = access.accessed_at '
+        'FROM (VALUES {}) AS access (user_id, accessed_at) '
+        'WHERE users.id = access.user_id '
+        'AND (users.last_accessed_at IS NULL OR users.last_accessed_at < access.accessed_at)'.format(
+            ', '.join(values)))
+    try:
+        db.session.execute(statement, params)
+        db.session.commit()
+    except Exception:
+        logger.exception('Could not flush the last access time of %d users', len(accesses))
+        db.session.rollback()
+        return 0
+    return len(accesses)
@@ -1,10 +1,43 @@
+"""
+Activity log
+
+Activities are inserted and committed right away by default. With ACTIVITY_LOG_WRITE_BEHIND they are buffered
+instead, without touching the session of the caller, and `flush_activities` inserts them in batches from a
+background job:
+
+- ACTIVITY_LOG_BUFFER 'redis' buffers them in a Redis list, shared by the processes and kept if one crashes
+  (they are buffered in the process while Redis is unavailable)
+- ACTIVITY_LOG_BUFFER 'memory' buffers them in the process, the activities of a crashed process are lost
+
+At most ACTIVITY_LOG_BUFFER_SIZE activities are buffered, the oldest ones are dropped beyond.
+"""
+import json
+import logging
+import threading
+from collections import deque
+from datetime import datetime
+
+import pytz
+from flask import current_app as app
+from redis.exceptions import RedisError
+
 from app.api.helpers.db import save_to_db
+from app.models import db
 from app.models.activity import Activity, ACTIVITIES
+from app.views.redis_store import redis_store
 
+logger = logging.getLogger(__name__)
 
-def record_activity(template, login_user=None, **kwargs):
+REDIS_ACTIVITIES = 'activities'
+
+_buffer = None
+_buffer_lock = threading.Lock()
+_dropped = 0
+
+
+def _format_activity(template, login_user, kwargs):
     """
-    record an activity
+    Returns the actor and the message of an activity
     """
     if login_user:
         actor = login_user.email + ' (' + str(login_user.id) + ')'
@@ -33,6 +66,150 @@ def record_activity(template, login_user=None, **kwargs):
         msg = ACTIVITIES[template].format(**kwargs)
     except Exception:  # in case some error happened, not good
         msg = '[ERROR LOGGING] %s' % template
+    return actor, msg
 
+
+def _get_buffer():
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                _buffer = deque(maxlen=app.config['ACTIVITY_LOG_BUFFER_SIZE'])
+    return _buffer
+
+
+def _buffer_activities(rows):
+    global _dropped
+    size = app.config['ACTIVITY_LOG_BUFFER_SIZE']
+    if app.config['ACTIVITY_LOG_BUFFER'] == 'redis':
+        pipe = redis_store.pipeline()
+        pipe.rpush(REDIS_ACTIVITIES, *[json.dumps(dict(row, time=row['time'].timestamp())) for row in rows])
+        pipe.ltrim(REDIS_ACTIVITIES, -size, -1)
+        try:
+            length, _ = pipe.execute()
+        except RedisError:
+            # the activities are kept in the process until Redis is back
+            logger.exception('Could not buffer %d activities in Redis', len(rows))
+            _buffer_in_memory(rows, size)
+            return
+        dropped = max(0, length - size)
+        if dropped:
+            with _buffer_lock:
+                _dropped += dropped
+    else:
+        _buffer_in_memory(rows, size)
+
+
+def _buffer_in_memory(rows, size):
+    global _dropped
+    buffer = _get_buffer()
+    with _buffer_lock:
+        _dropped += max(0, len(buffer) + len(rows) - size)
+        buffer.extend(rows)
+
+
+def record_activity(template, login_user=None, **kwargs):
+    """
+    record an activity
+    """
+    actor, msg = _format_activity(template, login_user, kwargs)
+    if app.config['ACTIVITY_LOG_WRITE_BEHIND']:
+        _buffer_activities([{'actor': actor, 'time': datetime.now(pytz.utc), 'action': msg}])
+        return
     activity = Activity(actor=actor, action=msg)
     save_to_db(activity, 'Activity Recorded')
+
+
+def record_activities(template, activities, login_user=None):
+    """
+    record many activities of the same template with a single insert
+    :param template: the template of the activities
+    :param activities: list of the keyword arguments of each activity
+    :param login_user: the actor of the activities
+    """
+    if not activities:
+        return
+    now = datetime.now(pytz.utc)
+    rows = []
+    for kwargs in activities:
+        actor, msg = _format_activity(template, login_user, dict(kwargs))
+        rows.append({'actor': actor, 'time': now, 'action': msg})
+    if app.config['ACTIVITY_LOG_WRITE_BEHIND']:
+        _buffer_activities(rows)
+        return
+    db.session.execute(Activity.__table__.insert().values(rows))
+    db.session.commit()
+
+
+def _drain_buffer(batch_size, redis):
+    if redis:
+        pipe = redis_store.pipeline()
+        pipe.lrange(REDIS_ACTIVITIES, 0, batch_size - 1)
+        pipe.ltrim(REDIS_ACTIVITIES, batch_size, -1)
+        values, _ = pipe.execute()
+        rows = []
+        for value in values:
+            row = json.loads(value.decode('utf-8') if isinstance(value, bytes) else value)
+            row['time'] = datetime.fromtimestamp(row['time'], pytz.utc)
+            rows.append(row)
+        return rows
+
+    buffer = _get_buffer()
+    with _buffer_lock:
+        return [buffer.popleft() for _ in range(min(batch_size, len(buffer)))]
+
+
+def _requeue(rows, redis):
+    # put back in front of the buffer, to be inserted by the next flush
+    if redis:
+        try:
+            redis_store.lpush(REDIS_ACTIVITIES, *[json.dumps(dict(row, time=row['time'].timestamp()))
+                                                  for row in reversed(rows)])
+            return
+        except RedisError:
+            logger.exception('Could not buffer %d activities in Redis', len(rows))
+    buffer = _get_buffer()
+    with _buffer_lock:
+        buffer.extendleft(reversed(rows))
+
+
+def _flush(batch_size, redis):
+    inserted = 0
+    while True:
+        rows = _drain_buffer(batch_size, redis)
+        if not rows:
+            return inserted
+        try:
+            db.session.execute(Activity.__table__.insert().values(rows))
+            db.session.commit()
+        except Exception:
+            logger.exception('Could not insert %d activities', len(rows))
+            db.session.rollback()
+            _requeue(rows, redis)
+            return inserted
+        inserted += len(rows)
+        if len(rows) < batch_size:
+            return inserted
+
+
+def flush_activities():
+    """
+    Inserts the buffered activities, ACTIVITY_LOG_BATCH_SIZE rows per statement.
+    A batch which can not be inserted is buffered again.
+    The in process buffer is flushed in Redis mode as well, it holds the activities buffered while Redis was down.
+    :return: number of activities inserted
+    """
+    global _dropped
+    with _buffer_lock:
+        dropped, _dropped = _dropped, 0
+    if dropped:
+        logger.warning('Dropped %d activities, the activity log buffer was full', dropped)
+
+    batch_size = app.config['ACTIVITY_LOG_BATCH_SIZE']
+    inserted = _flush(batch_size, redis=False)
+    if app.config['ACTIVITY_LOG_BUFFER'] == 'redis':
+        try:
+            inserted += _flush(batch_size, redis=True)
+        except RedisError:
+            logger.exception('Could not read the activities buffered in Redis')
+    return inserted
@@ -1,4 +1,5 @@
 import base64
+from collections import OrderedDict
 from datetime import datetime
 
 from flask import current_app
@@ -6,15 +7,40 @@ from flask import current_app
 from app import get_settings
 from app.api.helpers.db import save_to_db
 from app.api.helpers.files import make_frontend_url
-from app.api.helpers.log import record_activity
+from app.api.helpers.log import record_activity, record_activities
 from app.api.helpers.system_mails import MAILS
 from app.api.helpers.utilities import string_empty, get_serializer, str_generator
+from app.models import db
 from app.models.mail import Mail, USER_CONFIRM, NEW_SESSION, USER_CHANGE_EMAIL, SESSION_ACCEPT_REJECT, EVENT_ROLE, \
-    AFTER_EVENT, MONTHLY_PAYMENT_EMAIL, MONTHLY_PAYMENT_FOLLOWUP_EMAIL, EVENT_EXPORTED, EVENT_EXPORT_FAIL, \
+    MONTHLY_PAYMENT_EMAIL, MONTHLY_PAYMENT_FOLLOWUP_EMAIL, EVENT_EXPORTED, EVENT_EXPORT_FAIL, \
     EVENT_IMPORTED, EVENT_IMPORT_FAIL, TICKET_PURCHASED_ATTENDEE, TICKET_CANCELLED, TICKET_PURCHASED
 from app.models.user import User
 
 
+def get_smtp_config(settings=None):
+    """
+    Returns the connection settings of the SMTP server, in the form expected by the SMTP tasks
+    """
+    settings = settings or get_settings()
+    smtp_encryption = settings['smtp_encryption']
+    if smtp_encryption == 'tls':
+        smtp_encryption = 'required'
+    elif smtp_encryption == 'ssl':
+        smtp_encryption = 'ssl'
+    elif smtp_encryption == 'tls_optional':
+        smtp_encryption = 'optional'
+    else:
+        smtp_encryption = 'none'
+
+    return {
+        'host': settings['smtp_host'],
+        'username': settings['smtp_username'],
+        'password': settings['smtp_password'],
+        'encryption': smtp_encryption,
+        'port': settings['smtp_port'],
+    }
+
+
 def send_email(to, action, subject, html):
     """
     Sends email and records it in DB
@@ -35,24 +61,7 @@ def send_email(to, action, subject, html):
 
         if not current_app.config['TESTING']:
             if email_service == 'smtp':
-                smtp_encryption = get_settings()['smtp_encryption']
-                if smtp_encryption == 'tls':
-                    smtp_encryption = 'required'
-                elif smtp_encryption == 'ssl':
-                    smtp_encryption = 'ssl'
-                elif smtp_encryption == 'tls_optional':
-                    smtp_encryption = 'optional'
-                else:
-                    smtp_encryption = 'none'
-
-                config = {
-                    'host': get_settings()['smtp_host'],
-                    'username': get_settings()['smtp_username'],
-                    'password': get_settings()['smtp_password'],
-                    'encryption': smtp_encryption,
-                    'port': get_settings()['smtp_port'],
-                }
-
+                config = get_smtp_config()
                 from .tasks import send_mail_via_smtp_task
                 send_mail_via_smtp_task.delay(config, payload)
             else:
@@ -98,6 +107,81 @@ def send_email_with_action(user, action, **kwargs):
     )
 
 
+def _record_mails(mails, action):
+    """
+    Records sent mails and their activities, with one insert each
+    """
+    now = datetime.utcnow()
+    db.session.execute(Mail.__table__.insert().values([
+        {'recipient': mail['to'], 'time': now, 'action': action, 'subject': mail['subject'], 'message': mail['html']}
+        for mail in mails]))
+    record_activities('mail_event', [{'email': mail['to'], 'action': action, 'subject': mail['subject']}
+                                     for mail in mails])
+    db.session.commit()
+
+
+def send_bulk_email(recipients, action, **kwargs):
+    """
+    Sends the email of an action to many recipients, with a task per batch of BULK_EMAIL_BATCH_SIZE recipients,
+    and records them in DB with one insert per batch
+    :param recipients: emails or users, or dictionaries of the email and the arguments of one recipient
+    :param action: the action of the email, its subject and message are the ones of MAILS
+    :param kwargs: arguments of the subject and message shared by all the recipients
+    :return: number of emails sent
+    """
+    mails = []
+    for recipient in recipients:
+        if isinstance(recipient, User):
+            recipient = recipient.email
+        if not isinstance(recipient, dict):
+            recipient = {'email': recipient}
+        if string_empty(recipient['email']):
+            continue
+        arguments = dict(kwargs, **recipient)
+        mails.append({
+            'to': recipient['email'],
+            'subject': MAILS[action]['subject'].format(**arguments),
+            'html': MAILS[action]['message'].format(**arguments)
+        })
+    if not mails:
+        return 0
+
+    settings = get_settings()
+    email_service = settings['email_service']
+    if email_service == 'smtp':
+        email_from = settings['email_from_name'] + '<' + settings['email_from'] + '>'
+        config = get_smtp_config(settings)
+    else:
+        email_from = settings['email_from']
+        key = settings['sendgrid_key']
+        if not key and not current_app.config['TESTING']:
+            print('Sendgrid key not defined')
+            return 0
+        headers = {
+            "Authorization": "Bearer {}".format(key),
+            "Content-Type": "application/json"
+        }
+
+    batch_size = current_app.config['BULK_EMAIL_BATCH_SIZE']
+    for start in range(0, len(mails), batch_size):
+        batch = mails[start:start + batch_size]
+        if not current_app.config['TESTING']:
+            if email_service == 'smtp':
+                from .tasks import send_mails_via_smtp_task
+                send_mails_via_smtp_task.delay(config, [dict(mail, **{'from': email_from}) for mail in batch])
+            else:
+                # recipients of the same subject and message share a request
+                grouped = OrderedDict()
+                for mail in batch:
+                    grouped.setdefault((mail['subject'], mail['html']), []).append(mail['to'])
+                from .tasks import send_emails_task
+                for (subject, html), to in grouped.items():
+                    send_emails_task.delay({'to': to, 'from': email_from, 'fromname': settings['email_from_name'],
+                                            'subject': subject, 'html': html}, headers)
+        _record_mails(batch, action)
+    return len(mails)
+
+
 def send_email_confirmation(email, link):
     """account confirmation"""
     send_email(
@@ -164,22 +248,6 @@ def send_email_role_invite(email, role_name, event_name, link):
     )
 
 
-def send_email_after_event(email, event_name, upcoming_events):
-    """email for role invite"""
-    send_email(
-        to=email,
-        action=AFTER_EVENT,
-        subject=MAILS[AFTER_EVENT]['subject'].format(
-            event_name=event_name
-        ),
-        html=MAILS[AFTER_EVENT]['message'].format(
-            email=email,
-            event_name=event_name,
-            upcoming_events=upcoming_events
-        )
-    )
-
-
 def send_email_for_monthly_fee_payment(email, event_name, previous_month, amount, app_name, link):
     """email for monthly fee payment"""
     send_email(
@@ -279,35 +347,19 @@ def send_email_change_user_email(user, email):
 
 
 def send_email_to_attendees(order, purchaser_id):
+    purchasers = []
+    attendees = []
     for holder in order.ticket_holders:
+        recipient = {'email': holder.email, 'pdf_url': holder.pdf_url}
         if holder.user and holder.user.id == purchaser_id:
             # Ticket holder is the purchaser
-            send_email(
-                to=holder.email,
-                action=TICKET_PURCHASED,
-                subject=MAILS[TICKET_PURCHASED]['subject'].format(
-                    event_name=order.event.name,
-                    invoice_id=order.invoice_number
-                ),
-                html=MAILS[TICKET_PURCHASED]['message'].format(
-                    pdf_url=holder.pdf_url,
-                    event_name=order.event.name
-                )
-            )
+            purchasers.append(recipient)
         else:
             # The Ticket holder is not the purchaser
-            send_email(
-                to=holder.email,
-                action=TICKET_PURCHASED_ATTENDEE,
-                subject=MAILS[TICKET_PURCHASED_ATTENDEE]['subject'].format(
-                    event_name=order.event.name,
-                    invoice_id=order.invoice_number
-                ),
-                html=MAILS[TICKET_PURCHASED_ATTENDEE]['message'].format(
-                    pdf_url=holder.pdf_url,
-                    event_name=order.event.name
-                )
-            )
+            attendees.append(recipient)
+    send_bulk_email(purchasers, TICKET_PURCHASED, event_name=order.event.name, invoice_id=order.invoice_number)
+    send_bulk_email(attendees, TICKET_PURCHASED_ATTENDEE, event_name=order.event.name,
+                    invoice_id=order.invoice_number)
 
 
 def send_order_cancel_email(order):
@@ -1,30 +1,128 @@
+"""
+Notifications
+
+Whether an action is notified is read from its MessageSettings, cached by the process for
+MESSAGE_SETTINGS_CACHE_TTL seconds and dropped when a message setting changes in this process.
+The notifications of a fan-out are inserted with one statement, and in a celery task for
+more than NOTIFICATIONS_ASYNC_THRESHOLD recipients.
+"""
+from datetime import datetime
+
+import pytz
 from flask import current_app
+from sqlalchemy import event
 
-from app.api.helpers.db import save_to_db
+from app.api.helpers.cache import LRUCache
 from app.models.notification import Notification, NEW_SESSION, SESSION_ACCEPT_REJECT, \
     EVENT_IMPORTED, EVENT_IMPORT_FAIL, EVENT_EXPORTED, EVENT_EXPORT_FAIL, MONTHLY_PAYMENT_NOTIF, \
     MONTHLY_PAYMENT_FOLLOWUP_NOTIF, EVENT_ROLE, AFTER_EVENT, TICKET_PURCHASED_ORGANIZER, \
     TICKET_PURCHASED_ATTENDEE, TICKET_PURCHASED, TICKET_CANCELLED, TICKET_CANCELLED_ORGANIZER, NotificationTopic
 from app.models.message_setting import MessageSettings
-from app.api.helpers.log import record_activity
+from app.api.helpers.log import record_activities
+from app.api.helpers.notification_count import add_unread_notifications
 from app.api.helpers.system_notifications import NOTIFS
+from app.models import db
+from app.models.user import User
+
+# Notifications inserted per statement
+NOTIFICATION_BATCH_SIZE = 1000
+
+_message_settings_cache = None
+
+
+def _get_message_settings_cache():
+    global _message_settings_cache
+    if _message_settings_cache is None:
+        _message_settings_cache = LRUCache(max_size=256, ttl=current_app.config['MESSAGE_SETTINGS_CACHE_TTL'])
+    return _message_settings_cache
+
+
+@event.listens_for(MessageSettings, 'after_insert')
+@event.listens_for(MessageSettings, 'after_update')
+@event.listens_for(MessageSettings, 'after_delete')
+def receive_message_settings_change(mapper, connection, target):
+    if _message_settings_cache is not None:
+        _message_settings_cache.clear()
+
+
+def is_notification_enabled(action):
+    """
+    Checks the message settings of an action, notifications are enabled when the action has none
+    :param action: the action of the message settings
+    :return: bool
+    """
+    message_settings_cache = _get_message_settings_cache()
+    enabled = message_settings_cache.get(action)
+    if enabled is None:
+        notification_status = db.session.query(MessageSettings.notification_status) \
+            .filter(MessageSettings.action == action).order_by(MessageSettings.id).first()
+        enabled = notification_status is None or notification_status[0] == 1
+        message_settings_cache.set(action, enabled)
+    return enabled
+
+
+def _topic_value(notification):
+    # the topics are NotificationTopic members, stored as their integer value
+    return getattr(notification['notification_topic'], 'value', notification['notification_topic'])
+
+
+def create_notifications(notifications):
+    """
+    Inserts notifications and their activities, with one statement per NOTIFICATION_BATCH_SIZE notifications
+    :param notifications: list of dictionaries of the user, title, message, notification_topic and subject_id
+    """
+    now = datetime.now(pytz.utc)
+    for start in range(0, len(notifications), NOTIFICATION_BATCH_SIZE):
+        batch = notifications[start:start + NOTIFICATION_BATCH_SIZE]
+        db.session.execute(Notification.__table__.insert().values([
+            {'user_id': notification['user'].id, 'title': notification['title'], 'message': notification['message'],
+             'received_at': now, 'is_read': False, 'subject_id': notification.get('subject_id'),
+             'notification_topic': _topic_value(notification)}
+            for notification in batch]))
+        add_unread_notifications(db.session, [notification['user'].id for notification in batch])
+        record_activities('notification_event', [{'user': notification['user'], 'title': notification['title']}
+                                                 for notification in batch])
+        db.session.commit()
+
+
+def create_notifications_for_user_ids(notifications):
+    """
+    Inserts notifications whose user is given by id, e.g. from a celery task
+    :param notifications: list of dictionaries of the user_id, title, message, notification_topic and subject_id
+    """
+    user_ids = {notification['user_id'] for notification in notifications}
+    users = {user.id: user for user in User.query.filter(User.id.in_(user_ids))}
+    create_notifications([dict(notification, user=users[notification['user_id']])
+                          for notification in notifications if notification['user_id'] in users])
+
+
+def send_notifications(notifications):
+    """
+    Sends many notifications at once
+    :param notifications: list of dictionaries of the user, title, message, notification_topic and subject_id
+    """
+    notifications = [notification for notification in notifications if notification['user'] is not None]
+    if current_app.config['TESTING'] or not notifications:
+        return
+    threshold = current_app.config['NOTIFICATIONS_ASYNC_THRESHOLD']
+    if threshold and len(notifications) > threshold:
+        from .tasks import send_notifications_task
+        send_notifications_task.delay([{'user_id': notification['user'].id, 'title': notification['title'],
+                                        'message': notification['message'],
+                                        'notification_topic': _topic_value(notification),
+                                        'subject_id': notification.get('subject_id')}
+                                       for notification in notifications])
+    else:
+        create_notifications(notifications)
 
 
 def send_notification(user, title, message, notification_topic, subject_id=None):
-    if not current_app.config['TESTING']:
-        notification = Notification(user_id=user.id,
-                                    title=title,
-                                    message=message,
-                                    subject_id=subject_id,
-                                    notification_topic=notification_topic
-                                    )
-        save_to_db(notification, msg="Notification saved")
-        record_activity('notification_event', user=user, title=title)
+    send_notifications([{'user': user, 'title': title, 'message': message, 'notification_topic': notification_topic,
+                         'subject_id': subject_id}])
 
 
 def send_notif_new_session_organizer(user, event_name, link, subject_id):
-    message_settings = MessageSettings.query.filter_by(action=NEW_SESSION).first()
-    if not message_settings or message_settings.notification_status == 1:
+    if is_notification_enabled(NEW_SESSION):
         notif = NOTIFS[NEW_SESSION]
         title = notif['title'].format(event_name=event_name)
         message = notif['message'].format(event_name=event_name, link=link)
@@ -33,8 +131,7 @@ def send_notif_new_session_organizer(user, event_name, link, subject_id):
 
 
 def send_notif_session_accept_reject(user, session_name, acceptance, link, subject_id):
-    message_settings = MessageSettings.query.filter_by(action=SESSION_ACCEPT_REJECT).first()
-    if not message_settings or message_settings.notification_status == 1:
+    if is_notification_enabled(SESSION_ACCEPT_REJECT):
         notif = NOTIFS[SESSION_ACCEPT_REJECT]
         title = notif['title'].format(session_name=session_name,
                                       acceptance=acceptance)
@@ -92,8 +189,7 @@ def send_notif_after_export(user, event_name, subject_id=None, download_url=None
 
 
 def send_notif_monthly_fee_payment(user, event_name, previous_month, amount, app_name, link, subject_id):
-    message_settings = MessageSettings.query.filter_by(action=SESSION_ACCEPT_REJECT).first()
-    if not message_settings or message_settings.notification_status == 1:
+    if is_notification_enabled(SESSION_ACCEPT_REJECT):
         notif = NOTIFS[MONTHLY_PAYMENT_NOTIF]
         title = notif['title'].format(date=previous_month,
                                       event_name=event_name)
@@ -109,8 +205,7 @@ def send_notif_monthly_fee_payment(user, event_name, previous_month, amount, app
 
 
 def send_followup_notif_monthly_fee_payment(user, event_name, previous_month, amount, app_name, link, subject_id):
-    message_settings = MessageSettings.query.filter_by(action=SESSION_ACCEPT_REJECT).first()
-    if not message_settings or message_settings.notification_status == 1:
+    if is_notification_enabled(SESSION_ACCEPT_REJECT):
         notif = NOTIFS[MONTHLY_PAYMENT_FOLLOWUP_NOTIF]
         title = notif['title'].format(date=previous_month,
                                       event_name=event_name)
@@ -126,8 +221,7 @@ def send_followup_notif_monthly_fee_payment(user, event_name, previous_month, am
 
 
 def send_notif_event_role(user, role_name, event_name, link, subject_id):
-    message_settings = MessageSettings.query.filter_by(action=EVENT_ROLE).first()
-    if not message_settings or message_settings.notification_status == 1:
+    if is_notification_enabled(EVENT_ROLE):
         notif = NOTIFS[EVENT_ROLE]
         title = notif['title'].format(
             role_name=role_name,
@@ -142,9 +236,8 @@ def send_notif_event_role(user, role_name, event_name, link, subject_id):
         send_notification(user, title, message, NotificationTopic.EVENT_ROLE, subject_id)
 
 
-def send_notif_after_event(user, event_name, subject_id):
-    message_settings = MessageSettings.query.filter_by(action=AFTER_EVENT).first()
-    if not message_settings or message_settings.notification_status == 1:
+def send_notif_after_event(users, event_name, subject_id):
+    if is_notification_enabled(AFTER_EVENT):
         notif = NOTIFS[AFTER_EVENT]
         title = notif['title'].format(
             event_name=event_name
@@ -153,85 +246,89 @@ def send_notif_after_event(user, event_name, subject_id):
             event_name=event_name
         )
 
-        send_notification(user, title, message, NotificationTopic.AFTER_EVENT, subject_id)
+        send_notifications([{'user': user, 'title': title, 'message': message,
+                             'notification_topic': NotificationTopic.AFTER_EVENT, 'subject_id': subject_id}
+                            for user in users])
 
 
-def send_notif_ticket_purchase_organizer(user, invoice_id, order_url, event_name, subject_id):
-    """Send notification with order invoice link after purchase"""
-    send_notification(
-        user=user,
-        title=NOTIFS[TICKET_PURCHASED_ORGANIZER]['title'].format(
-            invoice_id=invoice_id,
-            event_name=event_name
-        ),
-        message=NOTIFS[TICKET_PURCHASED_ORGANIZER]['message'].format(
-            order_url=order_url
-        ),
-        notification_topic=NotificationTopic.TICKET_PURCHASED_ORGANIZER,
-        subject_id=subject_id
+def send_notif_ticket_purchase_organizer(users, invoice_id, order_url, event_name, subject_id):
+    """Send notification with order invoice link after purchase to the organizers"""
+    title = NOTIFS[TICKET_PURCHASED_ORGANIZER]['title'].format(
+        invoice_id=invoice_id,
+        event_name=event_name
+    )
+    message = NOTIFS[TICKET_PURCHASED_ORGANIZER]['message'].format(
+        order_url=order_url
     )
+    send_notifications([{'user': user, 'title': title, 'message': message,
+                         'notification_topic': NotificationTopic.TICKET_PURCHASED_ORGANIZER,
+                         'subject_id': subject_id}
+                        for user in users])
 
 
 def send_notif_to_attendees(order, purchaser_id):
+    notifications = []
     for holder in order.ticket_holders:
         if holder.user:
             # send notification if the ticket holder is a registered user.
             if holder.user.id != purchaser_id:
                 # The ticket holder is not the purchaser
-                send_notification(
-                    user=holder.user,
-                    title=NOTIFS[TICKET_PURCHASED_ATTENDEE]['title'].format(
+                notifications.append({
+                    'user': holder.user,
+                    'title': NOTIFS[TICKET_PURCHASED_ATTENDEE]['title'].format(
                         event_name=order.event.name
                     ),
-                    message=NOTIFS[TICKET_PURCHASED_ATTENDEE]['message'].format(
+                    'message': NOTIFS[TICKET_PURCHASED_ATTENDEE]['message'].format(
                         pdf_url=holder.pdf_url
                     ),
-                    notification_topic=NotificationTopic.TICKET_PURCHASED_ATTENDEE,
-                    subject_id=order.id
-                )
+                    'notification_topic': NotificationTopic.TICKET_PURCHASED_ATTENDEE,
+                    'subject_id': order.id
+                })
             else:
                 # The Ticket purchaser
-                send_notification(
-                    user=holder.user,
-                    title=NOTIFS[TICKET_PURCHASED]['title'].format(
+                notifications.append({
+                    'user': holder.user,
+                    'title': NOTIFS[TICKET_PURCHASED]['title'].format(
                         invoice_id=order.invoice_number
                     ),
-                    message=NOTIFS[TICKET_PURCHASED]['message'].format(
+                    'message': NOTIFS[TICKET_PURCHASED]['message'].format(
                         order_url=order.tickets_pdf_url
                     ),
-                    notification_topic=NotificationTopic.TICKET_PURCHASED,
-                    subject_id=order.id
-                )
+                    'notification_topic': NotificationTopic.TICKET_PURCHASED,
+                    'subject_id': order.id
+                })
+    send_notifications(notifications)
 
 
 def send_notif_ticket_cancel(order):
     """Send notification with order invoice link after cancel"""
-    send_notification(
-        user=order.user,
-        title=NOTIFS[TICKET_CANCELLED]['title'].format(
+    notifications = [{
+        'user': order.user,
+        'title': NOTIFS[TICKET_CANCELLED]['title'].format(
             invoice_id=order.invoice_number,
             event_name=order.event.name
         ),
-        message=NOTIFS[TICKET_CANCELLED]['message'].format(
+        'message': NOTIFS[TICKET_CANCELLED]['message'].format(
             cancel_note=order.cancel_note,
             event_name=order.event.name
         ),
-        notification_topic=NotificationTopic.TICKET_CANCELLED,
-        subject_id=order.id
-    )
+        'notification_topic': NotificationTopic.TICKET_CANCELLED,
+        'subject_id': order.id
+    }]
     for organizer in order.event.organizers:
-        send_notification(
-            user=organizer,
-            title=NOTIFS[TICKET_CANCELLED_ORGANIZER]['title'].format(
+        notifications.append({
+            'user': organizer,
+            'title': NOTIFS[TICKET_CANCELLED_ORGANIZER]['title'].format(
                 invoice_id=order.invoice_number
             ),
-            message=NOTIFS[TICKET_CANCELLED_ORGANIZER]['message'].format(
+            'message': NOTIFS[TICKET_CANCELLED_ORGANIZER]['message'].format(
                 cancel_note=order.cancel_note,
                 invoice_id=order.invoice_number
             ),
-            notification_topic=NotificationTopic.TICKET_CANCELLED_ORGANIZER,
-            subject_id=order.id
-        )
+            'notification_topic': NotificationTopic.TICKET_CANCELLED_ORGANIZER,
+            'subject_id': order.id
+        })
+    send_notifications(notifications)
 
 
 def send_notification_with_action(user, action, notification_topic, **kwargs):
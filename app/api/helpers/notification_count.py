@@ -0,0 +1,112 @@
+"""
+Unread notification counters
+
+The number of unread notifications (is_read false) of each user is kept in `user_notification_counts`,
+updated from mapper events on Notification in the same transaction as the notification, so reading it
+does not count the notifications. Bulk writes bypassing the ORM have to update the counters themselves,
+with `add_unread_notifications`, and anything else is reconciled with `rebuild_unread_notification_counts`.
+"""
+from collections import Counter
+
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.dialects.postgresql import insert
+
+from app.api.helpers.db import previous_value, track_previous_values
+from app.models import db
+from app.models.notification import Notification
+from app.models.user_notification_count import UserNotificationCount
+
+counts = UserNotificationCount.__table__
+notifications = Notification.__table__
+
+
+def _apply(connection, user_id, count):
+    if user_id is None or not count:
+        return
+    statement = insert(counts).values(user_id=user_id, unread=count)
+    statement = statement.on_conflict_do_update(index_elements=[counts.c.user_id],
+                                                set_={'unread': counts.c.unread + statement.excluded.unread})
+    connection.execute(statement)
+
+
+def add_unread_notifications(connection, user_ids):
+    """
+    Counts new unread notifications written without the ORM, e.g. with a multi-row insert
+    :param connection: connection of the transaction writing the notifications
+    :param user_ids: the user id of each new notification
+    :return:
+    """
+    for user_id, count in Counter(user_ids).items():
+        _apply(connection, user_id, count)
+
+
+# Load the previous values on change, so that they can be taken off the counters
+track_previous_values(Notification.is_read, Notification.user_id)
+
+
+@event.listens_for(Notification, 'after_insert')
+def receive_notification_after_insert(mapper, connection, target):
+    if target.is_read is False:
+        _apply(connection, target.user_id, 1)
+
+
+@event.listens_for(Notification, 'after_update')
+def receive_notification_after_update(mapper, connection, target):
+    state = inspect(target)
+    if not any(state.attrs[key].history.has_changes() for key in ('is_read', 'user_id')):
+        return
+    if previous_value(state, 'is_read') is False:
+        _apply(connection, previous_value(state, 'user_id'), -1)
+    if target.is_read is False:
+        _apply(connection, target.user_id, 1)
+
+
+@event.listens_for(Notification, 'after_delete')
+def receive_notification_after_delete(mapper, connection, target):
+    if target.is_read is False:
+        _apply(connection, target.user_id, -1)
+
+
+def get_unread_notification_count(user_id):
+    """
+    Returns the number of unread notifications of a user
+    :param user_id: id of the user
+    :return:
+    """
+    unread = db.session.query(UserNotificationCount.unread).filter_by(user_id=user_id).scalar()
+    return unread or 0
+
+
+def mark_all_notifications_read(user_id):
+    """
+    Marks all the notifications of a user as read, with a single update
+    :param user_id: id of the user
+    :return: number of notifications marked as read
+    """
+    marked = db.session.execute(notifications.update()
+                                .where(notifications.c.user_id == user_id)
+                                .where(notifications.c.is_read.is_(False))
+                                .values(is_read=True)).rowcount
+    # notifications committed meanwhile are counted but not marked, only the marked ones are taken off
+    db.session.execute(counts.update().where(counts.c.user_id == user_id).values(unread=counts.c.unread - marked))
+    db.session.commit()
+    return marked
+
+
+def rebuild_unread_notification_counts(user_id=None):
+    """
+    Recomputes the unread notification counters from the notifications, for one user or for all of them
+    :param user_id: id of the user to rebuild, or None to rebuild everything
+    :return:
+    """
+    unread = select([notifications.c.user_id, func.count()]) \
+        .where(notifications.c.is_read.is_(False)) \
+        .where(notifications.c.user_id.isnot(None)) \
+        .group_by(notifications.c.user_id)
+    delete = counts.delete()
+    if user_id is not None:
+        unread = unread.where(notifications.c.user_id == user_id)
+        delete = delete.where(counts.c.user_id == user_id)
+    db.session.execute(delete)
+    db.session.execute(counts.insert().from_select(['user_id', 'unread'], unread))
+    db.session.commit()
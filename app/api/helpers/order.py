@@ -1,16 +1,26 @@
+import hashlib
 import logging
 from datetime import timedelta, datetime, timezone
 
-from flask import render_template
+from celery import chord
+from flask import current_app as app
+from redis.exceptions import RedisError
+from sqlalchemy import or_
 
 from app.api.helpers import ticketing
-from app.api.helpers.db import save_to_db, safe_query_without_soft_deleted_entries, get_count
+from app.api.helpers.db import save_to_db, safe_query_without_soft_deleted_entries
 from app.api.helpers.exceptions import UnprocessableEntity, ConflictException
 from app.api.helpers.files import create_save_pdf
+from app.api.helpers.inventory import get_ticket_availability, release_units, take_units
+from app.api.helpers.order_rollups import apply_status_change
 from app.api.helpers.storage import UPLOAD_PATHS
 from app.models import db
+from app.models.order import Order
 from app.models.ticket import Ticket
 from app.models.ticket_holder import TicketHolder
+from app.views.redis_store import redis_store
+
+REDIS_PDF_TICKET = 'pdf_ticket:{}'
 
 
 def delete_related_attendees_for_order(order):
@@ -45,35 +55,102 @@ def set_expiry_for_order(order, override=False):
     return order
 
 
+def expire_pending_orders(batch_size=None):
+    """
+    Expires the pending orders whose time slot is over and deletes their attendees, in batches.
+    The orders are selected through the partial index on pending orders and updated with bulk
+    statements, so the counters maintained by mapper events are updated explicitly.
+    :param batch_size: number of orders expired per transaction.
+    :return: number of expired orders.
+    """
+    batch_size = batch_size or app.config['ORDER_EXPIRY_BATCH_SIZE']
+    expired_count = 0
+    while True:
+        expires_before = datetime.now(timezone.utc) - \
+            timedelta(minutes=ticketing.TicketingManager.get_order_expiry())
+        order_ids = [order_id for order_id, in db.session.query(Order.id)
+                     .filter(Order.status == 'pending', Order.created_at < expires_before,
+                             or_(Order.paid_via.is_(None), Order.paid_via == ''))
+                     .order_by(Order.created_at)
+                     .limit(batch_size)
+                     .with_for_update(skip_locked=True)]
+        if not order_ids:
+            return expired_count
+
+        connection = db.session.connection()
+        apply_status_change(connection, order_ids, 'expired')
+        db.session.query(Order).filter(Order.id.in_(order_ids)) \
+            .update({'status': 'expired'}, synchronize_session=False)
+        deleted = connection.execute(TicketHolder.__table__.delete()
+                                     .where(TicketHolder.order_id.in_(order_ids))
+                                     .returning(TicketHolder.ticket_id, TicketHolder.deleted_at))
+        released = {}
+        for ticket_id, deleted_at in deleted:
+            if ticket_id is not None and deleted_at is None:
+                released[ticket_id] = released.get(ticket_id, 0) + 1
+        release_units(connection, released)
+        db.session.commit()
+
+        expired_count += len(order_ids)
+        if len(order_ids) < batch_size:
+            return expired_count
+
+
+def save_pdf_ticket(html):
+    """
+    Renders and uploads a ticket PDF. Tickets rendered from the same html, e.g. the purchaser PDF of an order
+    whose tickets are generated again, are uploaded once and share the URL for PDF_TICKETS_DEDUP_TTL seconds.
+    :param html: the rendered ticket template.
+    :return: URL of the uploaded PDF.
+    """
+    redis_key = REDIS_PDF_TICKET.format(hashlib.sha256(html.encode('utf-8')).hexdigest())
+    try:
+        pdf_url = redis_store.get(redis_key)
+    except RedisError:
+        logging.exception('PDF ticket cache unavailable')
+        pdf_url = None
+    if pdf_url is not None:
+        return pdf_url.decode('utf-8') if isinstance(pdf_url, bytes) else pdf_url
+
+    pdf_url = create_save_pdf(html, UPLOAD_PATHS['pdf']['ticket_attendee'])
+    try:
+        redis_store.setex(redis_key, app.config['PDF_TICKETS_DEDUP_TTL'], pdf_url)
+    except RedisError:
+        logging.exception('PDF ticket cache unavailable')
+    return pdf_url
+
+
 def create_pdf_tickets_for_holder(order):
     """
     Create tickets for the holders of an order.
+    The PDFs are rendered by celery tasks, one for the purchaser and one per holder who is not the buyer, and
+    the order is marked with tickets_pdf_status 'pending' until all of them are uploaded.
     :param order: The order for which to create tickets for.
     """
     if order.status == 'completed':
-        pdf = create_save_pdf(render_template('pdf/ticket_purchaser.html', order=order),
-                              UPLOAD_PATHS['pdf']['ticket_attendee'],
-                              dir_path='/static/uploads/pdf/tickets/')
-        order.tickets_pdf_url = pdf
+        from .tasks import create_pdf_ticket_for_purchaser_task, create_pdf_ticket_for_holder_task, \
+            finish_pdf_tickets_task, fail_pdf_tickets_task
 
+        order.tickets_pdf_status = 'pending'
+        save_to_db(order)
+
+        queue = app.config['PDF_TICKETS_QUEUE']
+        header = [create_pdf_ticket_for_purchaser_task.si(order.id).set(queue=queue)]
         for holder in order.ticket_holders:
             if (not holder.user) or holder.user.id != order.user_id:
                 # holder is not the order buyer.
-                pdf = create_save_pdf(render_template('pdf/ticket_attendee.html', order=order, holder=holder),
-                                      UPLOAD_PATHS['pdf']['ticket_attendee'],
-                                      dir_path='/static/uploads/pdf/tickets/')
-            else:
-                # holder is the order buyer.
-                pdf = order.tickets_pdf_url
-            holder.pdf_url = pdf
-            save_to_db(holder)
+                header.append(create_pdf_ticket_for_holder_task.si(order.id, holder.id).set(queue=queue))
 
-        save_to_db(order)
+        body = finish_pdf_tickets_task.si(order.id).set(queue=queue)
+        body.link_error(fail_pdf_tickets_task.si(order.id).set(queue=queue))
+        chord(header)(body)
 
 
 def create_onsite_attendees_for_order(data):
     """
     Creates on site ticket holders for an order and adds it into the request data.
+    The ticket holders of each ticket are inserted with a single statement and the sold out check is done once
+    per ticket, in the transaction which creates the order.
     :param data: data initially passed in the POST request for order.
     :return:
     """
@@ -83,40 +160,38 @@ def create_onsite_attendees_for_order(data):
         raise UnprocessableEntity({'pointer': 'data/attributes/on_site_tickets'}, 'on_site_tickets info missing')
 
     data['ticket_holders'] = []
+    connection = db.session.connection()
+    holders = TicketHolder.__table__
 
     for on_site_ticket in on_site_tickets:
         ticket_id = on_site_ticket['id']
         quantity = int(on_site_ticket['quantity'])
 
         ticket = safe_query_without_soft_deleted_entries(db, Ticket, 'id', ticket_id, 'ticket_id')
-
-        ticket_sold_count = get_count(db.session.query(TicketHolder.id).
-                                      filter_by(ticket_id=int(ticket.id), deleted_at=None))
-
-        # Check if the ticket is already sold out or not.
-        if ticket_sold_count + quantity > ticket.quantity:
-            # delete the already created attendees.
-            for holder in data['ticket_holders']:
-                ticket_holder = db.session.query(TicketHolder).filter(id == int(holder)).one()
-                db.session.delete(ticket_holder)
-                try:
-                    db.session.commit()
-                except Exception as e:
-                    logging.error('DB Exception! %s' % e)
-                    db.session.rollback()
-
+        if quantity < 1:
+            continue
+
+        result = connection.execute(holders.insert().values(
+            [{'firstname': 'onsite', 'lastname': 'attendee', 'email': 'example@example.com',
+              'ticket_id': ticket.id, 'event_id': data.get('event')} for _ in range(quantity)]
+        ).returning(holders.c.id))
+        ticket_holder_ids = [ticket_holder_id for ticket_holder_id, in result]
+
+        # Check if the ticket is already sold out or not, taking the units of all its ticket holders at once.
+        if not take_units(connection, ticket.id, quantity):
+            available = get_ticket_availability(ticket.id)
+            # drop the already created attendees.
+            db.session.rollback()
             raise ConflictException(
                 {'pointer': '/data/attributes/on_site_tickets'},
-                "Ticket with id: {} already sold out. You can buy at most {} tickets".format(ticket_id,
-                                                                                             ticket.quantity -
-                                                                                             ticket_sold_count)
+                "Ticket with id: {} already sold out. You can buy at most {} tickets".format(ticket_id, available)
             )
 
-        for _ in range(1, quantity):
-            ticket_holder = TicketHolder(firstname='onsite', lastname='attendee', email='example@example.com',
-                                         ticket_id=ticket.id, event_id=data.get('event'))
-            save_to_db(ticket_holder)
-            data['ticket_holders'].append(ticket_holder.id)
+        data['ticket_holders'] += ticket_holder_ids
+
+    # flushed only, the ticket holders and their units are committed with the order, or rolled back with it
+    # when the order can not be created
+    db.session.flush()
 
     # delete from the data.
     del data['on_site_tickets']
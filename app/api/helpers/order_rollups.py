@@ -0,0 +1,193 @@
+"""
+Incremental maintenance of the order rollups
+
+The counters are kept up to date from mapper events on Order and OrderTicket, in the same
+transaction as the change of the order. Changes which bypass the ORM (bulk updates, raw SQL)
+are not tracked and have to be reconciled with `rebuild_order_rollups`.
+"""
+from sqlalchemy import event, func, inspect, literal_column, select
+from sqlalchemy.dialects.postgresql import insert
+
+from app.api.helpers.db import previous_value, track_previous_values
+from app.api.helpers.order_statistics import pivot_statistics
+from app.models import db
+from app.models.order import Order, OrderTicket
+from app.models.order_rollup import OrderRollup, EVENT_TOTAL
+
+rollups = OrderRollup.__table__
+orders = Order.__table__
+orders_tickets = OrderTicket.__table__
+
+
+def _apply(connection, event_id, ticket_id, status, ticket_count=0, order_count=0, amount=0):
+    if event_id is None or not (ticket_count or order_count or amount):
+        return
+    statement = insert(rollups).values(event_id=event_id, ticket_id=ticket_id, status=status or '',
+                                       ticket_count=ticket_count, order_count=order_count, amount=amount)
+    statement = statement.on_conflict_do_update(
+        index_elements=[rollups.c.event_id, rollups.c.ticket_id, rollups.c.status],
+        set_={
+            'ticket_count': rollups.c.ticket_count + statement.excluded.ticket_count,
+            'order_count': rollups.c.order_count + statement.excluded.order_count,
+            'amount': rollups.c.amount + statement.excluded.amount,
+        })
+    connection.execute(statement)
+
+
+def _apply_order(connection, order_id, event_id, status, amount, sign):
+    """
+    Adds (sign=1) or removes (sign=-1) an order and its tickets to or from the counters
+    """
+    amount = amount or 0
+    tickets = connection.execute(select([orders_tickets.c.ticket_id, orders_tickets.c.quantity])
+                                 .where(orders_tickets.c.order_id == order_id)).fetchall()
+    _apply(connection, event_id, EVENT_TOTAL, status, ticket_count=sign * sum(q or 0 for _, q in tickets),
+           order_count=sign, amount=sign * amount)
+    for ticket_id, quantity in tickets:
+        _apply(connection, event_id, ticket_id, status, ticket_count=sign * (quantity or 0), order_count=sign,
+               amount=sign * amount)
+
+
+def _apply_order_ticket(connection, order_id, ticket_id, quantity, sign):
+    """
+    Adds (sign=1) or removes (sign=-1) a ticket of an order to or from the counters
+    """
+    order = connection.execute(select([orders.c.event_id, orders.c.status, orders.c.amount])
+                               .where(orders.c.id == order_id)).first()
+    if order is None:
+        return
+    event_id, status, amount = order
+    _apply(connection, event_id, EVENT_TOTAL, status, ticket_count=sign * (quantity or 0))
+    _apply(connection, event_id, ticket_id, status, ticket_count=sign * (quantity or 0), order_count=sign,
+           amount=sign * (amount or 0))
+
+
+def _has_changes(state, keys):
+    return any(state.attrs[key].history.has_changes() for key in keys)
+
+
+# Load the previous values on change, so that they can be taken off the counters
+track_previous_values(Order.event_id, Order.status, Order.amount, OrderTicket.quantity)
+
+
+@event.listens_for(Order, 'after_insert')
+def receive_order_after_insert(mapper, connection, target):
+    _apply_order(connection, target.id, target.event_id, target.status, target.amount, 1)
+
+
+@event.listens_for(Order, 'after_update')
+def receive_order_after_update(mapper, connection, target):
+    state = inspect(target)
+    if not _has_changes(state, ('event_id', 'status', 'amount')):
+        return
+    _apply_order(connection, target.id, previous_value(state, 'event_id'), previous_value(state, 'status'),
+                 previous_value(state, 'amount'), -1)
+    _apply_order(connection, target.id, target.event_id, target.status, target.amount, 1)
+
+
+@event.listens_for(Order, 'before_delete')
+def receive_order_before_delete(mapper, connection, target):
+    _apply_order(connection, target.id, target.event_id, target.status, target.amount, -1)
+
+
+@event.listens_for(OrderTicket, 'after_insert')
+def receive_order_ticket_after_insert(mapper, connection, target):
+    _apply_order_ticket(connection, target.order_id, target.ticket_id, target.quantity, 1)
+
+
+@event.listens_for(OrderTicket, 'after_update')
+def receive_order_ticket_after_update(mapper, connection, target):
+    state = inspect(target)
+    if not _has_changes(state, ('order_id', 'ticket_id', 'quantity')):
+        return
+    _apply_order_ticket(connection, previous_value(state, 'order_id'), previous_value(state, 'ticket_id'),
+                        previous_value(state, 'quantity'), -1)
+    _apply_order_ticket(connection, target.order_id, target.ticket_id, target.quantity, 1)
+
+
+@event.listens_for(OrderTicket, 'after_delete')
+def receive_order_ticket_after_delete(mapper, connection, target):
+    _apply_order_ticket(connection, target.order_id, target.ticket_id, target.quantity, -1)
+
+
+def _totals(order_filter):
+    """
+    Selects of the (event_id, ticket_id, status, ticket_count, order_count, amount) counters
+    of the orders matching the filter, for the event totals and for the tickets
+    """
+    status = func.coalesce(orders.c.status, '')
+    quantities = select([orders_tickets.c.order_id, func.sum(orders_tickets.c.quantity).label('quantity')]) \
+        .select_from(orders_tickets.join(orders, orders.c.id == orders_tickets.c.order_id)) \
+        .where(order_filter) \
+        .group_by(orders_tickets.c.order_id).alias('quantities')
+    event_totals = select([orders.c.event_id, literal_column(str(EVENT_TOTAL)), status,
+                           func.coalesce(func.sum(quantities.c.quantity), 0), func.count(orders.c.id),
+                           func.coalesce(func.sum(orders.c.amount), 0)]) \
+        .select_from(orders.outerjoin(quantities, quantities.c.order_id == orders.c.id)) \
+        .where(order_filter) \
+        .group_by(orders.c.event_id, status)
+    ticket_totals = select([orders.c.event_id, orders_tickets.c.ticket_id, status,
+                            func.coalesce(func.sum(orders_tickets.c.quantity), 0), func.count(orders.c.id),
+                            func.coalesce(func.sum(orders.c.amount), 0)]) \
+        .select_from(orders_tickets.join(orders, orders.c.id == orders_tickets.c.order_id)) \
+        .where(order_filter) \
+        .group_by(orders.c.event_id, orders_tickets.c.ticket_id, status)
+    return event_totals, ticket_totals
+
+
+def apply_status_change(connection, order_ids, status):
+    """
+    Moves orders to a new status in the counters, for status updates which bypass the ORM.
+    Has to be called before the orders are updated
+    :param connection: connection of the transaction updating the orders
+    :param order_ids: ids of the orders
+    :param status: the new status
+    :return:
+    """
+    for totals in _totals(orders.c.id.in_(order_ids)):
+        for event_id, ticket_id, previous_status, ticket_count, order_count, amount in connection.execute(totals):
+            _apply(connection, event_id, ticket_id, previous_status, -ticket_count, -order_count, -amount)
+            _apply(connection, event_id, ticket_id, status, ticket_count, order_count, amount)
+
+
+def rebuild_order_rollups(event_id=None):
+    """
+    Recomputes the order rollups from the orders, for one event or for all of them
+    :param event_id: id of the event to rebuild, or None to rebuild everything
+    :return:
+    """
+    event_filter = orders.c.event_id.isnot(None) if event_id is None else orders.c.event_id == event_id
+    event_totals, ticket_totals = _totals(event_filter)
+
+    columns = ['event_id', 'ticket_id', 'status', 'ticket_count', 'order_count', 'amount']
+    delete = rollups.delete()
+    if event_id is not None:
+        delete = delete.where(rollups.c.event_id == event_id)
+    db.session.execute(delete)
+    db.session.execute(rollups.insert().from_select(columns, event_totals))
+    db.session.execute(rollups.insert().from_select(columns, ticket_totals))
+    db.session.commit()
+
+
+def get_event_rollup_statistics(event_ids):
+    """
+    Reads the order statistics of the given events from the rollups
+    :param event_ids: ids of the events
+    :return: dictionary of event id to the tickets, orders and sales of the event, each grouped by status
+    """
+    rows = db.session.query(OrderRollup.event_id, OrderRollup.status, OrderRollup.ticket_count,
+                            OrderRollup.order_count, OrderRollup.amount) \
+        .filter(OrderRollup.event_id.in_(event_ids), OrderRollup.ticket_id == EVENT_TOTAL)
+    return pivot_statistics(rows, event_ids)
+
+
+def get_ticket_rollup_statistics(ticket_ids):
+    """
+    Reads the order statistics of the given tickets from the rollups
+    :param ticket_ids: ids of the tickets
+    :return: dictionary of ticket id to the tickets, orders and sales of the ticket, each grouped by status
+    """
+    rows = db.session.query(OrderRollup.ticket_id, OrderRollup.status, OrderRollup.ticket_count,
+                            OrderRollup.order_count, OrderRollup.amount) \
+        .filter(OrderRollup.ticket_id.in_(ticket_ids))
+    return pivot_statistics(rows, ticket_ids)
@@ -0,0 +1,70 @@
+"""
+This module contains the order statistics calculations shared by the statistics endpoints.
+Each calculation computes the ticket, order and sales buckets of all the statuses in a single
+GROUP BY pass, and can do so for several events or tickets at once.
+"""
+from sqlalchemy import func
+
+from app.models import db
+from app.models.order import Order, OrderTicket
+
+ORDER_STATUSES = ['draft', 'cancelled', 'pending', 'expired', 'placed', 'completed']
+
+
+def empty_statistics():
+    """
+    Returns the statistics of an event or ticket without any orders
+    """
+    buckets = ['total'] + ORDER_STATUSES
+    return {
+        'tickets': dict.fromkeys(buckets, 0),
+        'orders': dict.fromkeys(buckets, 0),
+        'sales': dict.fromkeys(buckets, 0),
+    }
+
+
+def pivot_statistics(rows, ids):
+    """
+    Pivots (id, status, tickets, orders, sales) rows into the statistics of every id
+    """
+    statistics = {id_: empty_statistics() for id_ in ids}
+    for id_, status, tickets, orders, sales in rows:
+        for key, value in (('tickets', tickets), ('orders', orders), ('sales', sales)):
+            buckets = statistics[id_][key]
+            buckets['total'] += value or 0
+            if status in buckets:
+                buckets[status] += value or 0
+    return statistics
+
+
+def get_event_order_statistics(event_ids):
+    """
+    Computes the order statistics of the given events
+    :param event_ids: ids of the events
+    :return: dictionary of event id to the tickets, orders and sales of the event, each grouped by status
+    """
+    quantities = db.session.query(OrderTicket.order_id.label('order_id'),
+                                  func.sum(OrderTicket.quantity).label('quantity')) \
+        .join(Order, Order.id == OrderTicket.order_id) \
+        .filter(Order.event_id.in_(event_ids)) \
+        .group_by(OrderTicket.order_id).subquery()
+    rows = db.session.query(Order.event_id, Order.status, func.sum(quantities.c.quantity), func.count(Order.id),
+                            func.sum(Order.amount)) \
+        .outerjoin(quantities, quantities.c.order_id == Order.id) \
+        .filter(Order.event_id.in_(event_ids)) \
+        .group_by(Order.event_id, Order.status)
+    return pivot_statistics(rows, event_ids)
+
+
+def get_ticket_order_statistics(ticket_ids):
+    """
+    Computes the order statistics of the given tickets
+    :param ticket_ids: ids of the tickets
+    :return: dictionary of ticket id to the tickets, orders and sales of the ticket, each grouped by status
+    """
+    rows = db.session.query(OrderTicket.ticket_id, Order.status, func.sum(OrderTicket.quantity),
+                            func.count(Order.id), func.sum(Order.amount)) \
+        .join(Order, Order.id == OrderTicket.order_id) \
+        .filter(OrderTicket.ticket_id.in_(ticket_ids)) \
+        .group_by(OrderTicket.ticket_id, Order.status)
+    return pivot_statistics(rows, ticket_ids)
@@ -0,0 +1,148 @@
+"""
+Transactional outbox
+
+The mails and notifications of a completed order are not sent by the request completing it. An outbox message
+is inserted instead, from a mapper event on Order, in the same transaction as the status change, and the
+dispatcher delivers the messages in batches from a background job. A batch is claimed for
+OUTBOX_CLAIM_TIMEOUT seconds and a message is marked as sent only once its handler has run, so a message whose
+dispatcher dies or fails is delivered again: delivery is at least once, up to OUTBOX_MAX_ATTEMPTS attempts.
+"""
+import logging
+from datetime import datetime, timedelta, timezone
+
+from flask import current_app as app
+from sqlalchemy import event, inspect, or_, select
+
+from app.api.helpers.files import make_frontend_url
+from app.api.helpers.mail import send_email_to_attendees
+from app.api.helpers.notification import send_notif_to_attendees, send_notif_ticket_purchase_organizer
+from app.models import db
+from app.models.order import Order
+from app.models.outbox_message import OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+TICKET_PURCHASE_ATTENDEES = 'ticket_purchase_attendees'
+TICKET_PURCHASE_ORGANIZERS = 'ticket_purchase_organizers'
+
+# The attendee mails link to the PDF tickets, they wait for them to be uploaded for at most this long
+TICKETS_PDF_TIMEOUT = timedelta(minutes=10)
+
+outbox = OutboxMessage.__table__
+
+
+def enqueue(connection, action, payload):
+    """
+    Adds a message to the outbox, in the transaction of the given connection
+    :param connection: connection of the transaction causing the message.
+    :param action: the action of the message, one of HANDLERS.
+    :param payload: json serializable arguments of the handler.
+    :return:
+    """
+    connection.execute(outbox.insert().values(action=action, payload=payload, attempts=0,
+                                              created_at=datetime.now(timezone.utc)))
+
+
+def _is_completed(target):
+    history = inspect(target).attrs.status.history
+    return target.status == 'completed' and history.has_changes() and 'completed' not in history.deleted
+
+
+@event.listens_for(Order, 'before_insert')
+@event.listens_for(Order, 'before_update')
+def receive_order_before_flush(mapper, connection, target):
+    # The PDF tickets are requested right after the completion, mark them pending in the same transaction
+    # so that the attendee mails wait for them
+    if _is_completed(target):
+        target.tickets_pdf_status = 'pending'
+
+
+@event.listens_for(Order, 'after_insert')
+@event.listens_for(Order, 'after_update')
+def receive_order_after_flush(mapper, connection, target):
+    if _is_completed(target):
+        enqueue(connection, TICKET_PURCHASE_ATTENDEES, {'order_id': target.id})
+        enqueue(connection, TICKET_PURCHASE_ORGANIZERS, {'order_id': target.id})
+
+
+def send_ticket_purchase_attendees(payload, created_at):
+    order = db.session.query(Order).get(payload['order_id'])
+    if order is None:
+        return True
+    if order.tickets_pdf_status == 'pending' and created_at + TICKETS_PDF_TIMEOUT > datetime.now(timezone.utc):
+        return False
+    send_email_to_attendees(order, order.user_id)
+    send_notif_to_attendees(order, order.user_id)
+    return True
+
+
+def send_ticket_purchase_organizers(payload, created_at):
+    order = db.session.query(Order).get(payload['order_id'])
+    if order is None:
+        return True
+    order_url = make_frontend_url(path='/orders/{identifier}'.format(identifier=order.identifier))
+    send_notif_ticket_purchase_organizer(order.event.organizers, order.invoice_number, order_url, order.event.name,
+                                         order.id)
+    return True
+
+
+# Handlers return False when the message can not be delivered yet, it is retried at the next dispatch then
+HANDLERS = {
+    TICKET_PURCHASE_ATTENDEES: send_ticket_purchase_attendees,
+    TICKET_PURCHASE_ORGANIZERS: send_ticket_purchase_organizers,
+}
+
+
+def _claim(batch_size):
+    now = datetime.now(timezone.utc)
+    claimable = select([outbox.c.id]) \
+        .where(outbox.c.sent_at.is_(None)) \
+        .where(or_(outbox.c.claimed_until.is_(None), outbox.c.claimed_until < now)) \
+        .where(outbox.c.attempts < app.config['OUTBOX_MAX_ATTEMPTS']) \
+        .order_by(outbox.c.id) \
+        .limit(batch_size) \
+        .with_for_update(skip_locked=True)
+    claimed_until = now + timedelta(seconds=app.config['OUTBOX_CLAIM_TIMEOUT'])
+    messages = db.session.execute(outbox.update()
+                                  .where(outbox.c.id.in_(claimable))
+                                  .values(claimed_until=claimed_until)
+                                  .returning(outbox.c.id, outbox.c.action, outbox.c.payload,
+                                             outbox.c.created_at)).fetchall()
+    db.session.commit()
+    return messages
+
+
+def _deliver(message):
+    try:
+        delivered = HANDLERS[message.action](message.payload, message.created_at)
+    except Exception as e:
+        db.session.rollback()
+        logger.exception('Could not deliver outbox message %s', message.id)
+        # retried once the claim expires
+        values = {'attempts': outbox.c.attempts + 1, 'last_error': str(e)}
+    else:
+        if delivered:
+            values = {'sent_at': datetime.now(timezone.utc)}
+        else:
+            retry_at = datetime.now(timezone.utc) + timedelta(seconds=app.config['OUTBOX_DISPATCH_INTERVAL'])
+            values = {'claimed_until': retry_at}
+    db.session.execute(outbox.update().where(outbox.c.id == message.id).values(values))
+    db.session.commit()
+    return 'sent_at' in values
+
+
+def dispatch_outbox(batch_size=None):
+    """
+    Delivers the pending outbox messages, in batches
+    :param batch_size: number of messages claimed at once.
+    :return: number of delivered messages.
+    """
+    batch_size = batch_size or app.config['OUTBOX_BATCH_SIZE']
+    delivered_count = 0
+    while True:
+        messages = _claim(batch_size)
+        for message in messages:
+            if _deliver(message):
+                delivered_count += 1
+        if len(messages) < batch_size:
+            return delivered_count
@@ -1,8 +1,12 @@
 import json
+import time
+import uuid
+from types import SimpleNamespace
 
 import paypalrestsdk
 import requests
 import stripe
+from flask import current_app
 from forex_python.converter import CurrencyRates
 
 from app.api.helpers.cache import cache
@@ -21,6 +25,33 @@ def forex(from_currency, to_currency, amount):
         return amount
 
 
+class StubPaymentGateway(object):
+    """
+    Local stand-in for Stripe and PayPal, enabled with PAYMENT_GATEWAY_STUB, so that the checkout can be
+    load tested without network access. Every payment succeeds after PAYMENT_GATEWAY_STUB_LATENCY
+    milliseconds, except the ones whose stripe token or paypal payment id starts with 'fail'.
+    """
+
+    @staticmethod
+    def _wait():
+        time.sleep(current_app.config['PAYMENT_GATEWAY_STUB_LATENCY'] / 1000.0)
+
+    @staticmethod
+    def capture_stripe_payment(order_invoice):
+        StubPaymentGateway._wait()
+        declined = (order_invoice.stripe_token or '').lower().startswith('fail')
+        source = SimpleNamespace(object='card', brand='Visa', exp_month=12, exp_year=2030, last4='4242')
+        return SimpleNamespace(id='ch_stub_' + uuid.uuid4().hex, paid=not declined, source=source,
+                               failure_message='Your card was declined.' if declined else None)
+
+    @staticmethod
+    def execute_paypal_payment(paypal_payment_id):
+        StubPaymentGateway._wait()
+        if (paypal_payment_id or '').lower().startswith('fail'):
+            return False, 'Payment declined'
+        return True, 'Successfully Executed'
+
+
 class StripePaymentsManager(object):
     """
     Class to manage payments through Stripe.
@@ -88,6 +119,9 @@ class StripePaymentsManager(object):
         :param credentials: Stripe credentials.
         :return: charge/None depending on success/failure.
         """
+        if current_app.config['PAYMENT_GATEWAY_STUB']:
+            return StubPaymentGateway.capture_stripe_payment(order_invoice)
+
         if not credentials:
             credentials = StripePaymentsManager.get_credentials(order_invoice.event)
 
@@ -201,6 +235,9 @@ class PayPalPaymentsManager(object):
         :return: Result of the transaction.
         """
 
+        if current_app.config['PAYMENT_GATEWAY_STUB']:
+            return StubPaymentGateway.execute_paypal_payment(paypal_payment_id)
+
         payment = paypalrestsdk.Payment.find(paypal_payment_id)
 
         if payment.execute({"payer_id": paypal_payer_id}):
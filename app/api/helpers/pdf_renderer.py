@@ -0,0 +1,95 @@
+"""
+Long lived PDF renderer
+
+xhtml2pdf and reportlab load their modules, fonts, font metrics and images lazily and keep them for the life
+of the process, and the jinja environment of the app compiles every template once. The renderer is a per
+process singleton which is warmed up once, when a celery worker process starts, so that the first documents
+of a worker do not pay for the loading. Documents are rendered into memory buffers, without a temporary file,
+and the local files they link to (e.g. the ticket background) are resolved once per process.
+"""
+import io
+import logging
+import os
+import tempfile
+import threading
+import time
+
+from flask import current_app as app, render_template
+from xhtml2pdf import pisa
+
+logger = logging.getLogger(__name__)
+
+_renderer = None
+
+
+class PDFRenderer(object):
+    """
+    Renders html into PDF bytes, keeping what can be reused between documents
+    """
+
+    def __init__(self, base_dir):
+        self.base_dir = base_dir
+        self._paths = {}
+        self._lock = threading.Lock()
+
+    def _link_callback(self, uri, rel):
+        # only the static files are resolved once, the other URIs, e.g. the data URIs of the QR codes, are unique
+        if not uri.startswith('/static/'):
+            return uri
+        path = self._paths.get(uri)
+        if path is None:
+            path = self.base_dir + uri if os.path.isfile(self.base_dir + uri) else uri
+            with self._lock:
+                self._paths[uri] = path
+        return path
+
+    def render(self, html):
+        """
+        Renders a document
+        :param html: the rendered template of the document.
+        :return: the PDF, as bytes.
+        """
+        pdf = io.BytesIO()
+        status = pisa.CreatePDF(io.BytesIO(html.encode('utf-8')), pdf, link_callback=self._link_callback)
+        if status.err:
+            logger.error('%s errors while rendering a PDF', status.err)
+        return pdf.getvalue()
+
+    def warm_up(self):
+        """
+        Renders a throw away document with the PDF stylesheet, loading the fonts and compiling the template
+        """
+        self.render(render_template('pdf/attendees_pdf.html', holders=[]))
+
+
+def get_pdf_renderer():
+    global _renderer
+    if _renderer is None:
+        _renderer = PDFRenderer(app.config['BASE_DIR'])
+    return _renderer
+
+
+def benchmark_pdf_renderer(count=20):
+    """
+    Compares the PDFs per second of a fresh render written to a temporary file and read back, as documents
+    were rendered before the renderer, with the ones of the warmed up renderer
+    :param count: number of documents rendered each way.
+    :return: (PDFs per second before, PDFs per second with the renderer)
+    """
+    html = render_template('pdf/attendees_pdf.html', holders=[])
+
+    started_at = time.perf_counter()
+    for _ in range(count):
+        with tempfile.NamedTemporaryFile(suffix='.pdf') as file:
+            pisa.CreatePDF(io.BytesIO(html.encode('utf-8')), file)
+            file.seek(0)
+            file.read()
+    before = count / (time.perf_counter() - started_at)
+
+    renderer = get_pdf_renderer()
+    renderer.warm_up()
+    started_at = time.perf_counter()
+    for _ in range(count):
+        renderer.render(html)
+    after = count / (time.perf_counter() - started_at)
+    return before, after
@@ -3,11 +3,13 @@ from flask_jwt import _jwt_required, current_identity
 from sqlalchemy.orm.exc import NoResultFound
 from flask import request
 
-from app.api.helpers.errors import ForbiddenError, NotFoundError
+from app.api.helpers.admission import ADMISSION_TOKEN_HEADER, has_admission
+from app.api.helpers.errors import ForbiddenError, NotFoundError, TooManyRequestsError
 from app.api.helpers.permissions import jwt_required
-from app.models.session import Session
-from app.models.event import Event
+from app.models import db
 from app.models.order import Order
+from app.models.session import Session
+from app.api.helpers.identifiers import resolve_event, resolve_order
 from app.api.helpers.jwt import get_identity
 
 
@@ -259,6 +261,31 @@ def user_event(view, view_args, view_kwargs, *args, **kwargs):
     return view(*view_args, **view_kwargs)
 
 
+@jwt_required
+def is_admitted(view, view_args, view_kwargs, *args, **kwargs):
+    """
+    Permission function for the checkout of events with a waiting room, see app.api.helpers.admission.
+    The event is the one of the order in the url, or else the event relationship of the posted resource.
+    Co-organizers do not wait.
+    :return:
+    """
+    if 'order_identifier' in view_kwargs:
+        event_id = db.session.query(Order.event_id).filter(Order.id == view_kwargs['id']).scalar()
+    else:
+        try:
+            event_id = int(request.get_json()['data']['relationships']['event']['data']['id'])
+        except (TypeError, KeyError, ValueError):
+            # the missing relationship is reported by the resource
+            return view(*view_args, **view_kwargs)
+
+    if event_id is None or has_admission(event_id, current_identity.id, request.headers.get(ADMISSION_TOKEN_HEADER)) \
+            or has_access('is_coorganizer', event_id=event_id):
+        return view(*view_args, **view_kwargs)
+
+    return TooManyRequestsError({'source': ''},
+                                'Admission through the waiting room of the event is required').respond()
+
+
 def accessible_role_based_events(view, view_args, view_kwargs, *args, **kwargs):
     if 'POST' in request.method or 'withRole' in request.args:
         _jwt_required(app.config['JWT_DEFAULT_REALM'])
@@ -304,7 +331,8 @@ permissions = {
     'is_user_itself': is_user_itself,
     'is_coorganizer_endpoint_related_to_event': is_coorganizer_endpoint_related_to_event,
     'is_registrar_or_user_itself': is_registrar_or_user_itself,
-    'is_coorganizer_but_not_admin': is_coorganizer_but_not_admin
+    'is_coorganizer_but_not_admin': is_coorganizer_but_not_admin,
+    'is_admitted': is_admitted
 }
 
 
@@ -351,25 +379,22 @@ def permission_manager(view, view_args, view_kwargs, *args, **kwargs):
 
     # For Orders API
     if 'order_identifier' in view_kwargs:
-        try:
-            order = Order.query.filter_by(identifier=view_kwargs['order_identifier']).one()
-        except NoResultFound:
+        order = resolve_order(view_kwargs['order_identifier'])
+        if order is None:
             return NotFoundError({'parameter': 'order_identifier'}, 'Order not found').respond()
         view_kwargs['id'] = order.id
 
     # If event_identifier in route instead of event_id
     if 'event_identifier' in view_kwargs:
-        try:
-            event = Event.query.filter_by(identifier=view_kwargs['event_identifier']).one()
-        except NoResultFound:
+        event = resolve_event(view_kwargs['event_identifier'])
+        if event is None:
             return NotFoundError({'parameter': 'event_identifier'}, 'Event not found').respond()
         view_kwargs['event_id'] = event.id
 
     # Only for events API
     if 'identifier' in view_kwargs:
-        try:
-            event = Event.query.filter_by(identifier=view_kwargs['identifier']).one()
-        except NoResultFound:
+        event = resolve_event(view_kwargs['identifier'])
+        if event is None:
             return NotFoundError({'parameter': 'identifier'}, 'Event not found').respond()
         view_kwargs['id'] = event.id
 
@@ -0,0 +1,101 @@
+import threading
+import time
+
+from flask import current_app as app
+from sqlalchemy import event
+
+from app.api.helpers.role_matrix import get_role_id, get_role_matrix
+from app.models import db
+from app.models.permission import Permission
+from app.models.service import Service
+
+CREATE = 1
+READ = 2
+UPDATE = 4
+DELETE = 8
+
+OPERATIONS = {
+    'create': CREATE,
+    'read': READ,
+    'update': UPDATE,
+    'delete': DELETE,
+}
+
+
+class PermissionTable(object):
+    """
+    Compiled role x service permissions.
+    (role_id, service_id) -> bitmask of the allowed CRUD operations, built from `Permission` and `Service`
+    with two queries and rebuilt when a permission or service changes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._masks = None
+        self._service_ids = None
+        self._loaded_at = None
+
+    def _is_stale(self, loaded_at):
+        max_age = app.config['PERMISSION_TABLE_MAX_AGE']
+        return bool(max_age) and time.monotonic() - loaded_at > max_age
+
+    def load(self):
+        service_ids = dict(db.session.query(Service.name, Service.id).all())
+        masks = {}
+        for role_id, service_id, can_create, can_read, can_update, can_delete in db.session.query(
+                Permission.role_id, Permission.service_id, Permission.can_create, Permission.can_read,
+                Permission.can_update, Permission.can_delete):
+            masks[(role_id, service_id)] = (CREATE if can_create else 0) | (READ if can_read else 0) | \
+                (UPDATE if can_update else 0) | (DELETE if can_delete else 0)
+        with self._lock:
+            self._service_ids = service_ids
+            self._masks = masks
+            self._loaded_at = time.monotonic()
+        return masks, service_ids
+
+    def clear(self):
+        with self._lock:
+            self._masks = None
+            self._service_ids = None
+
+    def get_mask(self, role_id, service_name):
+        with self._lock:
+            masks, service_ids, loaded_at = self._masks, self._service_ids, self._loaded_at
+        if masks is None or self._is_stale(loaded_at):
+            masks, service_ids = self.load()
+        return masks.get((role_id, service_ids.get(service_name)), 0)
+
+
+permission_table = PermissionTable()
+
+
+def has_perm(user, event_id, service_name, operation):
+    """
+    Checks if the user has a role at the event which allows the operation on the service
+    :param user: the user
+    :param event_id: id of the event
+    :param service_name: name of the service, e.g. 'session'
+    :param operation: one of 'create', 'read', 'update', 'delete'
+    :return: bool
+    """
+    if operation not in OPERATIONS:
+        raise ValueError('No such operation defined')
+
+    bit = OPERATIONS[operation]
+    for uer_event_id, role_name in get_role_matrix(user.id):
+        if uer_event_id == int(event_id) and permission_table.get_mask(get_role_id(role_name), service_name) & bit:
+            return True
+    return False
+
+
+@event.listens_for(Permission, 'after_insert')
+@event.listens_for(Permission, 'after_update')
+@event.listens_for(Permission, 'after_delete')
+@event.listens_for(Service, 'after_insert')
+@event.listens_for(Service, 'after_update')
+@event.listens_for(Service, 'after_delete')
+def receive_permission_change(mapper, connection, target):
+    """
+    listen for changes of permissions and services and rebuild the table on next use
+    """
+    permission_table.clear()
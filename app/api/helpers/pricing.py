@@ -0,0 +1,143 @@
+"""
+Price quotes
+
+The price of a set of tickets is computed without touching any order: the tickets, their event currency,
+the service fee of the currency and whether the discount code applies to them are loaded with one query,
+and the discount code itself with a second one. The quotes of the API check the discount code as a new
+order does, with one more query for its usage. Quotes are cached per (tickets, quantities, discount code,
+currency) for ORDER_QUOTE_CACHE_TTL seconds, changes to prices, fees or codes show up once they expire.
+"""
+from collections import OrderedDict
+
+from flask import current_app as app
+from flask_rest_jsonapi.exceptions import ObjectNotFound
+from sqlalchemy import and_, exists, literal, select
+
+from app.api.helpers.cache import LRUCache
+from app.api.helpers.discount_usage import is_discount_quantity_valid, validate_discount_code
+from app.api.helpers.exceptions import UnprocessableEntity
+from app.models import db
+from app.models.discount_code import DiscountCode
+from app.models.event import Event
+from app.models.ticket import Ticket, discount_codes_tickets
+from app.models.ticket_fee import TicketFees
+
+_quote_cache = None
+
+
+def _get_quote_cache():
+    global _quote_cache
+    if _quote_cache is None:
+        _quote_cache = LRUCache(max_size=app.config['ORDER_QUOTE_CACHE_SIZE'], ttl=app.config['ORDER_QUOTE_CACHE_TTL'])
+    return _quote_cache
+
+
+def _fee_column(column, currency_column):
+    # The first fee row of the currency, as the fees were looked up before
+    return select([column]).where(TicketFees.currency == currency_column) \
+        .order_by(TicketFees.id).limit(1).as_scalar()
+
+
+def _load_tickets(ticket_ids, discount_code_id, currency):
+    currency_column = literal(currency) if currency else Event.payment_currency
+    if discount_code_id is None:
+        is_discounted = literal(False)
+    else:
+        is_discounted = exists().where(and_(discount_codes_tickets.c.discount_code_id == discount_code_id,
+                                            discount_codes_tickets.c.ticket_id == Ticket.id))
+    return db.session.query(Ticket.id, Ticket.event_id, Ticket.price, Ticket.is_fee_absorbed, Event.payment_currency,
+                            _fee_column(TicketFees.service_fee, currency_column).label('service_fee'),
+                            _fee_column(TicketFees.maximum_fee, currency_column).label('maximum_fee'),
+                            is_discounted.label('is_discounted')) \
+        .join(Event, Event.id == Ticket.event_id) \
+        .filter(Ticket.id.in_(ticket_ids), Ticket.deleted_at.is_(None)).all()
+
+
+def _line_item(ticket, quantity, discount):
+    sub_total = (ticket.price or 0) * quantity
+    fee = 0
+    if not ticket.is_fee_absorbed and ticket.service_fee is not None:
+        fee = ticket.service_fee * sub_total / 100
+        if ticket.maximum_fee is not None:
+            fee = min(fee, ticket.maximum_fee)
+    amount = sub_total + fee
+    line_discount = 0
+    if discount is not None and ticket.is_discounted:
+        if discount.type == 'amount':
+            line_discount = min(discount.value * quantity, amount)
+        else:
+            line_discount = discount.value * amount / 100
+    return {
+        'ticket_id': ticket.id,
+        'quantity': quantity,
+        'price': ticket.price or 0,
+        'sub_total': sub_total,
+        'fee': fee,
+        'discount': line_discount,
+        'amount': amount - line_discount,
+    }
+
+
+def calculate_quote(ticket_quantities, discount_code_id=None, currency=None, validate_discount=False):
+    """
+    Prices tickets, with the service fee of the currency and the discount code, in at most two queries
+    :param ticket_quantities: list of (ticket id, quantity) pairs, repeated tickets are added up
+    :param discount_code_id: id of the discount code to apply, if any
+    :param currency: currency of the service fee, defaults to the payment currency of the event of the tickets
+    :param validate_discount: check the discount code as a new order does, raising UnprocessableEntity
+    :return: dictionary of the line items of the tickets and of the sub total, fee, discount and amount
+    """
+    quantities = OrderedDict()
+    for ticket_id, quantity in ticket_quantities:
+        quantities[int(ticket_id)] = quantities.get(int(ticket_id), 0) + quantity
+
+    tickets = {ticket.id: ticket for ticket in _load_tickets(list(quantities), discount_code_id, currency)}
+    for ticket_id in quantities:
+        if ticket_id not in tickets:
+            raise ObjectNotFound({'parameter': 'tickets'}, "Ticket: {} not found".format(ticket_id))
+
+    discount = None
+    if discount_code_id is not None:
+        discount = DiscountCode.query.filter(DiscountCode.id == discount_code_id,
+                                             DiscountCode.deleted_at.is_(None)).first()
+        if discount is None:
+            raise ObjectNotFound({'parameter': 'discount_code'},
+                                 "Discount Code: {} not found".format(discount_code_id))
+        if validate_discount:
+            validate_discount_code(discount, {ticket.event_id for ticket in tickets.values()})
+            discounted = sum(quantity for ticket_id, quantity in quantities.items()
+                             if tickets[ticket_id].is_discounted)
+            if not is_discount_quantity_valid(discount, discounted):
+                raise UnprocessableEntity({'source': 'discount_code_id'}, 'Discount Usage Exceeded')
+
+    line_items = [_line_item(tickets[ticket_id], quantity, discount) for ticket_id, quantity in quantities.items()]
+    if not currency and tickets:
+        currency = next(iter(tickets.values())).payment_currency
+    return {
+        'currency': currency,
+        'tickets': line_items,
+        'sub_total': sum(item['sub_total'] for item in line_items),
+        'fee': sum(item['fee'] for item in line_items),
+        'discount': sum(item['discount'] for item in line_items),
+        'amount': max(sum(item['amount'] for item in line_items), 0),
+    }
+
+
+def get_quote(ticket_quantities, discount_code_id=None, currency=None):
+    """
+    Returns the quote of tickets, from the cache when enabled, with the discount code checked as a new order does
+    :param ticket_quantities: list of (ticket id, quantity) pairs
+    :param discount_code_id: id of the discount code to apply, if any
+    :param currency: currency of the service fee, defaults to the payment currency of the event of the tickets
+    :return: dictionary of the line items and the totals, see `calculate_quote`
+    """
+    if not app.config['ORDER_QUOTE_CACHE_TTL']:
+        return calculate_quote(ticket_quantities, discount_code_id, currency, validate_discount=True)
+    key = (tuple(sorted((int(ticket_id), quantity) for ticket_id, quantity in ticket_quantities)),
+           discount_code_id, currency)
+    quote_cache = _get_quote_cache()
+    quote = quote_cache.get(key)
+    if quote is None:
+        quote = calculate_quote(ticket_quantities, discount_code_id, currency, validate_discount=True)
+        quote_cache.set(key, quote)
+    return quote
@@ -2,11 +2,11 @@ from flask import request
 from flask_rest_jsonapi.exceptions import ObjectNotFound
 import datetime
 
-from app.api.helpers.db import safe_query
+from app.api.helpers.identifiers import resolve_event
 from app.models.event import Event
-from app.models.role import Role
 from app.models.users_events_role import UsersEventsRoles
 from app.api.helpers.permission_manager import has_access
+from app.api.helpers.role_matrix import get_role_id
 
 
 def event_query(self, query_, view_kwargs, event_id='event_id', event_identifier='event_identifier',
@@ -23,13 +23,18 @@ def event_query(self, query_, view_kwargs, event_id='event_id', event_identifier
     :return:
     """
     if view_kwargs.get(event_id):
-        event = safe_query(self, Event, 'id', view_kwargs[event_id], event_id)
+        event = resolve_event(view_kwargs[event_id], column='id')
+        if event is None:
+            raise ObjectNotFound({'parameter': event_id}, "Event: {} not found".format(view_kwargs[event_id]))
         if event.state != 'published' and (
                     'Authorization' not in request.headers or not has_access(permission, event_id=event.id)):
             raise ObjectNotFound({'parameter': event_id}, "Event: {} not found".format(view_kwargs[event_id]))
         query_ = query_.join(Event).filter(Event.id == event.id)
     elif view_kwargs.get(event_identifier):
-        event = safe_query(self, Event, 'identifier', view_kwargs[event_identifier], event_identifier)
+        event = resolve_event(view_kwargs[event_identifier])
+        if event is None:
+            raise ObjectNotFound({'parameter': event_identifier},
+                                 "Event: {} not found".format(view_kwargs[event_identifier]))
         if event.state != 'published' and (
                 'Authorization' not in request.headers or not has_access(permission, event_id=event.id)):
             raise ObjectNotFound({'parameter': event_identifier},
@@ -44,5 +49,4 @@ def get_upcoming_events():
 
 
 def get_user_event_roles_by_role_name(event_id, role_name):
-    role = Role.query.filter_by(name=role_name).first()
-    return UsersEventsRoles.query.filter_by(event_id=event_id).filter(UsersEventsRoles.role == role)
+    return UsersEventsRoles.query.filter_by(event_id=event_id, role_id=get_role_id(role_name))
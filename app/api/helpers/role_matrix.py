@@ -0,0 +1,103 @@
+from flask import g, has_app_context
+from sqlalchemy import event
+
+from app.models import db
+from app.models.role import Role
+from app.models.users_events_role import UsersEventsRoles
+
+# Per-process cache of Role id -> name. Roles are seeded once and almost never edited,
+# so this is only rebuilt when a Role row is inserted, updated or deleted. The dict is never
+# mutated, it is replaced as a whole, so that concurrent readers iterate a complete mapping.
+_role_names = {}
+
+
+def get_role_names():
+    """
+    Returns the cached mapping of role id to role name, loading it if required
+    :return: dict
+    """
+    global _role_names
+    role_names = _role_names
+    if not role_names:
+        role_names = dict(db.session.query(Role.id, Role.name).all())
+        _role_names = role_names
+    return role_names
+
+
+def get_role_id(role_name):
+    """
+    Returns the id of the role with the given name, or None if no such role exists
+    :param role_name: name of the role e.g. 'organizer'
+    :return:
+    """
+    for role_id, name in get_role_names().items():
+        if name == role_name:
+            return role_id
+    return None
+
+
+def clear_role_cache():
+    global _role_names
+    _role_names = {}
+
+
+def _fetch_role_matrix(user_id):
+    role_names = get_role_names()
+    rows = db.session.query(UsersEventsRoles.event_id, UsersEventsRoles.role_id) \
+        .filter(UsersEventsRoles.user_id == user_id).all()
+    return frozenset((event_id, role_names.get(role_id)) for event_id, role_id in rows)
+
+
+def get_role_matrix(user_id):
+    """
+    Returns all the (event_id, role_name) pairs of a user.
+    The pairs are fetched in a single query and memoized for the rest of the request.
+    :param user_id: id of the user
+    :return: frozenset of (event_id, role_name) tuples
+    """
+    if not has_app_context():
+        return _fetch_role_matrix(user_id)
+
+    matrices = g.setdefault('role_matrix', {})
+    if user_id not in matrices:
+        matrices[user_id] = _fetch_role_matrix(user_id)
+    return matrices[user_id]
+
+
+def has_event_role(user_id, role_name, event_id=None):
+    """
+    Checks if a user has a particular role, either at a given event or at any event
+    :param user_id: id of the user
+    :param role_name: name of the role e.g. 'organizer'
+    :param event_id: id of the event. If None, any event matches
+    :return: bool
+    """
+    if not event_id:
+        return any(name == role_name for _, name in get_role_matrix(user_id))
+    return (int(event_id), role_name) in get_role_matrix(user_id)
+
+
+def clear_role_matrix():
+    if has_app_context():
+        g.pop('role_matrix', None)
+
+
+@event.listens_for(Role, 'after_insert')
+@event.listens_for(Role, 'after_update')
+@event.listens_for(Role, 'after_delete')
+def receive_role_change(mapper, connection, target):
+    """
+    listen for changes to roles and drop the role cache
+    """
+    clear_role_cache()
+    clear_role_matrix()
+
+
+@event.listens_for(UsersEventsRoles, 'after_insert')
+@event.listens_for(UsersEventsRoles, 'after_update')
+@event.listens_for(UsersEventsRoles, 'after_delete')
+def receive_users_events_role_change(mapper, connection, target):
+    """
+    listen for role assignment changes so that checks later in the same request see them
+    """
+    clear_role_matrix()
@@ -1,14 +1,20 @@
 from app.models.event import Event
 from app.models.order import Order
 from app.models.event_invoice import EventInvoice
+from app.models.mail import AFTER_EVENT
 from app.models.ticket import Ticket
 from app.models.ticket_fee import get_fee
 from app.api.helpers.query import get_upcoming_events, get_user_event_roles_by_role_name
-from app.api.helpers.mail import send_email_after_event, send_email_for_monthly_fee_payment, \
+from app.api.helpers.mail import send_bulk_email, send_email_for_monthly_fee_payment, \
     send_followup_email_for_monthly_fee_payment
 from app.api.helpers.notification import send_notif_monthly_fee_payment, send_followup_notif_monthly_fee_payment, \
     send_notif_after_event
 from app.api.helpers.db import safe_query, save_to_db
+from app.api.helpers.admin_statistics import refresh_all_admin_statistics
+from app.api.helpers.last_access import flush_last_access
+from app.api.helpers.log import flush_activities
+from app.api.helpers.order import expire_pending_orders
+from app.api.helpers.outbox import dispatch_outbox
 from app.api.helpers.utilities import monthdelta
 from app.settings import get_settings
 from app.models import db
@@ -37,12 +43,10 @@ def send_after_event_mail():
             time_difference_minutes = (time_difference.days * 24 * 60) + \
                 (time_difference.seconds / 60)
             if current_time > event.ends_at and time_difference_minutes < 1440:
-                for speaker in speakers:
-                    send_email_after_event(speaker.user.email, event.name, upcoming_event_links)
-                    send_notif_after_event(speaker.user, event.name, event.id)
-                for organizer in organizers:
-                    send_email_after_event(organizer.user.email, event.name, upcoming_event_links)
-                    send_notif_after_event(organizer.user.email, event.name, event.id)
+                send_bulk_email([speaker.user for speaker in speakers] + [organizer.user for organizer in organizers],
+                                AFTER_EVENT, event_name=event.name, upcoming_events=upcoming_event_links)
+                send_notif_after_event([speaker.user for speaker in speakers] +
+                                       [organizer.user for organizer in organizers], event.name, event.id)
 
 
 def send_event_fee_notification():
@@ -128,3 +132,33 @@ def send_event_fee_notification_followup():
                                                         app_name,
                                                         link,
                                                         incomplete_invoice.event.id)
+
+
+def flush_users_last_access():
+    from app import current_app as app
+    with app.app_context():
+        flush_last_access()
+
+
+def flush_activity_log():
+    from app import current_app as app
+    with app.app_context():
+        flush_activities()
+
+
+def refresh_admin_statistics_snapshots():
+    from app import current_app as app
+    with app.app_context():
+        refresh_all_admin_statistics()
+
+
+def expire_orders():
+    from app import current_app as app
+    with app.app_context():
+        expire_pending_orders()
+
+
+def dispatch_outbox_messages():
+    from app import current_app as app
+    with app.app_context():
+        dispatch_outbox()
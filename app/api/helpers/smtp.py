@@ -0,0 +1,123 @@
+"""
+Pooled SMTP sessions
+
+Opening an SMTP session (connection, TLS handshake and AUTH) costs more than sending a mail through it. Each
+worker process keeps one started marrow Mailer per SMTP configuration and its transport pool reuses the
+authenticated sessions, for SMTP_PIPELINE mails each. A session dropped by the server, e.g. after being idle, is
+replaced by a new one and the mail sent again.
+"""
+import logging
+import threading
+import time
+
+from flask import current_app as app
+from marrow.mailer import Mailer, Message
+
+from app.api.helpers.utilities import strip_tags
+
+logger = logging.getLogger(__name__)
+
+_mailers = {}
+_lock = threading.Lock()
+
+
+def _mailer_key(config):
+    return config['host'], config['port'], config['username'], config['password'], config['encryption']
+
+
+def get_mailer(config):
+    """
+    Returns the started mailer of an SMTP configuration, shared by the tasks of the worker process
+    :param config: dictionary of the host, port, username, password and encryption of the SMTP server
+    :return: marrow Mailer
+    """
+    key = _mailer_key(config)
+    mailer = _mailers.get(key)
+    if mailer is None:
+        with _lock:
+            mailer = _mailers.get(key)
+            if mailer is None:
+                mailer = Mailer({
+                    'transport': {
+                        'use': 'smtp',
+                        'host': config['host'],
+                        'username': config['username'],
+                        'password': config['password'],
+                        'tls': config['encryption'],
+                        'port': config['port'],
+                        'pipeline': app.config['SMTP_PIPELINE'],
+                    }
+                })
+                mailer.start()
+                _mailers[key] = mailer
+    return mailer
+
+
+def stop_mailers():
+    """
+    Closes the pooled SMTP sessions of the process
+    """
+    with _lock:
+        for mailer in _mailers.values():
+            try:
+                mailer.stop()
+            except Exception:
+                logger.exception('Could not close the SMTP sessions')
+        _mailers.clear()
+
+
+def make_message(payload):
+    message = Message(author=payload['from'], to=payload['to'])
+    message.subject = payload['subject']
+    message.plain = strip_tags(payload['html'])
+    message.rich = payload['html']
+    return message
+
+
+def send_mails(config, payloads):
+    """
+    Sends mails through the pooled sessions of an SMTP server, a mail which fails does not stop the others
+    :param config: the SMTP configuration, see `get_mailer`
+    :param payloads: list of the from, to, subject and html of the mails
+    :return: dictionary of the number of sent and failed mails and of the mails sent per second
+    """
+    mailer = get_mailer(config)
+    sent = failed = 0
+    started_at = time.perf_counter()
+    for payload in payloads:
+        try:
+            mailer.send(make_message(payload))
+            sent += 1
+        except Exception:
+            logger.exception('Could not send the mail to %s', payload['to'])
+            failed += 1
+    elapsed = time.perf_counter() - started_at
+    rate = sent / elapsed if elapsed else 0
+    logger.info('Sent %s mails (%s failed) through %s in %.2fs, %.1f mails/s',
+                sent, failed, config['host'], elapsed, rate)
+    return {'sent': sent, 'failed': failed, 'rate': rate}
+
+
+def benchmark_smtp(config, to, count=20):
+    """
+    Compares the mails per second of a new SMTP session per mail, as mails were sent before the pool, with the
+    ones of the pooled sessions
+    :param config: the SMTP configuration, see `get_mailer`
+    :param to: recipient of the test mails
+    :param count: number of mails sent each way
+    :return: (mails per second before, mails per second with the pool)
+    """
+    payloads = [{'from': to, 'to': to, 'subject': 'SMTP benchmark {}'.format(index),
+                 'html': '<p>SMTP benchmark</p>'} for index in range(count)]
+
+    started_at = time.perf_counter()
+    for payload in payloads:
+        mailer = Mailer({'transport': {'use': 'smtp', 'host': config['host'], 'username': config['username'],
+                                       'password': config['password'], 'tls': config['encryption'],
+                                       'port': config['port']}})
+        mailer.start()
+        mailer.send(make_message(payload))
+        mailer.stop()
+    before = count / (time.perf_counter() - started_at)
+
+    return before, send_mails(config, payloads)['rate']
@@ -118,9 +118,8 @@ class UploadedMemory(object):
         return self.data
 
     def save(self, path):
-        f = open(path, 'w')
-        f.write(str(self.data, 'utf-8'))
-        f.close()
+        with open(path, 'wb') as f:
+            f.write(self.data)
 
 
 #########
@@ -4,11 +4,10 @@ import os
 import requests
 import uuid
 
+from celery.signals import worker_process_init, worker_process_shutdown
 from flask import current_app, render_template
-from marrow.mailer import Mailer, Message
 
 from app import make_celery
-from app.api.helpers.utilities import strip_tags
 from app.models.session import Session
 from app.models.speaker import Speaker
 
@@ -21,8 +20,10 @@ import traceback
 
 from app.api.helpers.request_context_task import RequestContextTask
 from app.api.helpers.mail import send_export_mail, send_import_mail
-from app.api.helpers.notification import send_notif_after_import, send_notif_after_export
+from app.api.helpers.notification import send_notif_after_import, send_notif_after_export, \
+    create_notifications_for_user_ids
 from app.api.helpers.db import safe_query
+from app.api.helpers.exceptions import ConflictException
 from .import_helpers import update_import_job
 from app.models.user import User
 from app.models import db
@@ -38,10 +39,34 @@ from app.api.helpers.pentabarfxml import PentabarfExporter
 from app.api.helpers.storage import UploadedFile, upload, UPLOAD_PATHS
 from app.api.helpers.db import save_to_db
 from app.api.helpers.files import create_save_pdf
+from app.api.helpers.order import save_pdf_ticket
+from app.api.helpers.pdf_renderer import get_pdf_renderer
+from app.api.helpers.smtp import get_mailer, make_message, send_mails, stop_mailers
 
 celery = make_celery()
 
 
+@worker_process_init.connect
+def warm_up_pdf_renderer(**kwargs):
+    """
+    Loads the PDF fonts and templates of a worker process before its first task
+    """
+    from app import current_app as app
+    with app.app_context():
+        try:
+            get_pdf_renderer().warm_up()
+        except Exception:
+            logging.exception('Could not warm up the PDF renderer')
+
+
+@worker_process_shutdown.connect
+def close_smtp_sessions(**kwargs):
+    """
+    Closes the pooled SMTP sessions of a worker process when it exits
+    """
+    stop_mailers()
+
+
 @celery.task(name='send.email.post')
 def send_email_task(payload, headers):
     data = {"personalizations": [{"to": []}]}
@@ -57,27 +82,110 @@ def send_email_task(payload, headers):
     )
 
 
+@celery.task(name='send.email.post.batch')
+def send_emails_task(payload, headers):
+    """
+    Sends the same mail to many recipients with a single SendGrid request, a personalization per recipient
+    """
+    data = {"personalizations": [{"to": [{"email": to}]} for to in payload["to"]]}
+    data["from"] = {"email": payload["from"]}
+    data["subject"] = payload["subject"]
+    data["content"] = [{"type": "text/html", "value": payload["html"]}]
+    requests.post(
+        "https://api.sendgrid.com/v3/mail/send",
+        data=json.dumps(data),
+        headers=headers,
+        verify=False  # doesn't work with verification in celery context
+    )
+
+
 @celery.task(name='send.email.post.smtp')
 def send_mail_via_smtp_task(config, payload):
-    mailer_config = {
-        'transport': {
-            'use': 'smtp',
-            'host': config['host'],
-            'username': config['username'],
-            'password': config['password'],
-            'tls': config['encryption'],
-            'port': config['port']
-        }
-    }
-
-    mailer = Mailer(mailer_config)
-    mailer.start()
-    message = Message(author=payload['from'], to=payload['to'])
-    message.subject = payload['subject']
-    message.plain = strip_tags(payload['html'])
-    message.rich = payload['html']
-    mailer.send(message)
-    mailer.stop()
+    get_mailer(config).send(make_message(payload))
+
+
+@celery.task(name='send.email.post.smtp.batch')
+def send_mails_via_smtp_task(config, payloads):
+    """
+    Sends a batch of mails over the pooled SMTP session of the worker
+    :return: the number of sent and failed mails and the mails sent per second
+    """
+    return send_mails(config, payloads)
+
+
+@celery.task(name='send.notifications')
+def send_notifications_task(notifications):
+    create_notifications_for_user_ids(notifications)
+
+
+@celery.task(base=RequestContextTask, name='create.pdf.ticket.purchaser')
+def create_pdf_ticket_for_purchaser_task(order_id):
+    order = safe_query(db, Order, 'id', order_id, 'order_id')
+    order.tickets_pdf_url = save_pdf_ticket(render_template('pdf/ticket_purchaser.html', order=order))
+    save_to_db(order)
+    return order.tickets_pdf_url
+
+
+@celery.task(base=RequestContextTask, name='create.pdf.ticket.holder')
+def create_pdf_ticket_for_holder_task(order_id, holder_id):
+    order = safe_query(db, Order, 'id', order_id, 'order_id')
+    holder = safe_query(db, TicketHolder, 'id', holder_id, 'holder_id')
+    holder.pdf_url = save_pdf_ticket(render_template('pdf/ticket_attendee.html', order=order, holder=holder))
+    save_to_db(holder)
+    return holder.pdf_url
+
+
+@celery.task(name='create.pdf.tickets.finish')
+def finish_pdf_tickets_task(order_id):
+    """
+    Runs once all the tickets of an order are rendered: the holders who are the buyer share the purchaser PDF
+    """
+    order = safe_query(db, Order, 'id', order_id, 'order_id')
+    for holder in order.ticket_holders:
+        if holder.user and holder.user.id == order.user_id:
+            holder.pdf_url = order.tickets_pdf_url
+    order.tickets_pdf_status = 'completed'
+    save_to_db(order)
+
+
+@celery.task(name='create.pdf.tickets.failed')
+def fail_pdf_tickets_task(order_id):
+    order = safe_query(db, Order, 'id', order_id, 'order_id')
+    order.tickets_pdf_status = 'failed'
+    save_to_db(order)
+
+
+@celery.task(base=RequestContextTask, name='capture.order.payment')
+def capture_order_payment_task(order_id, paypal_payer_id=None):
+    """
+    Captures the payment of a placed order, which is then completed, or expired when the payment fails
+    """
+    from app.api.helpers.ticketing import TicketingManager, expire_failed_order
+
+    order = safe_query(db, Order, 'id', order_id, 'order_id')
+    # the order stays locked until it is completed or expired, a concurrent or retried task waits and then
+    # finds it captured already
+    db.session.refresh(order, lockmode='update')
+    if order.status != 'placed' or order.transaction_id:
+        # captured already, or cancelled meanwhile
+        db.session.commit()
+        return {'status': order.status == 'completed', 'message': 'Order is {}'.format(order.status)}
+    try:
+        if order.payment_mode == 'stripe':
+            status, message = TicketingManager.charge_stripe_order_payment(order, order.stripe_token)
+        else:
+            status, message = TicketingManager.charge_paypal_order_payment(order, paypal_payer_id,
+                                                                           order.paypal_token)
+    except ConflictException as e:
+        logging.exception('Could not capture the payment of order %s', order_id)
+        status, message = False, e.detail
+    except Exception:
+        # e.g. an unknown paypal payment id, the order must not stay placed, holding its tickets
+        logging.exception('Could not capture the payment of order %s', order_id)
+        db.session.rollback()
+        expire_failed_order(order)
+        status, message = False, 'Payment could not be captured'
+    return {'status': status, 'message': message}
 
 
 @celery.task(base=RequestContextTask, name='export.event', bind=True)
@@ -1,17 +1,28 @@
 from datetime import datetime
 
-from flask_jwt import current_identity as current_user
-
-from app.api.helpers.db import save_to_db, get_count
+from app.api.helpers.db import save_to_db
+from app.api.helpers.discount_usage import validate_discount_quantity
 from app.api.helpers.exceptions import ConflictException
-from app.api.helpers.files import make_frontend_url
-from app.api.helpers.mail import send_email_to_attendees
-from app.api.helpers.notification import send_notif_to_attendees, send_notif_ticket_purchase_organizer
 from app.api.helpers.order import delete_related_attendees_for_order, create_pdf_tickets_for_holder
 from app.api.helpers.payment import StripePaymentsManager, PayPalPaymentsManager
+from app.api.helpers.pricing import calculate_quote
 from app.models import db
-from app.models.ticket_fee import TicketFees
-from app.models.ticket_holder import TicketHolder
+
+
+def expire_failed_order(order):
+    """
+    Expires an order whose payment failed and unlocks its tickets. The order is read again under a row lock,
+    a concurrent capture may have completed it meanwhile and a completed order is never expired.
+    """
+    db.session.refresh(order, lockmode='update')
+    if order.status == 'completed' or order.transaction_id:
+        db.session.commit()
+        return
+    order.status = 'expired'
+    save_to_db(order)
+
+    # delete related attendees to unlock the tickets
+    delete_related_attendees_for_order(order)
 
 
 class TicketingManager(object):
@@ -23,59 +34,41 @@ class TicketingManager(object):
 
     @staticmethod
     def match_discount_quantity(discount_code, ticket_holders=None):
-        qty = 0
-        old_holders = get_count(TicketHolder.query.filter(TicketHolder.ticket_id.in_(discount_code.tickets.split(","))))
-
-        for holder in ticket_holders:
-            ticket_holder = TicketHolder.query.filter_by(id=holder).one()
-            if ticket_holder.ticket.id in discount_code.tickets.split(","):
-                qty += 1
-        if (qty + old_holders) <= discount_code.tickets_number and \
-            discount_code.min_quantity <= qty <= discount_code.max_quantity:
-            return True
-
-        return False
+        return validate_discount_quantity(discount_code, ticket_holders or [])
 
     @staticmethod
     def calculate_update_amount(order):
-        discount = None
-        if order.discount_code_id:
-            discount = order.discount_code
         # Access code part will be done ticket_holders API
-        amount = 0
-        total_discount = 0
-        fees = TicketFees.query.filter_by(currency=order.event.payment_currency).first()
-
-        for order_ticket in order.order_tickets:
-            with db.session.no_autoflush:
-                if order_ticket.ticket.is_fee_absorbed or not fees:
-                    ticket_amount = (order_ticket.ticket.price * order_ticket.quantity)
-                    amount += (order_ticket.ticket.price * order_ticket.quantity)
-                else:
-                    order_fee = fees.service_fee * (order_ticket.ticket.price * order_ticket.quantity) / 100
-                    if order_fee > fees.maximum_fee:
-                        ticket_amount = (order_ticket.ticket.price * order_ticket.quantity) + fees.maximum_fee
-                        amount += (order_ticket.ticket.price * order_ticket.quantity) + fees.maximum_fee
-                    else:
-                        ticket_amount = (order_ticket.ticket.price * order_ticket.quantity) + order_fee
-                        amount += (order_ticket.ticket.price * order_ticket.quantity) + order_fee
-
-                if discount and str(order_ticket.ticket.id) in discount.tickets.split(","):
-                    if discount.type == "amount":
-                        total_discount += discount.value * order_ticket.quantity
-                    else:
-                        total_discount += discount.value * ticket_amount / 100
-
-        if discount:
-            if discount.type == "amount":
-                order.amount = max(amount - total_discount, 0)
-            elif discount.type == "percent":
-                order.amount = amount - (discount.value * amount / 100.0)
-        else:
-            order.amount = amount
+        with db.session.no_autoflush:
+            quote = calculate_quote([(order_ticket.ticket_id, order_ticket.quantity)
+                                     for order_ticket in order.order_tickets],
+                                    order.discount_code_id, order.event.payment_currency)
+        order.amount = quote['amount']
         save_to_db(order)
         return order
 
+    @staticmethod
+    def place_order_payment(order, stripe_token=None, paypal_payer_id=None, paypal_payment_id=None):
+        """
+        Record the payment token of an order, place the order and capture the payment in the background
+        :param order: Order for which to charge for
+        :param stripe_token: Stripe token, for stripe orders
+        :param paypal_payer_id: payer_id, for paypal orders
+        :param paypal_payment_id: payment_id, for paypal orders
+        :return: the capture task
+        """
+        from .tasks import capture_order_payment_task
+
+        if order.payment_mode == 'stripe':
+            order.stripe_token = stripe_token
+        else:
+            order.paypal_token = paypal_payment_id
+        # the tickets stay held while the payment is captured
+        order.status = 'placed'
+        save_to_db(order)
+
+        return capture_order_payment_task.delay(order.id, paypal_payer_id=paypal_payer_id)
+
     @staticmethod
     def charge_stripe_order_payment(order, token_id):
         """
@@ -84,21 +77,17 @@ class TicketingManager(object):
         :param token_id: Stripe token
         :return:
         """
-        # save the stripe token with the order
-        order.stripe_token = token_id
-        save_to_db(order)
+        # save the stripe token with the order, the capture task holds the lock of the order which has it already
+        if order.stripe_token != token_id:
+            order.stripe_token = token_id
+            save_to_db(order)
 
         # charge the user
         try:
             charge = StripePaymentsManager.capture_payment(order)
         except ConflictException as e:
             # payment failed hence expire the order
-            order.status = 'expired'
-            save_to_db(order)
-
-            # delete related attendees to unlock the tickets
-            delete_related_attendees_for_order(order)
-
+            expire_failed_order(order)
             raise e
 
         # charge.paid is true if the charge succeeded, or was successfully authorized for later capture.
@@ -114,26 +103,13 @@ class TicketingManager(object):
             order.completed_at = datetime.utcnow()
             save_to_db(order)
 
-            # create tickets.
+            # create tickets, the mails and notifications are sent from the outbox.
             create_pdf_tickets_for_holder(order)
 
-            # send email and notifications.
-            send_email_to_attendees(order, current_user.id)
-            send_notif_to_attendees(order, current_user.id)
-
-            order_url = make_frontend_url(path='/orders/{identifier}'.format(identifier=order.identifier))
-            for organizer in order.event.organizers:
-                send_notif_ticket_purchase_organizer(organizer, order.invoice_number, order_url, order.event.name,
-                                                     order.id)
-
             return True, 'Charge successful'
         else:
             # payment failed hence expire the order
-            order.status = 'expired'
-            save_to_db(order)
-
-            # delete related attendees to unlock the tickets
-            delete_related_attendees_for_order(order)
+            expire_failed_order(order)
 
             # return the failure message from stripe.
             return False, charge.failure_message
@@ -148,9 +124,10 @@ class TicketingManager(object):
         :return:
         """
 
-        # save the paypal payment_id with the order
-        order.paypal_token = paypal_payment_id
-        save_to_db(order)
+        # save the paypal payment_id with the order, the capture task holds the lock of the order which has it already
+        if order.paypal_token != paypal_payment_id:
+            order.paypal_token = paypal_payment_id
+            save_to_db(order)
 
         # create the transaction.
         status, error = PayPalPaymentsManager.execute_payment(paypal_payer_id, paypal_payment_id)
@@ -163,26 +140,13 @@ class TicketingManager(object):
             order.completed_at = datetime.utcnow()
             save_to_db(order)
 
-            # create tickets
+            # create tickets, the mails and notifications are sent from the outbox.
             create_pdf_tickets_for_holder(order)
 
-            # send email and notifications
-            send_email_to_attendees(order, order.user_id)
-            send_notif_to_attendees(order, order.user_id)
-
-            order_url = make_frontend_url(path='/orders/{identifier}'.format(identifier=order.identifier))
-            for organizer in order.event.organizers:
-                send_notif_ticket_purchase_organizer(organizer, order.invoice_number, order_url, order.event.name,
-                                                     order.id)
-
             return True, 'Charge successful'
         else:
             # payment failed hence expire the order
-            order.status = 'expired'
-            save_to_db(order)
-
-            # delete related attendees to unlock the tickets
-            delete_related_attendees_for_order(order)
+            expire_failed_order(order)
 
             # return the error message from Paypal
             return False, error
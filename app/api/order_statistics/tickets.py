@@ -1,13 +1,11 @@
 from flask_rest_jsonapi import ResourceDetail
 from marshmallow_jsonapi import fields
 from marshmallow_jsonapi.flask import Schema
-from sqlalchemy import func
 
 from app.api.bootstrap import api
-from app.api.helpers.db import get_count
+from app.api.helpers.order_rollups import get_ticket_rollup_statistics
 from app.api.helpers.utilities import dasherize
 from app.models import db
-from app.models.order import Order, OrderTicket
 from app.models.ticket import Ticket
 
 
@@ -31,85 +29,23 @@ class OrderStatisticsTicketSchema(Schema):
     orders = fields.Method("orders_count")
     sales = fields.Method("sales_count")
 
+    def get_statistics(self, obj):
+        """
+        Computes the statistics of all the statuses at once and shares them between the fields
+        """
+        statistics = self.context.setdefault('order_statistics', {})
+        if obj.id not in statistics:
+            statistics.update(get_ticket_rollup_statistics([obj.id]))
+        return statistics[obj.id]
+
     def tickets_count(self, obj):
-        obj_id = obj.id
-        total = db.session.query(func.sum(OrderTicket.quantity.label('sum'))).join(Order.order_tickets).filter(
-            OrderTicket.ticket_id == obj_id).scalar()
-        draft = db.session.query(func.sum(OrderTicket.quantity.label('sum'))).join(Order.order_tickets).filter(
-            OrderTicket.ticket_id == obj_id, Order.status == 'draft').scalar()
-        cancelled = db.session.query(func.sum(OrderTicket.quantity.label('sum'))).join(Order.order_tickets).filter(
-            OrderTicket.ticket_id == obj_id, Order.status == 'cancelled').scalar()
-        pending = db.session.query(func.sum(OrderTicket.quantity.label('sum'))).join(Order.order_tickets).filter(
-            OrderTicket.ticket_id == obj_id, Order.status == 'pending').scalar()
-        expired = db.session.query(func.sum(OrderTicket.quantity.label('sum'))).join(Order.order_tickets).filter(
-            OrderTicket.ticket_id == obj_id, Order.status == 'expired').scalar()
-        placed = db.session.query(func.sum(OrderTicket.quantity.label('sum'))).join(Order.order_tickets).filter(
-            OrderTicket.ticket_id == obj_id, Order.status == 'placed').scalar()
-        completed = db.session.query(func.sum(OrderTicket.quantity.label('sum'))).join(Order.order_tickets).filter(
-            OrderTicket.ticket_id == obj_id, Order.status == 'completed').scalar()
-        result = {
-            'total': total or 0,
-            'draft': draft or 0,
-            'cancelled': cancelled or 0,
-            'pending': pending or 0,
-            'expired': expired or 0,
-            'placed': placed or 0,
-            'completed': completed or 0
-        }
-        return result
+        return self.get_statistics(obj)['tickets']
 
     def orders_count(self, obj):
-        obj_id = obj.id
-        total = get_count(db.session.query(Order).join(Order.order_tickets).filter(OrderTicket.ticket_id == obj_id))
-        draft = get_count(db.session.query(Order).join(Order.order_tickets).filter(OrderTicket.ticket_id == obj_id,
-                                                                                   Order.status == 'draft'))
-        cancelled = get_count(db.session.query(Order).join(Order.order_tickets).filter(OrderTicket.ticket_id == obj_id,
-                                                                                       Order.status == 'cancelled'))
-        pending = get_count(db.session.query(Order).join(Order.order_tickets).filter(OrderTicket.ticket_id == obj_id,
-                                                                                     Order.status == 'pending'))
-        expired = get_count(db.session.query(Order).join(Order.order_tickets).filter(OrderTicket.ticket_id == obj_id,
-                                                                                     Order.status == 'expired'))
-        placed = get_count(db.session.query(Order).join(Order.order_tickets).filter(OrderTicket.ticket_id == obj_id,
-                                                                                    Order.status == 'placed'))
-        completed = get_count(db.session.query(Order).join(Order.order_tickets).filter(OrderTicket.ticket_id == obj_id,
-                                                                                       Order.status == 'completed'))
-        result = {
-            'total': total or 0,
-            'draft': draft or 0,
-            'cancelled': cancelled or 0,
-            'pending': pending or 0,
-            'expired': expired or 0,
-            'placed': placed or 0,
-            'completed': completed or 0
-        }
-        return result
+        return self.get_statistics(obj)['orders']
 
     def sales_count(self, obj):
-        obj_id = obj.id
-        total = db.session.query(func.sum(Order.amount.label('sum'))).join(Order.order_tickets).filter(
-            OrderTicket.ticket_id == obj_id).scalar()
-        draft = db.session.query(func.sum(Order.amount.label('sum'))).join(Order.order_tickets).filter(
-            OrderTicket.ticket_id == obj_id, Order.status == 'draft').scalar()
-        cancelled = db.session.query(func.sum(Order.amount.label('sum'))).join(Order.order_tickets).filter(
-            OrderTicket.ticket_id == obj_id, Order.status == 'cancelled').scalar()
-        pending = db.session.query(func.sum(Order.amount.label('sum'))).join(Order.order_tickets).filter(
-            OrderTicket.ticket_id == obj_id, Order.status == 'pending').scalar()
-        expired = db.session.query(func.sum(Order.amount.label('sum'))).join(Order.order_tickets).filter(
-            OrderTicket.ticket_id == obj_id, Order.status == 'expired').scalar()
-        placed = db.session.query(func.sum(Order.amount.label('sum'))).join(Order.order_tickets).filter(
-            OrderTicket.ticket_id == obj_id, Order.status == 'placed').scalar()
-        completed = db.session.query(func.sum(Order.amount.label('sum'))).join(Order.order_tickets).filter(
-            OrderTicket.ticket_id == obj_id, Order.status == 'completed').scalar()
-        result = {
-            'total': total or 0,
-            'draft': draft or 0,
-            'cancelled': cancelled or 0,
-            'pending': pending or 0,
-            'expired': expired or 0,
-            'placed': placed or 0,
-            'completed': completed or 0
-        }
-        return result
+        return self.get_statistics(obj)['sales']
 
 
 class OrderStatisticsTicketDetail(ResourceDetail):
@@ -1,33 +1,32 @@
-from datetime import datetime
+from collections import Counter
 
 from flask import Blueprint, jsonify, request
 from flask_jwt import current_identity as current_user
 from flask_rest_jsonapi import ResourceDetail, ResourceList, ResourceRelationship
+from flask_rest_jsonapi.exceptions import ObjectNotFound
 from marshmallow_jsonapi import fields
 from marshmallow_jsonapi.flask import Schema
-from sqlalchemy.orm.exc import NoResultFound
 
 from app.api.bootstrap import api
 from app.api.data_layers.ChargesLayer import ChargesLayer
 from app.api.helpers.db import save_to_db, safe_query, safe_query_without_soft_deleted_entries
-from app.api.helpers.errors import BadRequestError
+from app.api.helpers.discount_usage import validate_discount_code
+from app.api.helpers.errors import BadRequestError, NotFoundError, UnprocessableEntityError
 from app.api.helpers.exceptions import ForbiddenException, UnprocessableEntity, ConflictException
-from app.api.helpers.files import make_frontend_url
-from app.api.helpers.mail import send_email_to_attendees
 from app.api.helpers.mail import send_order_cancel_email
-from app.api.helpers.notification import send_notif_to_attendees, send_notif_ticket_purchase_organizer, \
-    send_notif_ticket_cancel
+from app.api.helpers.notification import send_notif_ticket_cancel
 from app.api.helpers.order import delete_related_attendees_for_order, set_expiry_for_order, \
     create_pdf_tickets_for_holder, create_onsite_attendees_for_order
 from app.api.helpers.payment import PayPalPaymentsManager
 from app.api.helpers.permission_manager import has_access
 from app.api.helpers.permissions import jwt_required
+from app.api.helpers.pricing import get_quote
 from app.api.helpers.query import event_query
 from app.api.helpers.ticketing import TicketingManager
 from app.api.helpers.utilities import dasherize, require_relationship
 from app.api.schema.orders import OrderSchema
 from app.models import db
-from app.models.discount_code import DiscountCode, TICKET
+from app.models.discount_code import DiscountCode
 from app.models.order import Order, OrderTicket, get_updatable_fields
 from app.models.ticket_holder import TicketHolder
 from app.models.user import User
@@ -68,17 +67,17 @@ class OrdersListPost(ResourceList):
         :param view_kwargs:
         :return:
         """
+        # Ensuring that the attendees exist and don't have an associated order.
+        order_ids = dict(self.session.query(TicketHolder.id, TicketHolder.order_id)
+                         .filter(TicketHolder.id.in_([int(ticket_holder) for ticket_holder in data['ticket_holders']]),
+                                 TicketHolder.deleted_at.is_(None)))
         for ticket_holder in data['ticket_holders']:
-            # Ensuring that the attendee exists and doesn't have an associated order.
-            try:
-                ticket_holder_object = self.session.query(TicketHolder).filter_by(id=int(ticket_holder),
-                                                                                  deleted_at=None).one()
-                if ticket_holder_object.order_id:
-                    raise ConflictException({'pointer': '/data/relationships/attendees'},
-                                            "Order already exists for attendee with id {}".format(str(ticket_holder)))
-            except NoResultFound:
+            if int(ticket_holder) not in order_ids:
                 raise ConflictException({'pointer': '/data/relationships/attendees'},
                                         "Attendee with id {} does not exists".format(str(ticket_holder)))
+            if order_ids[int(ticket_holder)]:
+                raise ConflictException({'pointer': '/data/relationships/attendees'},
+                                        "Order already exists for attendee with id {}".format(str(ticket_holder)))
 
         if data.get('cancel_note'):
             del data['cancel_note']
@@ -91,19 +90,9 @@ class OrdersListPost(ResourceList):
         if data.get('discount') and not has_access('is_coorganizer', event_id=data['event']):
             discount_code = safe_query_without_soft_deleted_entries(self, DiscountCode, 'id', data['discount'],
                                                                     'discount_code_id')
-            if not discount_code.is_active:
-                raise UnprocessableEntity({'source': 'discount_code_id'}, "Inactive Discount Code")
-            else:
-                now = datetime.utcnow()
-                valid_from = datetime.strptime(discount_code.valid_from, '%Y-%m-%d %H:%M:%S')
-                valid_till = datetime.strptime(discount_code.valid_till, '%Y-%m-%d %H:%M:%S')
-                if not (valid_from <= now <= valid_till):
-                    raise UnprocessableEntity({'source': 'discount_code_id'}, "Inactive Discount Code")
-                if not TicketingManager.match_discount_quantity(discount_code, data['ticket_holders']):
-                    raise UnprocessableEntity({'source': 'discount_code_id'}, 'Discount Usage Exceeded')
-
-            if discount_code.event.id != data['event'] and discount_code.user_for == TICKET:
-                raise UnprocessableEntity({'source': 'discount_code_id'}, "Invalid Discount Code")
+            validate_discount_code(discount_code, [data['event']])
+            if not TicketingManager.match_discount_quantity(discount_code, data['ticket_holders']):
+                raise UnprocessableEntity({'source': 'discount_code_id'}, 'Discount Usage Exceeded')
 
     def after_create_object(self, order, data, view_kwargs):
         """
@@ -113,42 +102,26 @@ class OrdersListPost(ResourceList):
         :param view_kwargs:
         :return:
         """
-        order_tickets = {}
-        for holder in order.ticket_holders:
-            save_to_db(holder)
-            if not order_tickets.get(holder.ticket_id):
-                order_tickets[holder.ticket_id] = 1
-            else:
-                order_tickets[holder.ticket_id] += 1
+        order_tickets = Counter(holder.ticket_id for holder in order.ticket_holders)
 
         order.user = current_user
 
-        # create pdf tickets.
+        # create pdf tickets, the mails and notifications are sent from the outbox.
         create_pdf_tickets_for_holder(order)
 
-        for ticket in order_tickets:
-            od = OrderTicket(order_id=order.id, ticket_id=ticket, quantity=order_tickets[ticket])
-            save_to_db(od)
+        # the order tickets are committed together with the order
+        db.session.add_all([OrderTicket(order_id=order.id, ticket_id=ticket, quantity=quantity)
+                            for ticket, quantity in order_tickets.items()])
 
-        order.quantity = order.tickets_count
+        order.quantity = sum(order_tickets.values())
         save_to_db(order)
         if not has_access('is_coorganizer', event_id=data['event']):
             TicketingManager.calculate_update_amount(order)
 
-        # send e-mail and notifications if the order status is completed
-        if order.status == 'completed':
-            send_email_to_attendees(order, current_user.id)
-            send_notif_to_attendees(order, current_user.id)
-
-            order_url = make_frontend_url(path='/orders/{identifier}'.format(identifier=order.identifier))
-            for organizer in order.event.organizers:
-                send_notif_ticket_purchase_organizer(organizer, order.invoice_number, order_url, order.event.name,
-                                                     order.id)
-
         data['user_id'] = current_user.id
 
     methods = ['POST', ]
-    decorators = (jwt_required,)
+    decorators = (jwt_required, api.has_permission('is_admitted', methods="POST"),)
     schema = OrderSchema
     data_layer = {'session': db.session,
                   'model': Order,
@@ -184,11 +157,7 @@ class OrdersList(ResourceList):
             # orders under an event
             query_ = event_query(self, query_, view_kwargs)
 
-        # expire the pending orders if the time limit is over.
-        orders = query_.all()
-        for order in orders:
-            set_expiry_for_order(order)
-
+        # pending orders are expired in the background by the expiry sweeper
         return query_
 
     decorators = (jwt_required,)
@@ -374,12 +343,25 @@ class ChargeSchema(Schema):
     paypal_payment_id = fields.Str(load_only=True, allow_none=True)
     status = fields.Boolean(dump_only=True)
     message = fields.Str(dump_only=True)
+    task_url = fields.Str(dump_only=True)
 
 
 class ChargeList(ResourceList):
     """
     ChargeList ResourceList for ChargesLayer class
     """
+
+    def post(self, *args, **kwargs):
+        """
+        Answer 202 when the payment is captured in the background, with the task to poll as location
+        """
+        result, status_code, headers = super(ChargeList, self).post(*args, **kwargs)
+        task_url = result['data']['attributes'].get('task-url')
+        if task_url:
+            status_code = 202
+            headers['Location'] = task_url
+        return result, status_code, headers
+
     methods = ['POST', ]
     schema = ChargeSchema
 
@@ -389,7 +371,7 @@ class ChargeList(ResourceList):
         'model': Order
     }
 
-    decorators = (jwt_required,)
+    decorators = (jwt_required, api.has_permission('is_admitted', methods="POST"),)
 
 
 @order_misc_routes.route('/orders/<string:order_identifier>/create-paypal-payment', methods=['POST'])
@@ -412,3 +394,31 @@ def create_payment_payment(order_identifier):
         return jsonify(status=True, payment_id=response)
     else:
         return jsonify(status=False, error=response)
+
+
+@order_misc_routes.route('/orders/quote', methods=['POST'])
+@jwt_required
+def quote_order():
+    """
+    Price tickets without creating an order.
+    :return: The line items of the tickets with their fee and discount, and the totals.
+    """
+    try:
+        attributes = request.json['data']['attributes']
+        ticket_quantities = [(int(ticket['id']), int(ticket['quantity'])) for ticket in attributes['tickets']]
+        discount_code_id = attributes.get('discount-code')
+        if discount_code_id is not None:
+            discount_code_id = int(discount_code_id)
+    except (TypeError, KeyError, ValueError):
+        return BadRequestError({'source': ''}, 'Bad Request Error').respond()
+    if not ticket_quantities or any(quantity <= 0 for _, quantity in ticket_quantities):
+        return BadRequestError({'pointer': '/data/attributes/tickets'},
+                               'At least one ticket with a positive quantity is required').respond()
+
+    try:
+        quote = get_quote(ticket_quantities, discount_code_id, attributes.get('currency'))
+    except ObjectNotFound as e:
+        return NotFoundError(e.source, e.detail).respond()
+    except UnprocessableEntity as e:
+        return UnprocessableEntityError(e.source, e.detail).respond()
+    return jsonify(quote)
@@ -1,10 +1,6 @@
 from marshmallow_jsonapi.flask import Schema
 from marshmallow_jsonapi import fields
-from app.models.event import Event
-from app.api.helpers.db import get_count
 from app.api.helpers.utilities import dasherize
-from datetime import datetime
-import pytz
 
 
 class AdminStatisticsEventSchema(Schema):
@@ -20,15 +16,7 @@ class AdminStatisticsEventSchema(Schema):
         inflect = dasherize
 
     id = fields.String()
-    draft = fields.Method("events_draft_count")
-    published = fields.Method("events_published_count")
-    past = fields.Method("events_past_count")
-
-    def events_draft_count(self, obj):
-        return get_count(Event.query.filter_by(state='draft'))
-
-    def events_published_count(self, obj):
-        return get_count(Event.query.filter_by(state='published'))
-
-    def events_past_count(self, obj):
-        return get_count(Event.query.filter(Event.ends_at < datetime.now(pytz.utc)))
+    draft = fields.Integer()
+    published = fields.Integer()
+    past = fields.Integer()
+    as_of = fields.DateTime()
@@ -1,10 +1,8 @@
 from marshmallow_jsonapi import fields
 from marshmallow_jsonapi.flask import Schema
 
+from app.api.helpers.event_statistics import get_event_statistics
 from app.api.helpers.utilities import dasherize
-from app.models.session import Session
-from app.models.speaker import Speaker
-from app.models.sponsor import Sponsor
 
 
 class EventStatisticsGeneralSchema(Schema):
@@ -32,29 +30,38 @@ class EventStatisticsGeneralSchema(Schema):
     sessions = fields.Method("sessions_count")
     sponsors = fields.Method("sponsors_count")
 
+    def get_statistics(self, obj):
+        """
+        Computes all the counts at once and shares them between the fields
+        """
+        statistics = self.context.setdefault('event_statistics', {})
+        if obj.id not in statistics:
+            statistics[obj.id] = get_event_statistics(obj.id)
+        return statistics[obj.id]
+
     def sessions_draft_count(self, obj):
-        return Session.query.filter_by(event_id=obj.id, state='draft').count()
+        return self.get_statistics(obj)['sessions_draft']
 
     def sessions_submitted_count(self, obj):
-        return Session.query.filter_by(event_id=obj.id, state='submitted').count()
+        return self.get_statistics(obj)['sessions_submitted']
 
     def sessions_accepted_count(self, obj):
-        return Session.query.filter_by(event_id=obj.id, state='accepted').count()
+        return self.get_statistics(obj)['sessions_accepted']
 
     def sessions_confirmed_count(self, obj):
-        return Session.query.filter_by(event_id=obj.id, state='confirmed').count()
+        return self.get_statistics(obj)['sessions_confirmed']
 
     def sessions_pending_count(self, obj):
-        return Session.query.filter_by(event_id=obj.id, state='pending').count()
+        return self.get_statistics(obj)['sessions_pending']
 
     def sessions_rejected_count(self, obj):
-        return Session.query.filter_by(event_id=obj.id, state='rejected').count()
+        return self.get_statistics(obj)['sessions_rejected']
 
     def speakers_count(self, obj):
-        return Speaker.query.filter_by(event_id=obj.id).count()
+        return self.get_statistics(obj)['speakers']
 
     def sessions_count(self, obj):
-        return Session.query.filter_by(event_id=obj.id).count()
+        return self.get_statistics(obj)['sessions']
 
     def sponsors_count(self, obj):
-        return Sponsor.query.filter_by(event_id=obj.id).count()
+        return self.get_statistics(obj)['sponsors']
@@ -111,6 +111,7 @@ class EventSchemaPublic(SoftDeletionSchema):
     refund_policy = fields.String(dump_only=True,
                                   default='All sales are final. No refunds shall be issued in any case.')
     is_stripe_linked = fields.Boolean(dump_only=True, allow_none=True, default=False)
+    waiting_room_admit_rate = fields.Integer(allow_none=True, validate=lambda n: n >= 1)
 
     tickets = Relationship(attribute='tickets',
                            self_view='v1.event_ticket',
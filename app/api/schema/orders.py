@@ -71,6 +71,7 @@ class OrderSchema(SoftDeletionSchema):
     cancel_note = fields.Str(allow_none=True)
     order_notes = fields.Str(allow_none=True)
     tickets_pdf_url = fields.Url(dump_only=True)
+    tickets_pdf_status = fields.Str(dump_only=True)
 
     # only used in the case of an on site attendee.
     on_site_tickets = fields.List(cls_or_instance=fields.Nested(OnSiteTicketSchema), load_only=True, allow_none=True)
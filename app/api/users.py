@@ -7,12 +7,14 @@ from flask_rest_jsonapi import ResourceDetail, ResourceList, ResourceRelationshi
 from app import get_settings
 from app.api.bootstrap import api
 from app.api.helpers.db import safe_query, get_count
+from app.api.helpers.errors import ForbiddenError
 from app.api.helpers.exceptions import ConflictException
 from app.api.helpers.exceptions import ForbiddenException
 from app.api.helpers.files import create_save_image_sizes, make_frontend_url
 from app.api.helpers.mail import send_email_confirmation, send_email_change_user_email, send_email_with_action
+from app.api.helpers.notification_count import get_unread_notification_count, mark_all_notifications_read
 from app.api.helpers.permission_manager import has_access
-from app.api.helpers.permissions import is_user_itself
+from app.api.helpers.permissions import is_user_itself, jwt_required
 from app.api.helpers.utilities import get_serializer, str_generator
 from app.api.schema.users import UserSchema, UserSchemaPublic
 from app.models import db
@@ -245,3 +247,27 @@ def is_email_available():
         abort(
             make_response(jsonify(error="Email field missing"), 422)
         )
+
+
+@user_misc_routes.route('/users/<int:user_id>/notification-count', methods=['GET'])
+@jwt_required
+def get_notification_count(user_id):
+    """
+    Get the number of unread notifications of a user, without loading them.
+    :return: The unread count.
+    """
+    if not has_access('is_user_itself', user_id=user_id):
+        return ForbiddenError({'source': ''}, 'Access Forbidden').respond()
+    return jsonify(unread=get_unread_notification_count(user_id))
+
+
+@user_misc_routes.route('/users/<int:user_id>/notifications/mark-all-read', methods=['POST'])
+@jwt_required
+def mark_notifications_read(user_id):
+    """
+    Mark all the notifications of a user as read.
+    :return: The number of notifications marked as read.
+    """
+    if not has_access('is_user_itself', user_id=user_id):
+        return ForbiddenError({'source': ''}, 'Access Forbidden').respond()
+    return jsonify(marked=mark_all_notifications_read(user_id))
@@ -0,0 +1,45 @@
+from flask import Blueprint, jsonify
+from flask_jwt import current_identity
+
+from app.api.helpers.admission import get_waiting_room_status, join_waiting_room
+from app.api.helpers.errors import NotFoundError
+from app.api.helpers.identifiers import resolve_event
+from app.api.helpers.permissions import jwt_required
+
+waiting_room_routes = Blueprint('waiting_room', __name__, url_prefix='/v1/events')
+
+
+def _resolve_event_id(identifier):
+    if identifier.isdigit():
+        event = resolve_event(identifier, 'id')
+    else:
+        event = resolve_event(identifier)
+    if event is None or event.deleted_at is not None:
+        return None
+    return event.id
+
+
+@waiting_room_routes.route('/<identifier>/waiting-room', methods=['POST'])
+@jwt_required
+def join_event_waiting_room(identifier):
+    """
+    Queue the current user in the waiting room of the checkout of an event.
+    :return: The position of the user and the estimated wait in seconds, or the admission token once admitted.
+    """
+    event_id = _resolve_event_id(identifier)
+    if event_id is None:
+        return NotFoundError({'parameter': 'identifier'}, 'Event not found').respond()
+    return jsonify(join_waiting_room(event_id, current_identity.id))
+
+
+@waiting_room_routes.route('/<identifier>/waiting-room', methods=['GET'])
+@jwt_required
+def event_waiting_room_status(identifier):
+    """
+    Poll the position of the current user in the waiting room of an event.
+    :return: The position of the user and the estimated wait in seconds, or the admission token once admitted.
+    """
+    event_id = _resolve_event_id(identifier)
+    if event_id is None:
+        return NotFoundError({'parameter': 'identifier'}, 'Event not found').respond()
+    return jsonify(get_waiting_room_status(event_id, current_identity.id))
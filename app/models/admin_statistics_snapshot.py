@@ -0,0 +1,20 @@
+from app.models import db
+
+
+class AdminStatisticsSnapshot(db.Model):
+    """
+    Periodically refreshed counts served by the admin statistics endpoints.
+    One row per statistic, e.g. ('events', 'draft')
+    """
+    __tablename__ = 'admin_statistics_snapshots'
+
+    category = db.Column(db.String, primary_key=True)
+    name = db.Column(db.String, primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    as_of = db.Column(db.DateTime(timezone=True), nullable=False)
+
+    def __repr__(self):
+        return '<AdminStatisticsSnapshot %r:%r>' % (self.category, self.name)
+
+    def __str__(self):
+        return self.__repr__()
@@ -0,0 +1,19 @@
+from app.models import db
+
+
+class DiscountCodeUsage(db.Model):
+    """
+    Transactionally maintained number of discounted tickets sold with a discount code,
+    i.e. the tickets of the code in its completed and placed orders
+    """
+    __tablename__ = 'discount_code_usages'
+
+    discount_code_id = db.Column(db.Integer, db.ForeignKey('discount_codes.id', ondelete='CASCADE'),
+                                 primary_key=True)
+    used = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return '<DiscountCodeUsage %r>' % self.discount_code_id
+
+    def __str__(self):
+        return self.__repr__()
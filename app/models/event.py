@@ -101,6 +101,7 @@ class Event(SoftDeletionModel):
     refund_policy = db.Column(db.String, default='All sales are final. No refunds shall be issued in any case.')
     order_expiry_time = db.Column(db.Integer, default=10)
     is_stripe_linked = db.Column(db.Boolean, default=False)
+    waiting_room_admit_rate = db.Column(db.Integer)
     discount_code_id = db.Column(db.Integer, db.ForeignKey(
         'discount_codes.id', ondelete='CASCADE'))
     discount_code = db.relationship('DiscountCode', backref='events', foreign_keys=[discount_code_id])
@@ -208,7 +209,8 @@ class Event(SoftDeletionModel):
                  tax=None,
                  order_expiry_time=None,
                  refund_policy='All sales are final. No refunds shall be issued in any case.',
-                 is_stripe_linked=False):
+                 is_stripe_linked=False,
+                 waiting_room_admit_rate=None):
 
         self.name = name
         self.logo_url = logo_url
@@ -268,6 +270,7 @@ class Event(SoftDeletionModel):
         self.order_expiry_time = order_expiry_time
         self.refund_policy = refund_policy
         self.is_stripe_linked = is_stripe_linked
+        self.waiting_room_admit_rate = waiting_room_admit_rate
 
     def __repr__(self):
         return '<Event %r>' % self.name
@@ -82,6 +82,8 @@ class Notification(SoftDeletionModel):
         Model for storing user notifications.
     """
     __tablename__ = 'notifications'
+    __table_args__ = (db.Index('ix_notifications_user_id_unread', 'user_id', 'received_at',
+                               postgresql_where=db.text('is_read = false')),)
 
     id = db.Column(db.Integer, primary_key=True)
 
@@ -34,6 +34,9 @@ class OrderTicket(SoftDeletionModel):
 
 class Order(SoftDeletionModel):
     __tablename__ = "orders"
+    # Pending orders by age, for the expiry sweeper
+    __table_args__ = (db.Index('ix_orders_pending_created_at', 'created_at',
+                               postgresql_where=db.text("status = 'pending'")),)
 
     id = db.Column(db.Integer, primary_key=True)
     identifier = db.Column(db.String, unique=True)
@@ -62,6 +65,7 @@ class Order(SoftDeletionModel):
     cancel_note = db.Column(db.String, nullable=True)
     order_notes = db.Column(db.String)
     tickets_pdf_url = db.Column(db.String)
+    tickets_pdf_status = db.Column(db.String)
 
     discount_code_id = db.Column(
         db.Integer, db.ForeignKey('discount_codes.id', ondelete='SET NULL'), nullable=True, default=None)
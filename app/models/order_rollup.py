@@ -0,0 +1,25 @@
+from app.models import db
+
+# ticket_id of the rows holding the totals of a whole event
+EVENT_TOTAL = 0
+
+
+class OrderRollup(db.Model):
+    """
+    Incrementally maintained sales counters, per event, ticket and order status.
+    The rows with ticket_id `EVENT_TOTAL` hold the totals of the event, where an order is counted once.
+    """
+    __tablename__ = 'order_rollups'
+
+    event_id = db.Column(db.Integer, db.ForeignKey('events.id', ondelete='CASCADE'), primary_key=True)
+    ticket_id = db.Column(db.Integer, primary_key=True, index=True)
+    status = db.Column(db.String, primary_key=True)
+    ticket_count = db.Column(db.Integer, nullable=False, default=0)
+    order_count = db.Column(db.Integer, nullable=False, default=0)
+    amount = db.Column(db.Float, nullable=False, default=0)
+
+    def __repr__(self):
+        return '<OrderRollup %r:%r:%r>' % (self.event_id, self.ticket_id, self.status)
+
+    def __str__(self):
+        return self.__repr__()
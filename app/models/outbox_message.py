@@ -0,0 +1,25 @@
+from app.models import db
+
+
+class OutboxMessage(db.Model):
+    """
+    A side effect, e.g. the mails of a completed order, written in the transaction of the change which
+    causes it and delivered at least once by the outbox dispatcher
+    """
+    __tablename__ = 'outbox_messages'
+    __table_args__ = (db.Index('ix_outbox_messages_unsent_id', 'id', postgresql_where=db.text('sent_at IS NULL')),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    action = db.Column(db.String, nullable=False)
+    payload = db.Column(db.JSON, nullable=False)
+    created_at = db.Column(db.DateTime(timezone=True), nullable=False)
+    claimed_until = db.Column(db.DateTime(timezone=True))
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    last_error = db.Column(db.String)
+    sent_at = db.Column(db.DateTime(timezone=True))
+
+    def __repr__(self):
+        return '<OutboxMessage %r:%r>' % (self.id, self.action)
+
+    def __str__(self):
+        return self.__repr__()
@@ -1,4 +1,4 @@
-from sqlalchemy import desc
+from sqlalchemy import desc, func
 
 from app.models import db
 
@@ -43,3 +43,11 @@ def get_fee(country, currency):
         return fee.service_fee
 
     return DEFAULT_FEE
+
+
+def latest_fees():
+    "Subquery of the fee of every country and currency, the latest one as get_fee picks it"
+    latest = db.session.query(func.max(TicketFees.id).label('id')) \
+                       .group_by(TicketFees.country, TicketFees.currency).subquery()
+    return db.session.query(TicketFees.country, TicketFees.currency, TicketFees.service_fee) \
+                     .join(latest, TicketFees.id == latest.c.id).subquery()
@@ -0,0 +1,20 @@
+from app.models import db
+
+
+class TicketInventory(db.Model):
+    """
+    Atomically maintained counters of the ticket holders of a ticket.
+    `sold` counts the holders of completed and placed orders and `reserved` all the other live holders.
+    The availability of a ticket is `quantity - reserved - sold`.
+    """
+    __tablename__ = 'ticket_inventories'
+
+    ticket_id = db.Column(db.Integer, db.ForeignKey('tickets.id', ondelete='CASCADE'), primary_key=True)
+    reserved = db.Column(db.Integer, nullable=False, default=0)
+    sold = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return '<TicketInventory %r>' % self.ticket_id
+
+    def __str__(self):
+        return self.__repr__()
@@ -9,20 +9,18 @@ from sqlalchemy import event, desc
 from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm.exc import MultipleResultsFound, NoResultFound
 
-from app.api.helpers.db import get_count
+from app.api.helpers.notification_count import get_unread_notification_count
+from app.api.helpers.permission_table import OPERATIONS, has_perm
+from app.api.helpers.role_matrix import get_role_matrix, has_event_role
 from app.models import db
 from app.models.base import SoftDeletionModel
 from app.models.custom_system_role import UserSystemRole, CustomSysRole
 from app.models.helpers.versioning import clean_up_string, clean_html
 from app.models.notification import Notification
 from app.models.panel_permission import PanelPermission
-from app.models.permission import Permission
-from app.models.role import Role
-from app.models.service import Service
 from app.models.session import Session
 from app.models.speaker import Speaker
 from app.models.user_permission import UserPermission
-from app.models.users_events_role import UsersEventsRoles as UER
 
 # System-wide
 ADMIN = 'admin'
@@ -168,30 +166,15 @@ class User(SoftDeletionModel):
         Checks if user has any of the Roles at an Event.
         Exclude Attendee Role.
         """
-        attendee_role = Role.query.filter_by(name=ATTENDEE).first()
-        uer = UER.query.filter(UER.user == self, UER.event_id == event_id,
-                               UER.role != attendee_role).first()
-        if uer is None:
-            return False
-        else:
-            return True
+        return any(uer_event_id == int(event_id) and role_name != ATTENDEE
+                   for uer_event_id, role_name in get_role_matrix(self.id))
 
     def _is_role(self, role_name, event_id=None):
         """
         Checks if a user has a particular Role at an Event.
+        Answered from the role matrix of the user, which is loaded once per request.
         """
-        role = Role.query.filter_by(name=role_name).first()
-        if event_id:
-            uer = UER.query.filter_by(user=self,
-                                      event_id=event_id,
-                                      role=role).first()
-        else:
-            uer = UER.query.filter_by(user=self,
-                                      role=role).first()
-        if not uer:
-            return False
-        else:
-            return True
+        return has_event_role(self.id, role_name, event_id)
 
     def is_organizer(self, event_id):
         # type: (object) -> object
@@ -238,14 +221,7 @@ class User(SoftDeletionModel):
         return self._is_role(ATTENDEE)
 
     def _has_perm(self, operation, service_class, event_id):
-        # Operation names and their corresponding permission in `Permissions`
-        operations = {
-            'create': 'can_create',
-            'read': 'can_read',
-            'update': 'can_update',
-            'delete': 'can_delete',
-        }
-        if operation not in list(operations.keys()):
+        if operation not in list(OPERATIONS.keys()):
             raise ValueError('No such operation defined')
 
         try:
@@ -257,18 +233,7 @@ class User(SoftDeletionModel):
         if self.is_super_admin:
             return True
 
-        service = Service.query.filter_by(name=service_name).first()
-
-        uer_querylist = UER.query.filter_by(user=self,
-                                            event_id=event_id)
-        for uer in uer_querylist:
-            role = uer.role
-            perm = Permission.query.filter_by(role=role,
-                                              service=service).first()
-            if getattr(perm, operations[operation]):
-                return True
-
-        return False
+        return has_perm(self, event_id, service_name, operation)
 
     def can_create(self, service_class, event_id):
         return self._has_perm('create', service_class, event_id)
@@ -369,7 +334,7 @@ class User(SoftDeletionModel):
         return False
 
     def get_unread_notif_count(self):
-        return get_count(Notification.query.filter_by(user=self, is_read=False))
+        return get_unread_notification_count(self.id)
 
     def get_unread_notifs(self):
         """
@@ -0,0 +1,17 @@
+from app.models import db
+
+
+class UserNotificationCount(db.Model):
+    """
+    Transactionally maintained number of unread notifications of a user
+    """
+    __tablename__ = 'user_notification_counts'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    unread = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return '<UserNotificationCount %r>' % self.user_id
+
+    def __str__(self):
+        return self.__repr__()
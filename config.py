@@ -60,6 +60,96 @@ class Config(object):
     ELASTICSEARCH_HOST = env('ELASTICSEARCH_HOST', default='localhost:9200')
     REDIS_URL = env('REDIS_URL', default='redis://localhost:6379/0')
 
+    # Buffer the users' last access time and flush it periodically instead of committing it on every request.
+    # LAST_ACCESS_BUFFER is either 'redis' or 'memory'. The database is at most LAST_ACCESS_FLUSH_INTERVAL seconds stale
+    LAST_ACCESS_WRITE_BEHIND = env.bool('LAST_ACCESS_WRITE_BEHIND', default=False)
+    LAST_ACCESS_BUFFER = env('LAST_ACCESS_BUFFER', default='redis')
+    LAST_ACCESS_FLUSH_INTERVAL = env.int('LAST_ACCESS_FLUSH_INTERVAL', default=60)
+
+    # Buffer the activities and insert them periodically instead of committing them with the request's session.
+    # ACTIVITY_LOG_BUFFER is either 'redis', which keeps them if the process crashes, or 'memory', which loses them.
+    # At most ACTIVITY_LOG_BUFFER_SIZE activities are buffered, the oldest are dropped beyond
+    ACTIVITY_LOG_WRITE_BEHIND = env.bool('ACTIVITY_LOG_WRITE_BEHIND', default=False)
+    ACTIVITY_LOG_BUFFER = env('ACTIVITY_LOG_BUFFER', default='redis')
+    ACTIVITY_LOG_BUFFER_SIZE = env.int('ACTIVITY_LOG_BUFFER_SIZE', default=100000)
+    ACTIVITY_LOG_BATCH_SIZE = env.int('ACTIVITY_LOG_BATCH_SIZE', default=1000)
+    ACTIVITY_LOG_FLUSH_INTERVAL = env.int('ACTIVITY_LOG_FLUSH_INTERVAL', default=10)
+
+    # Cache the users resolved from JWT tokens. Entries are invalidated whenever the user is updated.
+    # Without the redis tier, updates made by other processes are only seen once JWT_IDENTITY_CACHE_TTL expires
+    JWT_IDENTITY_CACHE = env.bool('JWT_IDENTITY_CACHE', default=False)
+    JWT_IDENTITY_CACHE_REDIS = env.bool('JWT_IDENTITY_CACHE_REDIS', default=False)
+    JWT_IDENTITY_CACHE_SIZE = env.int('JWT_IDENTITY_CACHE_SIZE', default=1024)
+    JWT_IDENTITY_CACHE_TTL = env.int('JWT_IDENTITY_CACHE_TTL', default=300)
+
+    # Cache the resolution of event and order identifiers to (id, state, deleted_at)
+    IDENTIFIER_CACHE = env.bool('IDENTIFIER_CACHE', default=False)
+    IDENTIFIER_CACHE_REDIS = env.bool('IDENTIFIER_CACHE_REDIS', default=False)
+    IDENTIFIER_CACHE_SIZE = env.int('IDENTIFIER_CACHE_SIZE', default=4096)
+    IDENTIFIER_CACHE_TTL = env.int('IDENTIFIER_CACHE_TTL', default=300)
+
+    # Cache the general statistics of events. Entries are invalidated when a session, speaker or sponsor changes.
+    # Without the redis tier, changes made by other processes are only seen once EVENT_STATISTICS_CACHE_TTL expires
+    EVENT_STATISTICS_CACHE = env.bool('EVENT_STATISTICS_CACHE', default=False)
+    EVENT_STATISTICS_CACHE_REDIS = env.bool('EVENT_STATISTICS_CACHE_REDIS', default=False)
+    EVENT_STATISTICS_CACHE_SIZE = env.int('EVENT_STATISTICS_CACHE_SIZE', default=1024)
+    EVENT_STATISTICS_CACHE_TTL = env.int('EVENT_STATISTICS_CACHE_TTL', default=300)
+
+    # Seconds after which the compiled role x service permission table is rebuilt, to pick up
+    # permission changes made by other processes. 0 rebuilds it only when changed in this process
+    PERMISSION_TABLE_MAX_AGE = env.int('PERMISSION_TABLE_MAX_AGE', default=300)
+
+    # Seconds for which the price quotes of POST /v1/orders/quote are cached per tickets, quantities,
+    # discount code and currency. 0 disables the cache
+    ORDER_QUOTE_CACHE_TTL = env.int('ORDER_QUOTE_CACHE_TTL', default=30)
+    ORDER_QUOTE_CACHE_SIZE = env.int('ORDER_QUOTE_CACHE_SIZE', default=1024)
+
+    # The PDF tickets of an order are rendered by celery tasks on PDF_TICKETS_QUEUE, which can be served by
+    # dedicated workers, e.g. `celery worker -A app.celery -Q pdf -c 4`. Tickets rendered from the same html
+    # are uploaded once every PDF_TICKETS_DEDUP_TTL seconds
+    PDF_TICKETS_QUEUE = env('PDF_TICKETS_QUEUE', default='celery')
+    PDF_TICKETS_DEDUP_TTL = env.int('PDF_TICKETS_DEDUP_TTL', default=24 * 60 * 60)
+
+    # Pending orders are expired by a background sweeper, every ORDER_EXPIRY_SWEEP_INTERVAL seconds,
+    # ORDER_EXPIRY_BATCH_SIZE orders per transaction
+    ORDER_EXPIRY_SWEEP_INTERVAL = env.int('ORDER_EXPIRY_SWEEP_INTERVAL', default=60)
+    ORDER_EXPIRY_BATCH_SIZE = env.int('ORDER_EXPIRY_BATCH_SIZE', default=500)
+
+    # With PAYMENT_CAPTURE_ASYNC, a charge places the order and captures the payment in a celery task,
+    # answering 202 with the url of the task to poll. PAYMENT_GATEWAY_STUB replaces Stripe and PayPal with a
+    # local stub answering after PAYMENT_GATEWAY_STUB_LATENCY milliseconds, for load tests only
+    PAYMENT_CAPTURE_ASYNC = env.bool('PAYMENT_CAPTURE_ASYNC', default=False)
+    PAYMENT_GATEWAY_STUB = env.bool('PAYMENT_GATEWAY_STUB', default=False)
+    PAYMENT_GATEWAY_STUB_LATENCY = env.int('PAYMENT_GATEWAY_STUB_LATENCY', default=0)
+
+    # Mails are sent over SMTP sessions pooled per worker process, SMTP_PIPELINE mails per session.
+    # Bulk mails are sent and recorded in batches of BULK_EMAIL_BATCH_SIZE recipients
+    SMTP_PIPELINE = env.int('SMTP_PIPELINE', default=100)
+    BULK_EMAIL_BATCH_SIZE = env.int('BULK_EMAIL_BATCH_SIZE', default=500)
+
+    # Seconds for which the message settings are cached, changes made by other processes are seen once they expire.
+    # Notifications to more than NOTIFICATIONS_ASYNC_THRESHOLD users are inserted by a celery task, 0 never defers
+    MESSAGE_SETTINGS_CACHE_TTL = env.int('MESSAGE_SETTINGS_CACHE_TTL', default=300)
+    NOTIFICATIONS_ASYNC_THRESHOLD = env.int('NOTIFICATIONS_ASYNC_THRESHOLD', default=0)
+
+    # Checkout of the events with a waiting room (`waiting_room_admit_rate`): admitted buyers get admission tokens
+    # valid for WAITING_ROOM_ADMISSION_TTL seconds and the admissions may burst to WAITING_ROOM_BURST seconds of
+    # the admit rate. The other processes see changes of the admit rate after WAITING_ROOM_RATE_CACHE_TTL seconds
+    WAITING_ROOM_ADMISSION_TTL = env.int('WAITING_ROOM_ADMISSION_TTL', default=30 * 60)
+    WAITING_ROOM_BURST = env.int('WAITING_ROOM_BURST', default=10)
+    WAITING_ROOM_RATE_CACHE_TTL = env.int('WAITING_ROOM_RATE_CACHE_TTL', default=30)
+
+    # The mails and notifications of completed orders are delivered from the outbox every OUTBOX_DISPATCH_INTERVAL
+    # seconds, OUTBOX_BATCH_SIZE messages per claim. A message which is not marked as sent within
+    # OUTBOX_CLAIM_TIMEOUT seconds is delivered again, up to OUTBOX_MAX_ATTEMPTS times
+    OUTBOX_DISPATCH_INTERVAL = env.int('OUTBOX_DISPATCH_INTERVAL', default=10)
+    OUTBOX_BATCH_SIZE = env.int('OUTBOX_BATCH_SIZE', default=100)
+    OUTBOX_CLAIM_TIMEOUT = env.int('OUTBOX_CLAIM_TIMEOUT', default=300)
+    OUTBOX_MAX_ATTEMPTS = env.int('OUTBOX_MAX_ATTEMPTS', default=10)
+
+    # Seconds between refreshes of the admin statistics snapshots. 0 computes the statistics on every request
+    ADMIN_STATISTICS_SNAPSHOT_INTERVAL = env.int('ADMIN_STATISTICS_SNAPSHOT_INTERVAL', default=300)
+
     # API configs
     SOFT_DELETE = True
     PROPOGATE_ERROR = env.bool('PROPOGATE_ERROR', default=False)
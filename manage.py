@@ -85,6 +85,59 @@ def initialize_db(credentials):
             print("[LOG] Tables already exist. Skipping data population & creation.")
 
 
+@manager.option('-e', '--event', help='Event ID. Eg. 1. Rebuilds all the events if not given')
+def rebuild_order_rollups(event=None):
+    from app.api.helpers.order_rollups import rebuild_order_rollups as rebuild
+    with app.app_context():
+        rebuild(int(event) if event else None)
+        print("[LOG] Order rollups rebuilt")
+
+
+@manager.option('-t', '--ticket', help='Ticket ID. Eg. 1. Rebuilds all the tickets if not given')
+def rebuild_ticket_inventories(ticket=None):
+    from app.api.helpers.inventory import rebuild_ticket_inventories as rebuild
+    with app.app_context():
+        rebuild(int(ticket) if ticket else None)
+        print("[LOG] Ticket inventories rebuilt")
+
+
+@manager.option('-d', '--discount-code', dest='discount_code',
+                help='Discount code ID. Eg. 1. Rebuilds all the discount codes if not given')
+def rebuild_discount_code_usages(discount_code=None):
+    from app.api.helpers.discount_usage import rebuild_discount_code_usages as rebuild
+    with app.app_context():
+        rebuild(int(discount_code) if discount_code else None)
+        print("[LOG] Discount code usages rebuilt")
+
+
+@manager.option('-u', '--user', dest='user', help='User ID. Eg. 1. Rebuilds all the users if not given')
+def rebuild_unread_notification_counts(user=None):
+    from app.api.helpers.notification_count import rebuild_unread_notification_counts as rebuild
+    with app.app_context():
+        rebuild(int(user) if user else None)
+        print("[LOG] Unread notification counts rebuilt")
+
+
+@manager.option('-n', '--count', help='Number of PDFs rendered each way. Eg. 20', default=20)
+def benchmark_pdf_renderer(count=20):
+    from app.api.helpers.pdf_renderer import benchmark_pdf_renderer as benchmark
+    with app.app_context():
+        before, after = benchmark(int(count))
+        print("[LOG] Fresh render to a temporary file: {:.2f} PDFs/s".format(before))
+        print("[LOG] Persistent renderer: {:.2f} PDFs/s".format(after))
+
+
+@manager.option('-t', '--to', help='Recipient of the test mails')
+@manager.option('-n', '--count', help='Number of mails sent each way. Eg. 20', default=20)
+def benchmark_smtp(to, count=20):
+    from app.api.helpers.mail import get_smtp_config
+    from app.api.helpers.smtp import benchmark_smtp as benchmark
+    with app.app_context():
+        before, after = benchmark(get_smtp_config(), to, int(count))
+        print("[LOG] SMTP session per mail: {:.2f} mails/s".format(before))
+        print("[LOG] Pooled SMTP sessions: {:.2f} mails/s".format(after))
+
+
 @manager.command
 def prepare_kubernetes_db():
     with app.app_context():
@@ -2035,6 +2035,32 @@ def notification_delete(transaction):
         db.session.commit()
 
 
+@hooks.before("Notifications > Notification Count > Unread Notification Count")
+def notification_count_get(transaction):
+    """
+    GET /users/1/notification-count
+    :param transaction:
+    :return:
+    """
+    with stash['app'].app_context():
+        notification = NotificationFactory(user_id=1)
+        db.session.add(notification)
+        db.session.commit()
+
+
+@hooks.before("Notifications > Mark All Notifications Read > Mark All Read")
+def notification_mark_all_read(transaction):
+    """
+    POST /users/1/notifications/mark-all-read
+    :param transaction:
+    :return:
+    """
+    with stash['app'].app_context():
+        notification = NotificationFactory(user_id=1)
+        db.session.add(notification)
+        db.session.commit()
+
+
 # ------------------------- Email Notifications -------------------------
 @hooks.before("Email Notifications > Email Notifications Admin Collection > List All Email Notifications")
 def email_notification_get_admin_list(transaction):
@@ -3944,6 +3970,19 @@ def create_paypal_payment(transaction):
     transaction['skip'] = True
 
 
+@hooks.before("Orders > Order Quote > Quote tickets")
+def quote_order(transaction):
+    """
+    POST /v1/orders/quote
+    :param transaction:
+    :return:
+    """
+    with stash['app'].app_context():
+        discount_code = DiscountCodeTicketFactory(event_id=1)
+        db.session.add(discount_code)
+        db.session.commit()
+
+
 @hooks.before("Event Copy > Create Event Copy > Create Copy")
 def create_event_copy(transaction):
     """
@@ -3957,6 +3996,32 @@ def create_event_copy(transaction):
         db.session.commit()
 
 
+@hooks.before("Waiting Room > Waiting Room > Join the Waiting Room")
+def join_waiting_room(transaction):
+    """
+    POST /v1/events/{identifier}/waiting-room
+    :param transaction:
+    :return:
+    """
+    with stash['app'].app_context():
+        event = EventFactoryBasic()
+        db.session.add(event)
+        db.session.commit()
+
+
+@hooks.before("Waiting Room > Waiting Room > Waiting Room Position")
+def get_waiting_room_position(transaction):
+    """
+    GET /v1/events/{identifier}/waiting-room
+    :param transaction:
+    :return:
+    """
+    with stash['app'].app_context():
+        event = EventFactoryBasic()
+        db.session.add(event)
+        db.session.commit()
+
+
 @hooks.before("Events > Get Event for a Order > Event Details for a Order")
 def get_event_from_order(transaction):
     """
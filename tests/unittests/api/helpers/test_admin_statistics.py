@@ -0,0 +1,38 @@
+import unittest
+
+from app import current_app as app, db
+from app.api.helpers.admin_statistics import get_admin_statistics, refresh_admin_statistics
+from app.factories.event import EventFactoryBasic
+from app.models.admin_statistics_snapshot import AdminStatisticsSnapshot
+from tests.unittests.setup_database import Setup
+from tests.unittests.utils import OpenEventTestCase
+
+
+class TestAdminStatistics(OpenEventTestCase):
+    def setUp(self):
+        self.app = Setup.create_app()
+
+    def test_admin_statistics_snapshot(self):
+        with app.test_request_context():
+            db.session.add(EventFactoryBasic())
+            db.session.commit()
+
+            statistics, as_of = refresh_admin_statistics('events')
+            self.assertEqual(statistics['draft'], 1)
+            self.assertEqual(statistics['published'], 0)
+            self.assertEqual(AdminStatisticsSnapshot.query.filter_by(category='events').count(), 3)
+
+            db.session.add(EventFactoryBasic(state='published'))
+            db.session.commit()
+
+            snapshot, snapshot_as_of = get_admin_statistics('events')
+            self.assertEqual(snapshot['published'], 0)
+            self.assertEqual(snapshot_as_of, as_of)
+
+            fresh, fresh_as_of = get_admin_statistics('events', fresh=True)
+            self.assertEqual(fresh['published'], 1)
+            self.assertGreater(fresh_as_of, as_of)
+
+
+if __name__ == '__main__':
+    unittest.main()
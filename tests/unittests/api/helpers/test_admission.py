@@ -0,0 +1,50 @@
+import unittest
+
+from app import current_app as app, db
+from app.api.helpers import admission
+from app.api.helpers.admission import create_admission_token, get_admit_rate, has_admission
+from app.factories.event import EventFactoryBasic
+from tests.unittests.setup_database import Setup
+from tests.unittests.utils import OpenEventTestCase
+
+
+class TestAdmission(OpenEventTestCase):
+    def setUp(self):
+        self.app = Setup.create_app()
+
+    def tearDown(self):
+        # event ids are reused by the next tests
+        admission._rate_cache = None
+        super(TestAdmission, self).tearDown()
+
+    def test_has_admission(self):
+        with app.test_request_context():
+            open_event = EventFactoryBasic()
+            event = EventFactoryBasic(waiting_room_admit_rate=60)
+            other_event = EventFactoryBasic(waiting_room_admit_rate=60)
+            db.session.add_all([open_event, event, other_event])
+            db.session.commit()
+
+            self.assertTrue(has_admission(open_event.id, 1, None))
+            self.assertFalse(has_admission(event.id, 1, None))
+            self.assertFalse(has_admission(event.id, 1, 'forged'))
+
+            token = create_admission_token(event.id, 1)
+            self.assertTrue(has_admission(event.id, 1, token))
+            self.assertFalse(has_admission(event.id, 2, token))
+            self.assertFalse(has_admission(other_event.id, 1, token))
+
+    def test_admit_rate_invalidation(self):
+        with app.test_request_context():
+            event = EventFactoryBasic(waiting_room_admit_rate=60)
+            db.session.add(event)
+            db.session.commit()
+            self.assertEqual(get_admit_rate(event.id), 60)
+
+            event.waiting_room_admit_rate = None
+            db.session.commit()
+            self.assertIsNone(get_admit_rate(event.id))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+
+from app import current_app as app, db
+from app.api.helpers.discount_usage import get_discount_code_usage, validate_discount_quantity
+from app.factories.attendee import AttendeeFactory
+from app.factories.discount_code import DiscountCodeTicketFactory
+from app.factories.order import OrderFactory
+from app.factories.ticket import TicketFactory
+from app.models.order import OrderTicket
+from tests.unittests.setup_database import Setup
+from tests.unittests.utils import OpenEventTestCase
+
+
+class TestDiscountUsage(OpenEventTestCase):
+    def setUp(self):
+        self.app = Setup.create_app()
+
+    def test_discount_code_usage(self):
+        with app.test_request_context():
+            ticket = TicketFactory()
+            discount_code = DiscountCodeTicketFactory(tickets_number=3, min_quantity=1, max_quantity=5)
+            discount_code.tickets = [ticket]
+            db.session.add_all([ticket, discount_code])
+            db.session.commit()
+
+            order = OrderFactory(status='completed', discount_code_id=discount_code.id)
+            db.session.add(order)
+            db.session.commit()
+            db.session.add(OrderTicket(order_id=order.id, ticket_id=ticket.id, quantity=2))
+            db.session.commit()
+            self.assertEqual(get_discount_code_usage(discount_code.id), 2)
+
+            holders = [AttendeeFactory(ticket_id=ticket.id), AttendeeFactory(ticket_id=ticket.id)]
+            db.session.add_all(holders)
+            db.session.commit()
+            self.assertTrue(validate_discount_quantity(discount_code, [holders[0].id]))
+            self.assertFalse(validate_discount_quantity(discount_code, [holder.id for holder in holders]))
+
+            order.status = 'cancelled'
+            db.session.commit()
+            self.assertEqual(get_discount_code_usage(discount_code.id), 0)
+            self.assertTrue(validate_discount_quantity(discount_code, [holder.id for holder in holders]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+import unittest
+
+from app import current_app as app
+from app.api.helpers.db import save_to_db
+from app.api.helpers.event_statistics import get_event_statistics
+from app.factories.session import SessionFactory
+from app.factories.sponsor import SponsorFactory
+from tests.unittests.setup_database import Setup
+from tests.unittests.utils import OpenEventTestCase
+
+
+class TestEventStatistics(OpenEventTestCase):
+    def setUp(self):
+        self.app = Setup.create_app()
+        app.config['EVENT_STATISTICS_CACHE'] = True
+
+    def tearDown(self):
+        app.config['EVENT_STATISTICS_CACHE'] = False
+        super(TestEventStatistics, self).tearDown()
+
+    def test_event_statistics(self):
+        with app.test_request_context():
+            session = SessionFactory(state='draft')
+            save_to_db(session)
+            save_to_db(SponsorFactory())
+
+            statistics = get_event_statistics(1)
+            self.assertEqual(statistics['sessions_draft'], 1)
+            self.assertEqual(statistics['sessions_accepted'], 0)
+            self.assertEqual(statistics['sessions'], 1)
+            self.assertEqual(statistics['speakers'], 0)
+            self.assertEqual(statistics['sponsors'], 1)
+
+            session.state = 'accepted'
+            save_to_db(session)
+            statistics = get_event_statistics(1)
+            self.assertEqual(statistics['sessions_draft'], 0)
+            self.assertEqual(statistics['sessions_accepted'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
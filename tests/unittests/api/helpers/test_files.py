@@ -9,7 +9,7 @@ from flask import Request, request, jsonify
 
 from app import current_app as app
 from app.api.helpers.files import create_save_resized_image, create_save_image_sizes
-from app.api.helpers.files import uploaded_image, uploaded_file
+from app.api.helpers.files import uploaded_image, uploaded_file, create_save_pdf
 from tests.unittests.setup_database import Setup
 from tests.unittests.utils import OpenEventTestCase
 
@@ -118,6 +118,14 @@ class TestFilesHelperValidation(OpenEventTestCase):
             self.assertEqual(resized_width, width)
             self.assertEqual(resized_height, height)
 
+    def test_create_save_pdf(self):
+        with app.test_request_context():
+            pdf_url = create_save_pdf('<html><body><p>Ticket</p></body></html>', 'test/pdf/{identifier}')
+            pdf_file = app.config.get('BASE_DIR') + urlparse(pdf_url).path
+            self.assertTrue(os.path.exists(pdf_file))
+            with open(pdf_file, 'rb') as f:
+                self.assertTrue(f.read().startswith(b'%PDF'))
+
     def test_create_save_image_sizes(self):
         with app.test_request_context():
             image_url_test = 'https://cdn.pixabay.com/photo/2014/09/08/17/08/hot-air-balloons-439331_960_720.jpg'
@@ -0,0 +1,53 @@
+import unittest
+from datetime import datetime
+
+import pytz
+
+from app import current_app as app
+from app.api.helpers.db import save_to_db
+from app.api.helpers.identifiers import ResolvedEvent, ResolvedOrder, identifier_cache, resolve_event
+from app.factories.event import EventFactoryBasic
+from tests.unittests.setup_database import Setup
+from tests.unittests.utils import OpenEventTestCase
+
+
+class TestIdentifiers(OpenEventTestCase):
+    def setUp(self):
+        self.app = Setup.create_app()
+        app.config['IDENTIFIER_CACHE'] = True
+
+    def tearDown(self):
+        app.config['IDENTIFIER_CACHE'] = False
+        super(TestIdentifiers, self).tearDown()
+
+    def test_resolve_event(self):
+        with app.test_request_context():
+            event = EventFactoryBasic(identifier='abcdefgh', state='draft')
+            save_to_db(event)
+
+            resolved = resolve_event('abcdefgh')
+            self.assertEqual(resolved.id, event.id)
+            self.assertEqual(resolved.state, 'draft')
+            self.assertEqual(resolve_event(event.id, column='id'), resolved)
+            self.assertIsNone(resolve_event('missing'))
+
+    def test_resolve_event_invalidation(self):
+        with app.test_request_context():
+            event = EventFactoryBasic(identifier='abcdefgh', state='draft')
+            save_to_db(event)
+            self.assertEqual(resolve_event('abcdefgh').state, 'draft')
+
+            event.state = 'published'
+            save_to_db(event)
+            self.assertEqual(resolve_event('abcdefgh').state, 'published')
+
+    def test_serialization(self):
+        deleted_at = datetime(2018, 1, 1, 12, tzinfo=pytz.utc)
+        for resolved in (ResolvedEvent(1, 'published', None), ResolvedEvent(1, 'draft', deleted_at),
+                         ResolvedOrder(2, deleted_at)):
+            self.assertEqual(identifier_cache.loads(identifier_cache.dumps(resolved)), resolved)
+            self.assertIsInstance(identifier_cache.loads(identifier_cache.dumps(resolved)), type(resolved))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+
+from app import current_app as app, db
+from app.api.helpers.db import save_to_db
+from app.api.helpers.exceptions import ConflictException
+from app.api.helpers.inventory import get_ticket_availability, rebuild_ticket_inventories
+from app.factories.attendee import AttendeeFactory
+from app.factories.order import OrderFactory
+from app.factories.ticket import TicketFactory
+from app.models.ticket_inventory import TicketInventory
+from tests.unittests.setup_database import Setup
+from tests.unittests.utils import OpenEventTestCase
+
+
+class TestInventory(OpenEventTestCase):
+    def setUp(self):
+        self.app = Setup.create_app()
+
+    def test_ticket_inventory(self):
+        with app.test_request_context():
+            ticket = TicketFactory(quantity=2)
+            save_to_db(ticket)
+            self.assertEqual(get_ticket_availability(ticket.id), 2)
+
+            order = OrderFactory()
+            save_to_db(order)
+            first = AttendeeFactory(ticket_id=ticket.id, order_id=order.id)
+            second = AttendeeFactory(ticket_id=ticket.id)
+            db.session.add_all([first, second])
+            db.session.commit()
+            self.assertEqual(get_ticket_availability(ticket.id), 0)
+
+            db.session.add(AttendeeFactory(ticket_id=ticket.id))
+            with self.assertRaises(ConflictException):
+                db.session.commit()
+            db.session.rollback()
+
+            order.status = 'completed'
+            save_to_db(order)
+            inventory = TicketInventory.query.get(ticket.id)
+            self.assertEqual((inventory.reserved, inventory.sold), (1, 1))
+
+            db.session.delete(second)
+            db.session.commit()
+            self.assertEqual(get_ticket_availability(ticket.id), 1)
+
+            rebuild_ticket_inventories(ticket.id)
+            inventory = TicketInventory.query.get(ticket.id)
+            self.assertEqual((inventory.reserved, inventory.sold), (0, 1))
+
+            # Missing counters are created from the ticket holders, without overselling the ticket
+            db.session.delete(inventory)
+            db.session.commit()
+            db.session.add(AttendeeFactory(ticket_id=ticket.id))
+            db.session.commit()
+            self.assertEqual(get_ticket_availability(ticket.id), 0)
+            db.session.delete(TicketInventory.query.get(ticket.id))
+            db.session.commit()
+            db.session.add(AttendeeFactory(ticket_id=ticket.id))
+            with self.assertRaises(ConflictException):
+                db.session.commit()
+            db.session.rollback()
+
+
+if __name__ == '__main__':
+    unittest.main()
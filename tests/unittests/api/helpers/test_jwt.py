@@ -3,10 +3,11 @@ import unittest
 from flask_jwt import _default_jwt_encode_handler
 
 from app import current_app as app
-from app.api.helpers.jwt import jwt_authenticate, get_identity
+from app.api.helpers.jwt import jwt_authenticate, get_identity, jwt_identity, identity_cache
 from app.factories.event import EventFactoryBasic
 from app.factories.user import UserFactory
 from app.models import db
+from app.models.user import User
 from tests.unittests.setup_database import Setup
 from tests.unittests.utils import OpenEventTestCase
 
@@ -15,6 +16,10 @@ class TestJWTHelperValidation(OpenEventTestCase):
     def setUp(self):
         self.app = Setup.create_app()
 
+    def tearDown(self):
+        app.config['JWT_IDENTITY_CACHE'] = False
+        super(TestJWTHelperValidation, self).tearDown()
+
     def test_jwt_authenticate(self):
         with app.test_request_context():
             user = UserFactory()
@@ -46,6 +51,31 @@ class TestJWTHelperValidation(OpenEventTestCase):
         with app.test_request_context(headers=self.auth):
             self.assertEquals(get_identity().id, user.id)
 
+    def test_jwt_identity_cache(self):
+        app.config['JWT_IDENTITY_CACHE'] = True
+        with app.test_request_context():
+            user = UserFactory()
+            db.session.add(user)
+            db.session.commit()
+            payload = {'identity': user.id}
+
+            self.assertEqual(jwt_identity(payload).id, user.id)
+            self.assertFalse(jwt_identity(payload).is_admin)
+
+            # The credentials are not cached, they are loaded when needed
+            _, identity = identity_cache.local.get(user.id)
+            self.assertNotIn('_password', identity)
+            self.assertNotIn('salt', identity)
+            password = user.password
+            db.session.expunge_all()
+            self.assertEqual(jwt_identity(payload).password, password)
+            user = User.query.get(user.id)
+
+            # Updating the user invalidates the cached identity
+            user.is_admin = True
+            db.session.commit()
+            self.assertTrue(jwt_identity(payload).is_admin)
+
 
 if __name__ == '__main__':
     unittest.main()
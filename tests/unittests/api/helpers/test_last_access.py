@@ -0,0 +1,42 @@
+import unittest
+
+from app import current_app as app
+from app.api.helpers.last_access import record_user_access, flush_last_access
+from app.factories.user import UserFactory
+from app.models import db
+from app.models.user import User
+from tests.unittests.setup_database import Setup
+from tests.unittests.utils import OpenEventTestCase
+
+
+class TestLastAccess(OpenEventTestCase):
+    def setUp(self):
+        self.app = Setup.create_app()
+        app.config['LAST_ACCESS_WRITE_BEHIND'] = True
+        app.config['LAST_ACCESS_BUFFER'] = 'memory'
+
+    def tearDown(self):
+        app.config['LAST_ACCESS_WRITE_BEHIND'] = False
+        app.config['LAST_ACCESS_BUFFER'] = 'redis'
+        super(TestLastAccess, self).tearDown()
+
+    def test_write_behind_flush(self):
+        with app.test_request_context():
+            user = UserFactory()
+            db.session.add(user)
+            db.session.commit()
+            user_id = user.id
+
+            record_user_access(user)
+            self.assertIsNone(User.query.get(user_id).last_accessed_at)
+
+            self.assertEqual(flush_last_access(), 1)
+            db.session.expire_all()
+            self.assertIsNotNone(User.query.get(user_id).last_accessed_at)
+
+            # Nothing left to flush
+            self.assertEqual(flush_last_access(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+
+from app import current_app as app
+from app.api.helpers.log import record_activity, record_activities, flush_activities
+from app.factories.user import UserFactory
+from app.models import db
+from app.models.activity import Activity
+from tests.unittests.setup_database import Setup
+from tests.unittests.utils import OpenEventTestCase
+
+
+class TestLog(OpenEventTestCase):
+    def setUp(self):
+        self.app = Setup.create_app()
+        app.config['ACTIVITY_LOG_WRITE_BEHIND'] = True
+        app.config['ACTIVITY_LOG_BUFFER'] = 'memory'
+
+    def tearDown(self):
+        app.config['ACTIVITY_LOG_WRITE_BEHIND'] = False
+        app.config['ACTIVITY_LOG_BUFFER'] = 'redis'
+        super(TestLog, self).tearDown()
+
+    def test_write_behind_flush(self):
+        with app.test_request_context():
+            user = UserFactory()
+            db.session.add(user)
+            db.session.commit()
+
+            record_activity('create_user', login_user=user, user=user)
+            record_activities('update_event', [{'event_id': 1}, {'event_id': 2}], login_user=user)
+            self.assertEqual(Activity.query.count(), 0)
+
+            self.assertEqual(flush_activities(), 3)
+            self.assertEqual(Activity.query.filter(Activity.actor == user.email + ' (' + str(user.id) + ')').count(),
+                             3)
+            self.assertEqual(Activity.query.filter_by(action='Event 2 updated').count(), 1)
+
+            # Nothing left to flush
+            self.assertEqual(flush_activities(), 0)
+
+    def test_record_activity_synchronous(self):
+        app.config['ACTIVITY_LOG_WRITE_BEHIND'] = False
+        with app.test_request_context():
+            record_activity('create_event', event_id=1)
+            self.assertEqual(Activity.query.filter_by(actor='Anonymous', action='Event 1 created').count(), 1)
+            self.assertEqual(flush_activities(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
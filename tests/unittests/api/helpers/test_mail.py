@@ -0,0 +1,36 @@
+import unittest
+
+from app import current_app as app, db
+from app.api.helpers.mail import send_bulk_email
+from app.models.activity import Activity
+from app.models.mail import Mail, AFTER_EVENT
+from tests.unittests.setup_database import Setup
+from tests.unittests.utils import OpenEventTestCase
+
+
+class TestMail(OpenEventTestCase):
+    def setUp(self):
+        self.app = Setup.create_app()
+        app.config['BULK_EMAIL_BATCH_SIZE'] = 2
+
+    def tearDown(self):
+        app.config['BULK_EMAIL_BATCH_SIZE'] = 500
+        super(TestMail, self).tearDown()
+
+    def test_send_bulk_email(self):
+        with app.test_request_context():
+            sent = send_bulk_email(['one@example.com', '', {'email': 'two@example.com', 'event_name': 'Other'},
+                                    'three@example.com'], AFTER_EVENT, event_name='Event', upcoming_events='')
+            self.assertEqual(sent, 3)
+
+            mails = db.session.query(Mail).order_by(Mail.id).all()
+            self.assertEqual([mail.recipient for mail in mails],
+                             ['one@example.com', 'two@example.com', 'three@example.com'])
+            self.assertEqual([mail.subject for mail in mails],
+                             ['Event Event is over', 'Event Other is over', 'Event Event is over'])
+            self.assertIn('Hi one@example.com', mails[0].message)
+            self.assertEqual(db.session.query(Activity).count(), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
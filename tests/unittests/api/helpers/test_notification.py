@@ -0,0 +1,49 @@
+import unittest
+
+from app import current_app as app, db
+from app.api.helpers.notification import create_notifications, is_notification_enabled
+from app.factories.message_setting import MessageSettingsFactory
+from app.factories.user import UserFactory
+from app.models.activity import Activity
+from app.models.notification import Notification, AFTER_EVENT, NotificationTopic
+from tests.unittests.setup_database import Setup
+from tests.unittests.utils import OpenEventTestCase
+
+
+class TestNotification(OpenEventTestCase):
+    def setUp(self):
+        self.app = Setup.create_app()
+
+    def test_is_notification_enabled(self):
+        with app.test_request_context():
+            self.assertTrue(is_notification_enabled(AFTER_EVENT))
+
+            message_settings = MessageSettingsFactory(action=AFTER_EVENT, notification_status=False)
+            db.session.add(message_settings)
+            db.session.commit()
+            self.assertFalse(is_notification_enabled(AFTER_EVENT))
+
+            message_settings.notification_status = True
+            db.session.commit()
+            self.assertTrue(is_notification_enabled(AFTER_EVENT))
+
+    def test_create_notifications(self):
+        with app.test_request_context():
+            first_user = UserFactory(email='first@example.com')
+            second_user = UserFactory(email='second@example.com')
+            db.session.add_all([first_user, second_user])
+            db.session.commit()
+
+            create_notifications([{'user': user, 'title': 'Title', 'message': 'Message',
+                                   'notification_topic': NotificationTopic.AFTER_EVENT, 'subject_id': 1}
+                                  for user in (first_user, second_user)])
+
+            notifications = db.session.query(Notification).order_by(Notification.id).all()
+            self.assertEqual([notification.user_id for notification in notifications],
+                             [first_user.id, second_user.id])
+            self.assertFalse(any(notification.is_read for notification in notifications))
+            self.assertEqual(db.session.query(Activity).count(), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
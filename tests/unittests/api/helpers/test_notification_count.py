@@ -0,0 +1,51 @@
+import unittest
+
+from app import current_app as app, db
+from app.api.helpers.notification import create_notifications
+from app.api.helpers.notification_count import get_unread_notification_count, mark_all_notifications_read, \
+    rebuild_unread_notification_counts
+from app.factories.user import UserFactory
+from app.models.notification import Notification, NotificationTopic
+from tests.unittests.setup_database import Setup
+from tests.unittests.utils import OpenEventTestCase
+
+
+class TestNotificationCount(OpenEventTestCase):
+    def setUp(self):
+        self.app = Setup.create_app()
+
+    def test_unread_notification_count(self):
+        with app.test_request_context():
+            user = UserFactory()
+            db.session.add(user)
+            db.session.commit()
+
+            notifications = [Notification(user_id=user.id, title='Title'), Notification(user_id=user.id, title='Title')]
+            db.session.add_all(notifications)
+            db.session.commit()
+            self.assertEqual(get_unread_notification_count(user.id), 2)
+            self.assertEqual(user.get_unread_notif_count(), 2)
+
+            notifications[0].is_read = True
+            db.session.commit()
+            self.assertEqual(get_unread_notification_count(user.id), 1)
+
+            create_notifications([{'user': user, 'title': 'Title', 'message': 'Message',
+                                   'notification_topic': NotificationTopic.AFTER_EVENT}] * 2)
+            self.assertEqual(get_unread_notification_count(user.id), 3)
+
+            db.session.delete(notifications[1])
+            db.session.commit()
+            self.assertEqual(get_unread_notification_count(user.id), 2)
+
+            self.assertEqual(mark_all_notifications_read(user.id), 2)
+            self.assertEqual(get_unread_notification_count(user.id), 0)
+
+            db.session.add(Notification(user_id=user.id, title='Title'))
+            db.session.commit()
+            rebuild_unread_notification_counts()
+            self.assertEqual(get_unread_notification_count(user.id), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,10 +3,17 @@ from datetime import timedelta, datetime, timezone
 
 from app import current_app as app, db
 from app.api.helpers import ticketing
-from app.api.helpers.order import set_expiry_for_order, delete_related_attendees_for_order
+from app.api.helpers.exceptions import ConflictException
+from app.api.helpers.inventory import get_ticket_availability
+from app.api.helpers.tasks import finish_pdf_tickets_task
+from app.api.helpers.order import set_expiry_for_order, delete_related_attendees_for_order, expire_pending_orders, \
+    create_onsite_attendees_for_order
 from app.factories.attendee import AttendeeFactory
 from app.factories.order import OrderFactory
+from app.factories.ticket import TicketFactory
+from app.factories.user import UserFactory
 from app.models.order import Order
+from app.models.ticket_holder import TicketHolder
 from tests.unittests.setup_database import Setup
 from tests.unittests.utils import OpenEventTestCase
 
@@ -44,6 +51,70 @@ class TestOrderUtilities(OpenEventTestCase):
             order = db.session.query(Order).filter(Order.id == obj.id).first()
             self.assertEqual(len(order.ticket_holders), 0)
 
+    def test_should_sweep_outdated_orders(self):
+        with app.test_request_context():
+            attendee = AttendeeFactory()
+            db.session.add(attendee)
+            db.session.commit()
+
+            outdated = OrderFactory()
+            outdated.created_at = datetime.now(timezone.utc) - timedelta(
+                minutes=ticketing.TicketingManager.get_order_expiry() + 10)
+            outdated.ticket_holders = [attendee, ]
+            valid = OrderFactory()
+            db.session.add_all([outdated, valid])
+            db.session.commit()
+
+            self.assertEqual(expire_pending_orders(batch_size=1), 1)
+            db.session.expire_all()
+            self.assertEqual(outdated.status, 'expired')
+            self.assertEqual(len(outdated.ticket_holders), 0)
+            self.assertEqual(valid.status, 'pending')
+
+    def test_should_create_onsite_attendees_in_bulk(self):
+        with app.test_request_context():
+            ticket = TicketFactory(quantity=3)
+            db.session.add(ticket)
+            db.session.commit()
+
+            data = {'event': 1, 'on_site_tickets': [{'id': ticket.id, 'quantity': 2}]}
+            create_onsite_attendees_for_order(data)
+            self.assertEqual(len(data['ticket_holders']), 2)
+            self.assertNotIn('on_site_tickets', data)
+
+            # Nothing is committed before the order, an order which fails leaves no ticket holder nor taken unit
+            db.session.rollback()
+            self.assertEqual(TicketHolder.query.filter_by(ticket_id=ticket.id).count(), 0)
+            self.assertEqual(get_ticket_availability(ticket.id), 3)
+
+            data = {'event': 1, 'on_site_tickets': [{'id': ticket.id, 'quantity': 2}]}
+            create_onsite_attendees_for_order(data)
+            db.session.commit()
+
+            data = {'event': 1, 'on_site_tickets': [{'id': ticket.id, 'quantity': 2}]}
+            with self.assertRaises(ConflictException):
+                create_onsite_attendees_for_order(data)
+            self.assertEqual(TicketHolder.query.filter_by(ticket_id=ticket.id).count(), 2)
+
+    def test_should_share_purchaser_pdf_when_tickets_are_rendered(self):
+        with app.test_request_context():
+            user = UserFactory()
+            db.session.add(user)
+            db.session.commit()
+            order = OrderFactory(status='completed', user_id=user.id)
+            order.tickets_pdf_url = 'https://example.com/purchaser.pdf'
+            order.tickets_pdf_status = 'pending'
+            buyer = AttendeeFactory(email=user.email)
+            attendee = AttendeeFactory(email='attendee@example.com', pdf_url='https://example.com/attendee.pdf')
+            order.ticket_holders = [buyer, attendee]
+            db.session.add(order)
+            db.session.commit()
+
+            finish_pdf_tickets_task(order.id)
+            self.assertEqual(order.tickets_pdf_status, 'completed')
+            self.assertEqual(buyer.pdf_url, 'https://example.com/purchaser.pdf')
+            self.assertEqual(attendee.pdf_url, 'https://example.com/attendee.pdf')
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+
+from app import current_app as app, db
+from app.api.helpers.order_rollups import get_event_rollup_statistics, get_ticket_rollup_statistics, \
+    rebuild_order_rollups
+from app.api.helpers.order_statistics import get_event_order_statistics, get_ticket_order_statistics
+from app.factories.order import OrderFactory
+from app.factories.ticket import TicketFactory
+from app.models.order import OrderTicket
+from tests.unittests.setup_database import Setup
+from tests.unittests.utils import OpenEventTestCase
+
+
+class TestOrderStatistics(OpenEventTestCase):
+    def setUp(self):
+        self.app = Setup.create_app()
+
+    def test_order_statistics(self):
+        with app.test_request_context():
+            ticket = TicketFactory()
+            db.session.add(ticket)
+            db.session.commit()
+
+            completed = OrderFactory(status='completed', amount=30)
+            pending = OrderFactory(status='pending', amount=10)
+            db.session.add_all([completed, pending])
+            db.session.commit()
+            db.session.add_all([OrderTicket(order_id=completed.id, ticket_id=ticket.id, quantity=3),
+                                OrderTicket(order_id=pending.id, ticket_id=ticket.id, quantity=1)])
+            db.session.commit()
+
+            for statistics in (get_event_order_statistics([1])[1], get_ticket_order_statistics([ticket.id])[ticket.id]):
+                self.assertEqual(statistics['tickets']['total'], 4)
+                self.assertEqual(statistics['tickets']['completed'], 3)
+                self.assertEqual(statistics['orders']['total'], 2)
+                self.assertEqual(statistics['orders']['pending'], 1)
+                self.assertEqual(statistics['sales']['completed'], 30)
+                self.assertEqual(statistics['sales']['draft'], 0)
+
+    def test_order_rollups(self):
+        with app.test_request_context():
+            ticket = TicketFactory()
+            db.session.add(ticket)
+            db.session.commit()
+
+            order = OrderFactory(status='pending', amount=20)
+            db.session.add(order)
+            db.session.commit()
+            db.session.add(OrderTicket(order_id=order.id, ticket_id=ticket.id, quantity=2))
+            db.session.commit()
+
+            order.status = 'completed'
+            db.session.commit()
+
+            self.assertEqual(get_event_rollup_statistics([1]), get_event_order_statistics([1]))
+            self.assertEqual(get_ticket_rollup_statistics([ticket.id]), get_ticket_order_statistics([ticket.id]))
+            statistics = get_event_rollup_statistics([1])[1]
+            self.assertEqual(statistics['orders']['pending'], 0)
+            self.assertEqual(statistics['tickets']['completed'], 2)
+            self.assertEqual(statistics['sales']['completed'], 20)
+
+            rebuild_order_rollups()
+            self.assertEqual(get_event_rollup_statistics([1]), get_event_order_statistics([1]))
+
+    def test_order_statistics_without_orders(self):
+        with app.test_request_context():
+            statistics = get_event_order_statistics([1])[1]
+            self.assertEqual(statistics['orders']['total'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+import unittest
+
+from app import current_app as app, db
+from app.api.helpers.outbox import dispatch_outbox, TICKET_PURCHASE_ATTENDEES, TICKET_PURCHASE_ORGANIZERS
+from app.factories.order import OrderFactory
+from app.models.outbox_message import OutboxMessage
+from tests.unittests.setup_database import Setup
+from tests.unittests.utils import OpenEventTestCase
+
+
+class TestOutbox(OpenEventTestCase):
+    def setUp(self):
+        self.app = Setup.create_app()
+
+    def test_completed_order_messages(self):
+        with app.test_request_context():
+            order = OrderFactory()
+            db.session.add(order)
+            db.session.commit()
+            self.assertEqual(OutboxMessage.query.count(), 0)
+
+            order.status = 'completed'
+            db.session.commit()
+            self.assertEqual(order.tickets_pdf_status, 'pending')
+            self.assertEqual(sorted(message.action for message in OutboxMessage.query),
+                             sorted([TICKET_PURCHASE_ATTENDEES, TICKET_PURCHASE_ORGANIZERS]))
+
+            # the attendee mails wait for the PDF tickets
+            self.assertEqual(dispatch_outbox(), 1)
+            attendees_message = OutboxMessage.query.filter_by(action=TICKET_PURCHASE_ATTENDEES).one()
+            self.assertIsNone(attendees_message.sent_at)
+
+            order.tickets_pdf_status = 'completed'
+            attendees_message.claimed_until = None
+            db.session.commit()
+            self.assertEqual(dispatch_outbox(), 1)
+            self.assertEqual(OutboxMessage.query.filter(OutboxMessage.sent_at.is_(None)).count(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
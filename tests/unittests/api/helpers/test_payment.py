@@ -0,0 +1,73 @@
+import unittest
+
+from app import current_app as app, db
+from app.api.helpers.tasks import capture_order_payment_task
+from app.api.helpers.ticketing import TicketingManager
+from app.factories.order import OrderFactory
+from tests.unittests.setup_database import Setup
+from tests.unittests.utils import OpenEventTestCase
+
+
+class TestPaymentCapture(OpenEventTestCase):
+    def setUp(self):
+        self.app = Setup.create_app()
+        app.config['PAYMENT_GATEWAY_STUB'] = True
+
+    def tearDown(self):
+        app.config['PAYMENT_GATEWAY_STUB'] = False
+        super(TestPaymentCapture, self).tearDown()
+
+    def test_place_order_payment(self):
+        with app.test_request_context():
+            order = OrderFactory(payment_mode='stripe', amount=10.0)
+            declined = OrderFactory(payment_mode='stripe', amount=10.0)
+            db.session.add_all([order, declined])
+            db.session.commit()
+
+            task = TicketingManager.place_order_payment(order, stripe_token='tok_visa')
+            self.assertEqual(task.get(), {'status': True, 'message': 'Charge successful'})
+            self.assertEqual(order.status, 'completed')
+            self.assertTrue(order.transaction_id.startswith('ch_stub_'))
+
+            task = TicketingManager.place_order_payment(declined, stripe_token='fail_visa')
+            self.assertFalse(task.get()['status'])
+            self.assertEqual(declined.status, 'expired')
+
+    def test_unexpected_capture_error_expires_order(self):
+        def charge(order, token_id):
+            raise ValueError('gateway error')
+
+        with app.test_request_context():
+            order = OrderFactory(payment_mode='stripe', amount=10.0)
+            db.session.add(order)
+            db.session.commit()
+
+            charge_stripe_order_payment = TicketingManager.charge_stripe_order_payment
+            TicketingManager.charge_stripe_order_payment = staticmethod(charge)
+            try:
+                result = TicketingManager.place_order_payment(order, stripe_token='tok_visa').get()
+            finally:
+                TicketingManager.charge_stripe_order_payment = charge_stripe_order_payment
+            self.assertFalse(result['status'])
+            self.assertEqual(order.status, 'expired')
+
+    def test_completed_order_is_never_expired(self):
+        with app.test_request_context():
+            order = OrderFactory(payment_mode='stripe', amount=10.0)
+            db.session.add(order)
+            db.session.commit()
+            TicketingManager.place_order_payment(order, stripe_token='tok_visa')
+            transaction_id = order.transaction_id
+
+            # a retried capture finds the order captured already
+            self.assertEqual(capture_order_payment_task.delay(order.id).get()['message'], 'Order is completed')
+
+            # the failure of a concurrent charge leaves the order completed
+            status, _ = TicketingManager.charge_stripe_order_payment(order, 'fail_visa')
+            self.assertFalse(status)
+            self.assertEqual(order.status, 'completed')
+            self.assertEqual(order.transaction_id, transaction_id)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+
+from app import current_app as app
+from app.api.helpers.db import get_or_create, save_to_db
+from app.api.helpers.permission_table import has_perm
+from app.api.helpers.role_matrix import get_role_id
+from app.factories.event import EventFactoryBasic
+from app.factories.user import UserFactory
+from app.models import db
+from app.models.permission import Permission
+from app.models.session import Session
+from app.models.users_events_role import UsersEventsRoles
+from tests.unittests.setup_database import Setup
+from tests.unittests.utils import OpenEventTestCase
+
+
+class TestPermissionTable(OpenEventTestCase):
+    def setUp(self):
+        self.app = Setup.create_app()
+
+    def test_has_perm(self):
+        with app.test_request_context():
+            user = UserFactory()
+            event = EventFactoryBasic()
+            db.session.add_all([user, event])
+            db.session.commit()
+
+            uer, _ = get_or_create(UsersEventsRoles, user_id=user.id, event_id=event.id)
+            uer.role_id = get_role_id('coorganizer')
+            save_to_db(uer)
+
+            self.assertTrue(has_perm(user, event.id, 'session', 'read'))
+            self.assertFalse(has_perm(user, event.id, 'session', 'create'))
+            self.assertTrue(user.can_update(Session, event.id))
+            self.assertFalse(user.can_delete(Session, event.id))
+            self.assertRaises(ValueError, has_perm, user, event.id, 'session', 'publish')
+
+    def test_refresh_on_permission_change(self):
+        with app.test_request_context():
+            user = UserFactory()
+            event = EventFactoryBasic()
+            db.session.add_all([user, event])
+            db.session.commit()
+
+            uer, _ = get_or_create(UsersEventsRoles, user_id=user.id, event_id=event.id)
+            uer.role_id = get_role_id('moderator')
+            save_to_db(uer)
+            self.assertFalse(has_perm(user, event.id, 'session', 'update'))
+
+            permission = Permission.query.filter_by(role_id=get_role_id('moderator')).join(Permission.service) \
+                .filter_by(name='session').one()
+            permission.can_update = True
+            save_to_db(permission)
+            self.assertTrue(has_perm(user, event.id, 'session', 'update'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+from datetime import datetime, timedelta
+
+import pytz
+
+from app import current_app as app, db
+from app.api.helpers.exceptions import UnprocessableEntity
+from app.api.helpers.pricing import calculate_quote, get_quote
+from app.api.helpers.ticketing import TicketingManager
+from app.factories.discount_code import DiscountCodeTicketFactory
+from app.factories.event import EventFactoryBasic
+from app.factories.order import OrderFactory
+from app.factories.ticket import TicketFactory
+from app.factories.ticket_fee import TicketFeesFactory
+from app.models.order import OrderTicket
+from tests.unittests.setup_database import Setup
+from tests.unittests.utils import OpenEventTestCase
+
+
+class TestPricing(OpenEventTestCase):
+    def setUp(self):
+        self.app = Setup.create_app()
+
+    def test_calculate_quote(self):
+        with app.test_request_context():
+            event = EventFactoryBasic(payment_currency='USD')
+            db.session.add(event)
+            db.session.commit()
+            fees = TicketFeesFactory(currency='USD', service_fee=10.0, maximum_fee=3.0)
+            absorbed = TicketFactory(event_id=event.id, price=10.0, is_fee_absorbed=True)
+            charged = TicketFactory(event_id=event.id, price=20.0, is_fee_absorbed=False)
+            now = datetime.now(pytz.utc)
+            discount_code = DiscountCodeTicketFactory(type='amount', value=5.0, event_id=event.id, min_quantity=1,
+                                                      valid_from=now - timedelta(days=1),
+                                                      valid_till=now + timedelta(days=1))
+            discount_code.tickets = [charged]
+            db.session.add_all([fees, absorbed, charged, discount_code])
+            db.session.commit()
+
+            quote = calculate_quote([(absorbed.id, 2), (charged.id, 1)])
+            self.assertEqual(quote['currency'], 'USD')
+            self.assertEqual(quote['sub_total'], 40.0)
+            self.assertEqual(quote['fee'], 2.0)
+            self.assertEqual(quote['amount'], 42.0)
+
+            quote = calculate_quote([(charged.id, 1), (charged.id, 1), (absorbed.id, 1)], discount_code.id)
+            self.assertEqual([item['quantity'] for item in quote['tickets']], [2, 1])
+            self.assertEqual(quote['fee'], 3.0)
+            self.assertEqual(quote['discount'], 10.0)
+            self.assertEqual(quote['amount'], 43.0)
+
+            # The quotes of the API reject the discount codes a new order would reject
+            self.assertEqual(get_quote([(charged.id, 1)], discount_code.id)['discount'], 5.0)
+            discount_code.is_active = False
+            db.session.commit()
+            with self.assertRaises(UnprocessableEntity):
+                get_quote([(charged.id, 2)], discount_code.id)
+            discount_code.is_active = True
+            db.session.commit()
+
+            order = OrderFactory(event_id=event.id, discount_code_id=discount_code.id)
+            db.session.add(order)
+            db.session.commit()
+            db.session.add_all([OrderTicket(order_id=order.id, ticket_id=absorbed.id, quantity=1),
+                                OrderTicket(order_id=order.id, ticket_id=charged.id, quantity=2)])
+            db.session.commit()
+            TicketingManager.calculate_update_amount(order)
+            self.assertEqual(order.amount, 43.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
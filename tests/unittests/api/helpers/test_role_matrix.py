@@ -0,0 +1,45 @@
+import unittest
+
+from app import current_app as app
+from app.api.helpers.db import get_or_create, save_to_db
+from app.api.helpers.role_matrix import get_role_id, get_role_matrix, has_event_role
+from app.factories.event import EventFactoryBasic
+from app.factories.user import UserFactory
+from app.models import db
+from app.models.role import Role
+from app.models.users_events_role import UsersEventsRoles
+from tests.unittests.setup_database import Setup
+from tests.unittests.utils import OpenEventTestCase
+
+
+class TestRoleMatrix(OpenEventTestCase):
+    def setUp(self):
+        self.app = Setup.create_app()
+
+    def test_get_role_id(self):
+        with app.test_request_context():
+            role = Role.query.filter_by(name='organizer').one()
+            self.assertEqual(get_role_id('organizer'), role.id)
+            self.assertIsNone(get_role_id('not_a_role'))
+
+    def test_has_event_role(self):
+        with app.test_request_context():
+            user = UserFactory()
+            event = EventFactoryBasic()
+            db.session.add_all([user, event])
+            db.session.commit()
+
+            self.assertFalse(has_event_role(user.id, 'registrar', event.id))
+
+            uer, _ = get_or_create(UsersEventsRoles, user_id=user.id, event_id=event.id)
+            uer.role_id = get_role_id('registrar')
+            save_to_db(uer)
+
+            self.assertTrue(has_event_role(user.id, 'registrar', event.id))
+            self.assertTrue(has_event_role(user.id, 'registrar'))
+            self.assertFalse(has_event_role(user.id, 'organizer', event.id))
+            self.assertIn((event.id, 'registrar'), get_role_matrix(user.id))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,33 @@
+import unittest
+
+from app import current_app as app
+from app.api.helpers.smtp import get_mailer, make_message, stop_mailers
+from tests.unittests.setup_database import Setup
+from tests.unittests.utils import OpenEventTestCase
+
+
+class TestSMTP(OpenEventTestCase):
+    def setUp(self):
+        self.app = Setup.create_app()
+
+    def test_get_mailer(self):
+        with app.test_request_context():
+            config = {'host': 'localhost', 'username': 'user', 'password': 'password', 'encryption': 'none',
+                      'port': 25}
+            mailer = get_mailer(config)
+            self.assertIs(get_mailer(dict(config)), mailer)
+            self.assertIsNot(get_mailer(dict(config, username='other')), mailer)
+            stop_mailers()
+            self.assertIsNot(get_mailer(config), mailer)
+            stop_mailers()
+
+    def test_make_message(self):
+        message = make_message({'from': 'from@example.com', 'to': 'to@example.com', 'subject': 'Subject',
+                                'html': '<p>Text</p>'})
+        self.assertEqual(message.subject, 'Subject')
+        self.assertEqual(message.plain, 'Text')
+        self.assertEqual(message.rich, '<p>Text</p>')
+
+
+if __name__ == '__main__':
+    unittest.main()